@@ -0,0 +1,214 @@
+# benchmarks/bench_extraction.py
+import argparse
+import contextlib
+import functools
+import http.server
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from benchmarks.common import browser_heap_mb, create_headless_driver
+from benchmarks.synthetic_chat import write_chat_fixture
+from core.instrumentation import RunMetrics
+from core.wait_engine import WaitEngine
+from modules.chat_interaction import ChatInteraction
+from modules.content_extractor import ContentExtractor
+from modules.file_manager import FileManager
+from modules.message_harvester import MessageHarvester
+
+# Lista as URLs blob: da mídia presente na conversa sintética
+MEDIA_URLS_SCRIPT = """
+return Array.from(document.querySelectorAll('img[src^="blob:"], a[href^="blob:"]'),
+                  (node) => node.src || node.href);
+"""
+
+# Conta as mensagens renderizadas na conversa
+RENDERED_MESSAGES_SCRIPT = """
+return document.querySelectorAll('div.message-in, div.message-out').length;
+"""
+
+
+def run_scenario(driver, metrics, name, size, function):
+    """
+    Executa um cenário medindo tempo, comandos WebDriver e memória de pico.
+
+    Args:
+        driver: Instância do WebDriver Selenium
+        metrics (RunMetrics): Métricas instrumentando o driver (cada cenário é uma fase)
+        name (str): Nome do cenário
+        size (int): Quantidade de mensagens da conversa
+        function: Função que executa o cenário e retorna a quantidade de itens processados
+
+    Returns:
+        dict: Resultado do cenário
+    """
+    metrics.start_group(str(size))
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), metrics.phase(name) as phase:
+            started = time.perf_counter()
+            items = function()
+            elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    calls = sum(phase['commands'].values())
+
+    return {
+        'scenario': name,
+        'size': size,
+        'items': items,
+        'seconds': round(elapsed, 4),
+        'items_per_second': round(items / elapsed, 1) if elapsed else None,
+        'webdriver_calls': calls,
+        'calls_per_item': round(calls / items, 3) if items else None,
+        'webdriver_seconds': round(phase['command_seconds'], 4),
+        'commands': dict(phase['commands']),
+        'python_peak_mb': round(peak / (1024 * 1024), 2),
+        'browser_heap_mb': round(browser_heap_mb(driver), 2),
+    }
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    """Servidor de arquivos sem log de requisições."""
+    def log_message(self, format, *args):
+        pass
+
+
+def start_file_server(directory):
+    """Inicia um servidor HTTP local em segundo plano servindo o diretório informado."""
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_size(driver, metrics, size, args, work_dir):
+    """
+    Executa todos os cenários para uma conversa de size mensagens.
+
+    Returns:
+        list: Resultados de cada cenário
+    """
+    results = []
+    extractor = ContentExtractor(driver)
+
+    # Conversa completa no DOM: extração em lote, por data e por elemento
+    driver.get("file://" + write_chat_fixture(size, directory=work_dir, messages_per_day=args.per_day))
+    results.append(run_scenario(driver, metrics, "ContentExtractor.extract_messages_bulk", size,
+                                lambda: len(extractor.extract_messages_bulk())))
+    results.append(run_scenario(driver, metrics, "ContentExtractor.get_messages_by_date", size,
+                                lambda: len(extractor.get_messages_by_date())))
+
+    # O caminho por elemento faz várias chamadas por mensagem; conversas grandes são limitadas
+    per_element_size = min(size, args.per_element_limit)
+    if per_element_size != size:
+        driver.get("file://" + write_chat_fixture(per_element_size, directory=work_dir, messages_per_day=args.per_day))
+    results.append(run_scenario(driver, metrics, "ContentExtractor.get_message_details", per_element_size,
+                                lambda: len(extractor.get_message_details())))
+
+    # Conversa completa no DOM: coleta com poda das mensagens já entregues
+    driver.get("file://" + write_chat_fixture(size, directory=work_dir, messages_per_day=args.per_day))
+    pruning_harvester = MessageHarvester(driver, extractor, max_seen_ids=args.per_day * 10, prune=True)
+
+    def harvest_with_pruning():
+        count = 0
+        for batch in pruning_harvester.harvest_batches():
+            pruning_harvester.commit(batch)
+            count += len(batch)
+        return count
+
+    results.append(run_scenario(driver, metrics, "MessageHarvester.harvest (poda)", size, harvest_with_pruning))
+
+    # Conversa virtualizada: coleta com rolagem e carregamento do histórico
+    virtual_path = "file://" + write_chat_fixture(size, directory=work_dir, messages_per_day=args.per_day,
+                                                  virtualized=True)
+    driver.get(virtual_path)
+    harvester = MessageHarvester(driver, extractor, max_seen_ids=args.per_day * 10)
+    results.append(run_scenario(driver, metrics, "MessageHarvester.harvest", size,
+                                lambda: sum(1 for _ in harvester.harvest())))
+
+    driver.get(virtual_path)
+    chat_interaction = ChatInteraction(driver, WaitEngine(driver))
+
+    def load_all_messages():
+        chat_interaction.load_all_messages()
+        return driver.execute_script(RENDERED_MESSAGES_SCRIPT)
+
+    results.append(run_scenario(driver, metrics, "ChatInteraction.load_all_messages", size, load_all_messages))
+
+    # Mídia: blobs lidos na página e arquivos HTTP servidos localmente
+    media_size = min(size, args.media_limit)
+    driver.get("file://" + write_chat_fixture(media_size, directory=work_dir, messages_per_day=args.per_day,
+                                              image_ratio=0.1, document_ratio=0.05, media_kb=args.media_kb))
+    media_dir = tempfile.mkdtemp(dir=work_dir)
+    file_manager = FileManager(driver, media_dir, driver.current_window_handle)
+    urls = driver.execute_script(MEDIA_URLS_SCRIPT)
+    items = [(url, os.path.join(media_dir, f"blob_{index}")) for index, url in enumerate(urls)]
+    results.append(run_scenario(driver, metrics, "FileManager.download_blobs", len(items),
+                                lambda: len(file_manager.download_blobs(items))))
+
+    served_dir = tempfile.mkdtemp(dir=work_dir)
+    for index in range(len(items)):
+        with open(os.path.join(served_dir, f"file_{index}.bin"), 'wb') as f:
+            f.write(os.urandom(args.media_kb * 1024))
+    server = start_file_server(served_dir)
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        def download_http():
+            for index in range(len(items)):
+                file_manager.download_file(f"{base_url}/file_{index}.bin",
+                                           os.path.join(media_dir, f"http_{index}.bin"))
+            return len(items)
+
+        results.append(run_scenario(driver, metrics, "FileManager.download_file", len(items), download_http))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return results
+
+
+def main():
+    """Mede a extração em conversas sintéticas de vários tamanhos."""
+    parser = argparse.ArgumentParser(description="Benchmark da extração em conversas sintéticas do WhatsApp Web.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Quantidades de mensagens")
+    parser.add_argument("--per-day", type=int, default=50, help="Mensagens entre divisores de data")
+    parser.add_argument("--per-element-limit", type=int, default=10000,
+                        help="Limite de mensagens no cenário por elemento (get_message_details)")
+    parser.add_argument("--media-limit", type=int, default=10000, help="Limite de mensagens nos cenários de mídia")
+    parser.add_argument("--media-kb", type=int, default=16, help="Tamanho de cada arquivo de mídia em KB")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo JSON")
+    args = parser.parse_args()
+
+    driver = create_headless_driver()
+    metrics = RunMetrics(metrics_format=None)
+    metrics.instrument(driver)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            print(f"{'cenário':<38} {'msgs':>7} {'tempo (s)':>10} {'itens/s':>10} {'cmds/item':>10} "
+                  f"{'pico py (MB)':>13} {'heap js (MB)':>13}")
+            for size in args.sizes:
+                for result in bench_size(driver, metrics, size, args, work_dir):
+                    results.append(result)
+                    print(f"{result['scenario']:<38} {result['size']:>7} {result['seconds']:>10.3f} "
+                          f"{result['items_per_second'] or 0:>10.0f} {result['calls_per_item'] or 0:>10.3f} "
+                          f"{result['python_peak_mb']:>13.2f} {result['browser_heap_mb']:>13.2f}")
+    finally:
+        metrics.uninstrument()
+        driver.quit()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"[DEBUG] Resultados salvos em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_messages_by_date.py
+import argparse
+import contextlib
+import io
+import re
+import time
+
+from selenium.webdriver.common.by import By
+
+from benchmarks.common import create_headless_driver
+from benchmarks.synthetic_chat import write_chat_fixture
+from modules.content_extractor import ContentExtractor
+
+
+def legacy_get_messages_by_date(driver):
+    """
+    Implementação original de ContentExtractor.get_messages_by_date, mantida para comparação.
+
+    Clona um Range do DOM para cada par de divisores de data consecutivos e
+    separa o textContent por 'tail-out'/'msg-check'.
+    """
+    messages = []
+    list_messages_date = driver.find_elements(By.XPATH, '//div[@class="_amjw _amk1 _aotl  focusable-list-item"]')
+    for index in range(len(list_messages_date) - 1):
+        first_element = list_messages_date[index]
+        second_element = list_messages_date[index + 1]
+        html_between = driver.execute_script(
+            """
+            let range = document.createRange();
+            range.setStart(arguments[0], 0);
+            range.setEnd(arguments[1], arguments[1].childNodes.length);
+            return range.cloneContents().textContent;
+            """,
+            first_element, second_element
+        )
+        print(f"[DEBUG] HTML entre os elementos: {html_between}")
+
+        html_between_list = html_between.split('tail-out')
+        html_between_list = [part.split('msg-check')[0] for part in html_between_list if 'msg-check' in part]
+        for string_html in html_between_list:
+            timestamp_regex = (re.search(r'(?<!\d{2}:\d{2})\d{2}:\d{2}(?!\d{2}:\d{2})', string_html)
+                               or re.search(r'\d{2}:\d{2}\d{2}:\d{2}', string_html))
+            if timestamp_regex:
+                messages.append({
+                    "date": first_element.text.strip(),
+                    "message_text": string_html.replace(timestamp_regex.group(), ''),
+                    "timestamp": timestamp_regex.group()
+                })
+                print(f"[DEBUG] Mensagem extraída: {messages[-1]}")
+    return messages
+
+
+def measure(function, repeat):
+    """Executa a função repeat vezes (sem a saída de debug) e retorna o melhor tempo e o resultado."""
+    best, result = None, None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    """Compara a implementação original e a de passagem única em conversas sintéticas."""
+    parser = argparse.ArgumentParser(description="Benchmark de ContentExtractor.get_messages_by_date.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000], help="Quantidades de mensagens")
+    parser.add_argument("--per-day", type=int, default=50, help="Mensagens entre divisores de data")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por medição (usa a melhor)")
+    args = parser.parse_args()
+
+    driver = create_headless_driver()
+    try:
+        extractor = ContentExtractor(driver)
+        print(f"{'mensagens':>10} {'original (s)':>13} {'msgs':>7} {'passagem única (s)':>19} {'msgs':>7} {'ganho':>7}")
+        for size in args.sizes:
+            driver.get("file://" + write_chat_fixture(size, messages_per_day=args.per_day))
+
+            legacy_seconds, legacy = measure(lambda: legacy_get_messages_by_date(driver), args.repeat)
+            single_seconds, single = measure(extractor.get_messages_by_date, args.repeat)
+            print(f"{size:>10} {legacy_seconds:>13.3f} {len(legacy):>7} {single_seconds:>19.3f} {len(single):>7} "
+                  f"{legacy_seconds / single_seconds if single_seconds else float('inf'):>6.1f}x")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
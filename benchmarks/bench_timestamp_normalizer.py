@@ -0,0 +1,61 @@
+# benchmarks/bench_timestamp_normalizer.py
+import argparse
+import datetime
+import random
+import re
+import time
+
+from utils.timestamp_normalizer import TimestampNormalizer
+
+
+def legacy_parse(prefix):
+    """Implementação original de get_timestamp_regex (sem o print), mantida para comparação."""
+    match = re.search(r'\[(\d{2}:\d{2}), (\d{2}/\d{2}/\d{4})\] (.*?):', prefix)
+    timestamp = datetime.datetime.strptime(f"{match.group(2)} {match.group(1)}", "%d/%m/%Y %H:%M").strftime("%Y-%m-%d-%H:%M")
+    return match.group(3), timestamp
+
+
+def generate_prefixes(count, messages_per_day=300, seed=0):
+    """Gera prefixos data-pre-plain-text no formato pt-BR, com vários remetentes."""
+    rng = random.Random(seed)
+    start = datetime.datetime(2021, 1, 1, 8, 0)
+    step = datetime.timedelta(minutes=max(1, 900 // messages_per_day))
+    prefixes = []
+    for index in range(count):
+        day, position = divmod(index, messages_per_day)
+        when = start + datetime.timedelta(days=day) + step * position
+        prefixes.append(f"[{when:%H:%M}, {when:%d/%m/%Y}] Pessoa {rng.randint(1, 40)}: ")
+    return prefixes
+
+
+def main():
+    """Compara a interpretação por mensagem com a normalização em lote."""
+    parser = argparse.ArgumentParser(description="Benchmark da normalização de timestamps.")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Quantidade de prefixos")
+    parser.add_argument("--legacy-count", type=int, default=100_000, help="Prefixos usados na medição original")
+    args = parser.parse_args()
+
+    prefixes = generate_prefixes(args.count)
+
+    started = time.perf_counter()
+    for prefix in prefixes[:args.legacy_count]:
+        legacy_parse(prefix)
+    legacy_rate = args.legacy_count / (time.perf_counter() - started)
+
+    normalizer = TimestampNormalizer()
+    started = time.perf_counter()
+    batch = normalizer.normalize_batch(prefixes)
+    batch_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    normalizer.normalize_batch(prefixes, with_text=True)
+    text_seconds = time.perf_counter() - started
+
+    print(f"original:         {legacy_rate:>12,.0f} prefixos/s ({args.count / legacy_rate:.2f}s estimados para {args.count:,})")
+    print(f"lote (epochs):    {args.count / batch_seconds:>12,.0f} prefixos/s ({batch_seconds:.2f}s)")
+    print(f"lote (+ texto):   {args.count / text_seconds:>12,.0f} prefixos/s ({text_seconds:.2f}s)")
+    print(f"memória dos epochs: {batch.epochs.itemsize * len(batch.epochs) / (1024 * 1024):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# benchmarks/common.py
+from selenium import webdriver
+
+from core.browser_setup import BrowserSetup
+
+
+def create_headless_driver():
+    """Abre um Chrome headless sem perfil, suficiente para páginas locais (file://)."""
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1280,900")
+    options.add_argument("--allow-file-access-from-files")
+    return BrowserSetup.get_chrome_driver(options)
+
+
+def browser_heap_mb(driver) -> float:
+    """Retorna o heap JavaScript usado pela página em MB (0 se indisponível)."""
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})['metrics']
+        used = next(metric['value'] for metric in metrics if metric['name'] == 'JSHeapUsedSize')
+        return used / (1024 * 1024)
+    except Exception:
+        return 0.0
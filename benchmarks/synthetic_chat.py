@@ -0,0 +1,209 @@
+# benchmarks/synthetic_chat.py
+import datetime
+import html
+import json
+import os
+import random
+import tempfile
+
+# Classe dos divisores de data usada pela implementação original de get_messages_by_date
+DATE_DIVIDER_CLASS = "_amjw _amk1 _aotl  focusable-list-item"
+
+# Altura fixa de cada linha na conversa virtualizada (px)
+ROW_HEIGHT = 72
+
+SENDERS = ["Ana Souza", "Bruno Lima", "Carla Dias", "Diego Alves", "Elisa Rocha", "Fábio Nunes"]
+WORDS = (
+    "bom dia pessoal reunião amanhã às dez horas alguém pode confirmar o boleto foi pago "
+    "segue o documento atualizado obrigado pela ajuda vamos marcar para sexta combinado"
+).split()
+
+# Script da página: cria as URLs blob: da mídia e, na versão virtualizada, mantém
+# no DOM apenas uma janela de linhas ao redor da posição de rolagem, como o WhatsApp Web.
+FIXTURE_SCRIPT = """
+(() => {
+    const mediaKb = %(media_kb)d;
+    const blobs = {};
+    const blobUrl = (kind, index) => {
+        const key = kind + index;
+        if (!blobs[key]) {
+            const header = kind === 'image'
+                ? [137, 80, 78, 71, 13, 10, 26, 10]
+                : Array.from('%%PDF-1.4\\n').map((c) => c.charCodeAt(0));
+            const bytes = new Uint8Array(mediaKb * 1024);
+            bytes.set(header);
+            for (let i = header.length; i < bytes.length; i++) { bytes[i] = (i * 31 + index) & 255; }
+            const type = kind === 'image' ? 'image/png' : 'application/pdf';
+            blobs[key] = URL.createObjectURL(new Blob([bytes], {type: type}));
+        }
+        return blobs[key];
+    };
+    const materialize = (root) => {
+        root.querySelectorAll('[data-fixture-blob]').forEach((node) => {
+            const [kind, index] = node.getAttribute('data-fixture-blob').split(':');
+            node.setAttribute(node.tagName === 'IMG' ? 'src' : 'href', blobUrl(kind, Number(index)));
+            node.removeAttribute('data-fixture-blob');
+        });
+    };
+
+    const pane = document.getElementById('pane');
+    const list = document.querySelector('#pane [role="application"]');
+    const source = document.getElementById('rows');
+    if (!source) {
+        materialize(list);
+        pane.scrollTop = pane.scrollHeight;
+        return;
+    }
+
+    const rows = JSON.parse(source.textContent);
+    const windowSize = %(window_rows)d, rowHeight = %(row_height)d;
+    const top = document.createElement('div'), bottom = document.createElement('div');
+    let start = -1;
+
+    const render = () => {
+        const first = Math.floor(pane.scrollTop / rowHeight);
+        const next = Math.max(0, Math.min(rows.length - windowSize, first - Math.floor(windowSize / 3)));
+        if (start >= 0 && Math.abs(next - start) < windowSize / 6) { return; }
+        start = next;
+        const end = Math.min(rows.length, start + windowSize);
+        list.innerHTML = rows.slice(start, end).join('');
+        materialize(list);
+        top.style.height = (start * rowHeight) + 'px';
+        bottom.style.height = ((rows.length - end) * rowHeight) + 'px';
+    };
+
+    list.before(top);
+    list.after(bottom);
+
+    // Abre a conversa no fim, como o WhatsApp Web
+    render();
+    pane.scrollTop = pane.scrollHeight;
+    render();
+    pane.addEventListener('scroll', () => requestAnimationFrame(render));
+})();
+"""
+
+
+def _message_row(index, when, sender, text, outgoing, show_author, image=False, document=False):
+    """Gera o HTML de uma linha de mensagem no formato do WhatsApp Web."""
+    direction = "message-out" if outgoing else "message-in"
+    pre_plain_text = f"[{when:%H:%M}, {when:%d/%m/%Y}] {sender}: "
+    author = f'<span data-testid="author" dir="auto">{html.escape(sender)}</span>' if show_author else ""
+    media = ""
+    if image:
+        media += f'<div data-testid="image-thumb"><img data-fixture-blob="image:{index}" alt=""></div>'
+    if document:
+        media += (f'<div data-testid="document-thumb"><a data-fixture-blob="document:{index}" '
+                  f'download="documento_{index}.pdf" title="documento_{index}.pdf">documento_{index}.pdf</a></div>')
+    return (
+        f'<div class="focusable-list-item" role="row">'
+        f'<div data-id="{"true" if outgoing else "false"}_120363000000000000@g.us_{index:016X}">'
+        f'<div class="{direction} focusable-list-item">'
+        f'<span data-icon="tail-out"><svg><title>tail-out</title></svg></span>'
+        f'<div data-testid="msg-container">{author}{media}'
+        f'<div class="copyable-text" data-pre-plain-text="{html.escape(pre_plain_text, quote=True)}">'
+        f'<span dir="ltr" class="selectable-text copyable-text"><span>{html.escape(text)}</span></span>'
+        f'</div>'
+        f'<div data-testid="msg-meta"><span>{when:%H:%M}</span>'
+        f'<span data-icon="msg-check"><svg><title>msg-check</title></svg></span></div>'
+        f'</div></div></div></div>'
+    )
+
+
+def generate_rows(num_messages, messages_per_day=50, image_ratio=0.0, document_ratio=0.0, seed=0):
+    """
+    Gera as linhas (divisores de data e mensagens) de uma conversa sintética.
+
+    Args:
+        num_messages (int): Quantidade de mensagens
+        messages_per_day (int): Mensagens entre dois divisores de data
+        image_ratio (float): Fração das mensagens com imagem
+        document_ratio (float): Fração das mensagens com documento
+        seed (int): Semente do gerador aleatório (conversas reproduzíveis)
+
+    Returns:
+        list: HTML de cada linha, da mais antiga para a mais recente
+    """
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1, 8, 0)
+    rows = []
+    previous_sender = None
+
+    for index in range(num_messages):
+        day, position = divmod(index, messages_per_day)
+        when = start + datetime.timedelta(days=day, minutes=position * (600 // messages_per_day or 1))
+        if position == 0:
+            rows.append(
+                f'<div class="{DATE_DIVIDER_CLASS}" role="row">'
+                f'<span dir="auto">{when:%d/%m/%Y}</span></div>'
+            )
+            previous_sender = None
+
+        outgoing = rng.random() < 0.2
+        sender = "Você" if outgoing else rng.choice(SENDERS)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25)))
+        rows.append(_message_row(
+            index, when, sender, text, outgoing, not outgoing and sender != previous_sender,
+            image=rng.random() < image_ratio, document=rng.random() < document_ratio
+        ))
+        previous_sender = sender
+    return rows
+
+
+def generate_chat_html(num_messages, messages_per_day=50, seed=0, virtualized=False,
+                       image_ratio=0.0, document_ratio=0.0, media_kb=16, window_rows=90) -> str:
+    """
+    Gera uma conversa sintética com a estrutura do painel de mensagens do WhatsApp Web.
+
+    Args:
+        num_messages (int): Quantidade de mensagens
+        messages_per_day (int): Mensagens entre dois divisores de data
+        seed (int): Semente do gerador aleatório (conversas reproduzíveis)
+        virtualized (bool): Se True, apenas uma janela de linhas fica no DOM e a
+            lista é redesenhada conforme a rolagem, como no WhatsApp Web
+        image_ratio (float): Fração das mensagens com imagem (URL blob:)
+        document_ratio (float): Fração das mensagens com documento (URL blob:)
+        media_kb (int): Tamanho de cada arquivo de mídia em KB
+        window_rows (int): Linhas mantidas no DOM na versão virtualizada
+
+    Returns:
+        str: Documento HTML completo
+    """
+    rows = generate_rows(num_messages, messages_per_day, image_ratio, document_ratio, seed)
+    if virtualized:
+        # As linhas ficam em um bloco JSON e são inseridas no DOM sob demanda
+        body = '<div role="application"></div>'
+        data = '<script type="application/json" id="rows">' + json.dumps(rows).replace("</", "<\\/") + '</script>'
+        style = f'.focusable-list-item[role="row"] {{ height: {ROW_HEIGHT}px; overflow: hidden; }}'
+    else:
+        body = '<div role="application">' + "".join(rows) + "</div>"
+        data = ""
+        style = ""
+
+    script = FIXTURE_SCRIPT % {'media_kb': media_kb, 'window_rows': window_rows, 'row_height': ROW_HEIGHT}
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Conversa sintética</title>'
+        f'<style>body {{ margin: 0; }} #pane {{ height: 100vh; overflow-y: auto; }} {style}</style></head>'
+        f'<body><div id="main"><div id="pane">{body}</div></div>{data}'
+        f'<script>{script}</script></body></html>'
+    )
+
+
+def write_chat_fixture(num_messages, directory=None, **kwargs) -> str:
+    """
+    Grava uma conversa sintética em disco para ser aberta via file://.
+
+    Args:
+        num_messages (int): Quantidade de mensagens
+        directory (str): Diretório de destino (padrão: diretório temporário do sistema)
+        **kwargs: Parâmetros extras de generate_chat_html
+
+    Returns:
+        str: Caminho absoluto do arquivo gerado
+    """
+    directory = directory or tempfile.gettempdir()
+    suffix = "_virtual" if kwargs.get('virtualized') else ""
+    path = os.path.abspath(os.path.join(directory, f"whatsapp_chat_{num_messages}{suffix}.html"))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(generate_chat_html(num_messages, **kwargs))
+    return path
@@ -1,4 +1,68 @@
 # config/settings.py
+import os
+
 TIME_WAIT = 2.5
 BASE_URL = "https://web.whatsapp.com/"
-OUTPUT_DIR = "tmp/whatsapp/"
\ No newline at end of file
+OUTPUT_DIR = "tmp/whatsapp/"
+
+# Formato de saída das mensagens: "jsonl", "sqlite", "txt" ou "archive" (segmentos comprimidos com zstd,
+# ou zlib sem o pacote zstandard, somente para anexar e com índice por período)
+OUTPUT_FORMAT = "jsonl"
+
+# Atualiza o índice de busca (SQLite FTS5) ao fim de cada grupo extraído
+SEARCH_INDEX_ENABLED = True
+
+# Esvazia no DOM as mensagens já coletadas e gravadas, mantendo constantes a memória do Chrome
+# e o custo das consultas em históricos longos
+DOM_PRUNE_ENABLED = False
+
+# Abre as conversas pelo índice da lista de conversas (montado uma vez por sessão) em vez de
+# digitar cada nome na pesquisa; a pesquisa fica apenas para as conversas fora do índice
+CHAT_INDEX_ENABLED = True
+
+# Passos máximos de rolagem ao percorrer a lista de conversas
+CHAT_INDEX_MAX_STEPS = 500
+
+# Executa a extração como um pipeline: coleta no DOM, processamento, mídia e gravação rodam ao mesmo
+# tempo, ligadas por filas de até PIPELINE_QUEUE_SIZE lotes. False processa cada lote por completo antes
+# de coletar o próximo.
+PIPELINE_ENABLED = True
+PIPELINE_QUEUE_SIZE = 4
+
+# Lotes cuja mídia é preparada ao mesmo tempo (os downloads HTTP usam as threads do MediaDownloader)
+PIPELINE_MEDIA_WORKERS = 2
+
+# Grava o HTML bruto das mensagens coletadas (tmp/whatsapp/<grupo>/snapshots/) para reprocessamento offline
+DOM_SNAPSHOT_ENABLED = False
+
+# Nível do log ("DEBUG", "INFO", "WARN" ou "ERROR")
+LOG_LEVEL = "DEBUG"
+
+# Mensagens repetidas a cada mensagem ou arquivo são registradas uma vez a cada N ocorrências
+LOG_SAMPLE_EVERY = 100
+
+# Métricas de cada execução (comandos WebDriver, fases e esperas) em tmp/whatsapp/metrics/: "json", "prometheus" ou None
+METRICS_FORMAT = "json"
+
+# Porta de depuração remota do Chrome (apenas localhost). As execuções seguintes se conectam ao
+# navegador que ficou aberto em vez de iniciar outro; sessões paralelas usam as portas seguintes.
+# None abre sempre um novo navegador.
+CHROME_DEBUG_PORT = 9222
+
+# Cache do caminho do chromedriver por versão do Chrome
+DRIVER_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".whatsapp_bot", "chromedriver.json")
+
+# Perfil do navegador: "default" (janela maximizada) ou "performance" (headless, viewport menor,
+# processos reduzidos e bloqueio de recursos). O login (QR code) deve ser feito antes no perfil "default".
+BROWSER_PROFILE = "default"
+
+# Recursos bloqueados no perfil "performance" (padrões do Network.setBlockedURLs).
+# Os prefixos /v/t62.* identificam o tipo de mídia no CDN do WhatsApp e podem mudar entre versões.
+BLOCKED_URL_PATTERNS = [
+    "*pps.whatsapp.net/*",          # fotos de perfil
+    "*/v/t62.15575-24/*",           # figurinhas
+    "*/v/t62.36145-24/*",           # imagens de prévia de links
+    "*.woff2*",                     # fontes
+    "*.woff*",
+    "*.ttf*",
+]
@@ -1,4 +1,3 @@
-from time import sleep
 import os
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -6,12 +5,36 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 
-from config.settings import BASE_URL, TIME_WAIT, OUTPUT_DIR
+from config.settings import (BASE_URL, TIME_WAIT, OUTPUT_DIR, OUTPUT_FORMAT, SEARCH_INDEX_ENABLED, DOM_SNAPSHOT_ENABLED,
+                             CHROME_DEBUG_PORT, BROWSER_PROFILE, DOM_PRUNE_ENABLED, PIPELINE_ENABLED,
+                             PIPELINE_QUEUE_SIZE, PIPELINE_MEDIA_WORKERS)
 from core.browser_setup import BrowserSetup
+from core.instrumentation import RunMetrics
+from core.pipeline import ExtractionPipeline
+from core.sync_scheduler import ChangeScheduler
+from core.wait_engine import WaitEngine
 
 from modules.file_manager import FileManager
+from modules.chat_index import ChatIndex
 from modules.chat_interaction import ChatInteraction
 from modules.content_extractor import ContentExtractor
+from modules.message_harvester import MessageHarvester
+from modules.checkpoint_store import CheckpointStore, GroupSync
+from modules.dom_snapshot import SnapshotWriter
+from modules.live_capture import LiveCapture
+from modules.media_downloader import MediaDownloader
+from modules.media_store import MediaStore, GroupManifest
+from modules.output_writers import build_message, create_writer
+from modules.search_index import SearchIndex
+from modules.selector_registry import SelectorRegistry
+from utils.timestamp_normalizer import to_epoch
+from utils.logger import get_logger
+
+logger = get_logger("scraper")
+
+# Lista de conversas (usuário logado) e QR code de login
+CHAT_LIST_XPATH = '//div[@aria-label="Lista de conversas" and @role="grid"]'
+QR_CODE_XPATH = '//canvas[@aria-label="Scan this QR code to link a device!" and @role="img"]'
 
 class WhatsappScraper:
     """
@@ -19,35 +42,66 @@ class WhatsappScraper:
     Gerencia a navegação e as interações com o WhatsApp Web.
     """
         
-    def __init__(self):
+    def __init__(self, profile_dir=None, checkpoint_store=None, media_store=None, output_format=OUTPUT_FORMAT,
+                 debug_port=CHROME_DEBUG_PORT, browser_profile=BROWSER_PROFILE):
         """
         Inicializa o scraper com as configurações necessárias do webdriver.
+        
+        Args:
+            profile_dir (str): Diretório de perfil do Chrome (conta vinculada). Se None, usa o perfil padrão.
+            checkpoint_store (CheckpointStore): Checkpoints compartilhados entre sessões (opcional)
+            media_store (MediaStore): Armazenamento de mídia compartilhado entre sessões (opcional)
+            output_format (str): Formato de saída das mensagens ("jsonl", "sqlite", "txt" ou "archive")
+            debug_port (int): Porta de depuração remota do Chrome. Se um navegador deste perfil
+                já estiver aberto nela, o scraper se conecta a ele em vez de abrir outro.
+            browser_profile (str): Perfil do navegador: "default" (janela maximizada) ou
+                "performance" (headless, viewport menor e bloqueio de recursos)
         """
         self.base_url = BASE_URL
-        self.options = BrowserSetup.setup_chrome_options()
-        self.driver = BrowserSetup.get_chrome_driver(self.options)
         self.main_window = None
         self.output_dir = OUTPUT_DIR
+        self.output_format = output_format
+        self.browser_profile = browser_profile
+        self.metrics = RunMetrics(self.output_dir)
+        
+        # Reutiliza o navegador logado de uma execução anterior quando ele ainda está aberto
+        with self.metrics.phase("iniciar_navegador"):
+            self.driver, self.attached = BrowserSetup.get_or_attach_driver(profile_dir, debug_port, browser_profile)
+        
+        # Todos os comandos WebDriver da sessão (de todos os módulos) são contados e cronometrados
+        self.metrics.instrument(self.driver)
 
         # Inicializa o gerenciador de navegador
-        self.open_whatsapp()
+        with self.metrics.phase("abrir_whatsapp"):
+            self.open_whatsapp()
         
-        # Inicializa módulos após abrir o WhatsApp
+        # Inicializa módulos após abrir o WhatsApp, compartilhando o mecanismo de espera
         self.main_window = self.main_window
-        self.chat_interaction = ChatInteraction(self.driver)
+        self.wait_engine = WaitEngine(self.driver)
+        self.selector_registry = SelectorRegistry(self.driver, self.wait_engine)
+        self.chat_interaction = ChatInteraction(self.driver, self.wait_engine, selector_registry=self.selector_registry)
         self.content_extractor = ContentExtractor(self.driver)
-        self.file_manager = FileManager(self.driver, self.output_dir, self.main_window)
+        self.file_manager = FileManager(self.driver, self.output_dir, self.main_window, self.wait_engine)
+        self.checkpoint_store = checkpoint_store or CheckpointStore(self.output_dir)
+        self.media_store = media_store or MediaStore(self.output_dir)
+        self.sync_scheduler = ChangeScheduler(self.checkpoint_store)
             
 
     def open_whatsapp(self):
         """
         Abre o WhatsApp Web na URL base e verifica o status de login.
-        """
-        self.driver.get(self.base_url)
-        self.main_window = self.driver.current_window_handle
-        self.driver.maximize_window()
         
-        print("[DEBUG] Abrindo o site do WhatsApp Web")
+        Em um navegador reutilizado, a aba do WhatsApp Web já aberta é usada sem recarregar a página.
+        """
+        if self.attached and self._switch_to_whatsapp_tab():
+            logger.debug("Usando a aba do WhatsApp Web já aberta")
+        else:
+            self.driver.get(self.base_url)
+            self.main_window = self.driver.current_window_handle
+            if not self.attached and self.browser_profile != "performance":
+                self.driver.maximize_window()
+            
+            logger.debug("Abrindo o site do WhatsApp Web")
         
         try:
             # Aguarda até 120 segundos pelo carregamento inicial
@@ -59,42 +113,51 @@ class WhatsappScraper:
             self.check_login_status()
             
         except TimeoutException:
-            print("[TIMEOUT] Timeout ao carregar a página do WhatsApp Web.")
+            logger.warning("Timeout ao carregar a página do WhatsApp Web.")
             
+    def _switch_to_whatsapp_tab(self):
+        """
+        Seleciona a aba do WhatsApp Web em um navegador reutilizado.
+        
+        Returns:
+            bool: True se uma aba do WhatsApp Web foi encontrada
+        """
+        for handle in self.driver.window_handles:
+            self.driver.switch_to.window(handle)
+            if self.driver.current_url.startswith(self.base_url):
+                self.main_window = handle
+                return True
+        return False
+    
     def check_login_status(self):
         """
         Verifica se o usuário está logado ou se precisa escanear o QR code.
         """
         try:
-            # Primeiro verifica se já está na tela principal (já logado)
-            chat_list = WebDriverWait(self.driver, 120).until(
-                EC.presence_of_element_located((By.XPATH, '//div[@aria-label="Lista de conversas" and @role="grid"]'))
+            # Aguarda a lista de conversas (já logado) ou o QR code, o que aparecer primeiro
+            WebDriverWait(self.driver, 120).until(EC.any_of(
+                EC.presence_of_element_located((By.XPATH, CHAT_LIST_XPATH)),
+                EC.presence_of_element_located((By.XPATH, QR_CODE_XPATH)),
+            ))
+            if self.driver.find_elements(By.XPATH, CHAT_LIST_XPATH):
+                logger.debug("Já está logado no WhatsApp Web!")
+                return True
+            
+            logger.debug("Por favor, escaneie o QR code com seu celular para fazer login no WhatsApp Web.")
+            logger.debug("Aguardando autenticação...")
+            
+            # Aguarda até que o QR code desapareça (indicando login bem-sucedido)
+            WebDriverWait(self.driver, 120).until_not(
+                EC.presence_of_element_located((By.XPATH, QR_CODE_XPATH))
             )
-            print("[DEBUG] Já está logado no WhatsApp Web!")
+            
+            logger.debug("Login realizado com sucesso!")
+            self.wait_for_chats_to_load()
             return True
             
         except TimeoutException:
-            # Se não encontrou a lista de chats, verifica se o QR code está presente
-            try:
-                qr_code = WebDriverWait(self.driver, 120).until(
-                    EC.presence_of_element_located((By.XPATH, '//canvas[@aria-label="Scan this QR code to link a device!" and @role="img"]'))
-                )
-                
-                print("[DEBUG] Por favor, escaneie o QR code com seu celular para fazer login no WhatsApp Web.")
-                print("[DEBUG] Aguardando autenticação...")
-                
-                # Aguarda até que o QR code desapareça (indicando login bem-sucedido)
-                WebDriverWait(self.driver, 120).until_not(
-                    EC.presence_of_element_located((By.XPATH, '//canvas[@aria-label="Scan this QR code to link a device!" and @role="img"]'))
-                )
-                
-                print("[DEBUG] Login realizado com sucesso!")
-                self.wait_for_chats_to_load()
-                return True
-                
-            except TimeoutException:
-                print("[ERROR] Não foi possível detectar o estado do login. Verifique manualmente.")
-                return False
+            logger.error("Não foi possível detectar o estado do login. Verifique manualmente.")
+            return False
     
     def wait_for_chats_to_load(self):
         """
@@ -103,130 +166,553 @@ class WhatsappScraper:
         try:
             # Espera pelo painel de conversas
             WebDriverWait(self.driver, 120).until(
-                EC.presence_of_element_located((By.XPATH, '//div[@aria-label="Lista de conversas" and @role="grid"]'))
+                EC.presence_of_element_located((By.XPATH, CHAT_LIST_XPATH))
             )
-            print("[DEBUG] WhatsApp Web carregado com sucesso!")
+            logger.debug("WhatsApp Web carregado com sucesso!")
             
         except TimeoutException:
-            print("[ERROR] Não foi possível carregar a lista de conversas. Verifique sua conexão.")
+            logger.error("Não foi possível carregar a lista de conversas. Verifique sua conexão.")
     
-    def extract_group_content(self, group_name):
+    def extract_group_content(self, group_name, sync=False, since=None, until=None):
         """
         Extrai todas as mensagens, imagens e documentos de um grupo ou contato.
         
         Args:
             group_name (str): Nome do grupo ou contato
+            sync (bool): Se True, coleta apenas as mensagens posteriores ao último
+                checkpoint do grupo e as anexa à saída do grupo
+            since: Início da janela de datas (date, datetime, epoch ou "AAAA-MM-DD"). A rolagem
+                para ao chegar a uma data anterior, e as mensagens mais antigas são descartadas
+            until: Fim da janela de datas (inclusive); as mensagens mais recentes são descartadas
             
         Returns:
             bool: True se a extração foi bem-sucedida, False caso contrário
         """
+        self.metrics.start_group(group_name)
         try:
-            print(f"[DEBUG] Iniciando extração de conteúdo do grupo: {group_name}")
+            logger.debug(f"Iniciando extração de conteúdo do grupo: {group_name}")
+            
+            # Datas sem horário valem pelo dia inteiro
+            since_epoch = to_epoch(since)
+            until_epoch = to_epoch(until, end_of_day=True)
+            if since_epoch is not None or until_epoch is not None:
+                logger.debug(f"Janela de datas: {since or 'início'} a {until or 'hoje'}")
             
             # Encontra o grupo ou contato
-            if not self.chat_interaction.find_chat(group_name):
-                print(f"[ERROR] Não foi possível encontrar o grupo: {group_name}")
+            with self.metrics.phase("localizar_conversa"):
+                found = self.chat_interaction.find_chat(group_name)
+            if not found:
+                logger.error(f"Não foi possível encontrar o grupo: {group_name}")
                 return False
             
             # Cria diretórios para o grupo
-            group_dir, images_dir, docs_dir, messages_file = self.file_manager.create_group_directories(group_name)
-            print(f"[DEBUG] Diretórios criados: {group_dir}")
-            
-            # Rola para cima para carregar mensagens mais antigas
-            self.chat_interaction.load_all_messages()
-            
-            # Extrai as mensagens
-            messages = []
-            images_count = 0
-            docs_count = 0
-            
-            # Obtém todos os elementos de mensagem
-            messages = self.content_extractor.get_messages_by_date()
-            print(f"[DEBUG] Encontradas {len(messages)} mensagens para processar")
-            sleep(1000)
-            
-            message_elements = self.content_extractor.get_all_messages()
-            print(f"[DEBUG] Encontradas {len(message_elements)} mensagens para processar")
-            sleep(1000)
-            
-            # Processa cada mensagem
-            for msg_element in message_elements:
-                try:
-                    # Extrai informações da mensagem
-                    sender = self.content_extractor.extract_sender(msg_element)
-                    timestamp = self.content_extractor.extract_timestamp(msg_element)
-                    text = self.content_extractor.extract_text(msg_element)
-                    
-                    # Salva a mensagem
-                    if sender and timestamp and text:
-                        message_data = f"[{timestamp}] {sender}: {text}"
-                        messages.append(message_data)
-                    
-                    # Verifica se há imagens
-                    images = self.content_extractor.extract_images(msg_element)
-                    if images:
-                        for img_url in images:
-                            try:
-                                img_filename = f"image_{images_count}_{timestamp.replace(':', '-').replace(' ', '_').replace('/', '-')}.jpg"
-                                img_path = os.path.join(images_dir, img_filename)
-                                self.file_manager.download_file(img_url, img_path)
-                                images_count += 1
-                            except Exception as e:
-                                print(f"[ERROR] Falha ao baixar imagem: {str(e)}")
-                    
-                    # Verifica se há documentos
-                    docs = self.content_extractor.extract_documents(msg_element)
-                    if docs:
-                        for doc_url, doc_name in docs:
-                            try:
-                                if not doc_name:
-                                    doc_name = f"doc_{docs_count}_{timestamp.replace(':', '-').replace(' ', '_').replace('/', '-')}"
-                                doc_path = os.path.join(docs_dir, doc_name)
-                                self.file_manager.download_file(doc_url, doc_path)
-                                docs_count += 1
-                            except Exception as e:
-                                print(f"[ERROR] Falha ao baixar documento: {str(e)}")
-                                
-                except StaleElementReferenceException:
-                    print("[WARN] Elemento ficou obsoleto durante o processamento, ignorando...")
-                    continue
-                except Exception as e:
-                    print(f"[ERROR] Erro ao processar mensagem: {str(e)}")
-                    continue
-            
-            # Salva todas as mensagens no arquivo
-            self.file_manager.save_messages_to_file(messages, messages_file)
-            
-            print(f"[DEBUG] Extração concluída para o grupo {group_name}:")
-            print(f"[DEBUG] - Mensagens: {len(messages)}")
-            print(f"[DEBUG] - Imagens: {images_count}")
-            print(f"[DEBUG] - Documentos: {docs_count}")
+            group_dir, images_dir, docs_dir, _ = self.file_manager.create_group_directories(group_name)
+            logger.debug(f"Diretórios criados: {group_dir}")
+            
+            # As mensagens são gravadas em lotes; a extração completa prepara uma nova saída, que só
+            # substitui a anterior quando GroupSync.finish conclui a gravação
+            writer = create_writer(self.output_format, group_name, group_dir, self.output_dir, truncate=not sync)
+            counters = {'images': 0, 'documents': 0, 'queued_images': 0, 'queued_documents': 0}
+            
+            # Os lotes chegam do mais recente para o mais antigo e são preparados por faixa, para que a saída
+            # receba as mensagens em ordem cronológica; no modo de sincronização, a coleta para no checkpoint
+            group_sync = GroupSync(self.checkpoint_store, self.file_manager, group_name, group_dir, resume=sync)
+            
+            # Opcionalmente guarda o HTML bruto das mensagens para reprocessá-las sem navegador
+            snapshot_writer = None
+            if DOM_SNAPSHOT_ENABLED:
+                snapshot_writer = SnapshotWriter(os.path.join(group_dir, "snapshots"), group_name, truncate=not sync)
+            
+            # Rola o histórico coletando as mensagens visíveis a cada passo, da mais recente à mais antiga
+            harvester = MessageHarvester(
+                self.driver, self.content_extractor, self.chat_interaction, wait_engine=self.wait_engine,
+                snapshot_writer=snapshot_writer, prune=DOM_PRUNE_ENABLED
+            )
+            
+            # Downloads HTTP seguem em paralelo enquanto o histórico é percorrido
+            downloader = MediaDownloader()
+            manifest = GroupManifest(group_dir)
+            
+            # Coleta, processamento, mídia e gravação formam um pipeline com filas limitadas;
+            # o tempo de cada etapa é acumulado por fase
+            pipeline = ExtractionPipeline(self.metrics, PIPELINE_QUEUE_SIZE, concurrent=PIPELINE_ENABLED)
+            
+            def parse(harvested):
+                # Lotes coletados depois do checkpoint já foram sincronizados
+                if group_sync.reached:
+                    return harvested, [], [], [], []
+                batch = group_sync.filter_batch(harvested)
+                batch_ranges = list(group_sync.batch_ranges)
+                if group_sync.reached:
+                    pipeline.stop()
+                self.metrics.increment("mensagens_coletadas", len(batch))
+                
+                downloads = []
+                batch_messages = [
+                    self._process_record(group_name, record, images_dir, docs_dir, counters, downloads)
+                    for record in batch
+                ]
+                return harvested, batch, batch_ranges, batch_messages, downloads
+            
+            def fetch_media(item):
+                # Baixa a mídia do lote; os blobs são buscados na página pela thread do navegador
+                self._download_media(item[4], counters, downloader, manifest, run_on_driver=pipeline.run_on_driver)
+                return item
+            
+            def write(item):
+                _, batch, batch_ranges, batch_messages, _ = item
+                group_sync.commit_batch(batch, batch_messages, batch_ranges)
+                return item
+            
+            def prune(item):
+                # Com o lote gravado, suas mensagens podem sair do DOM do navegador
+                self.metrics.increment("mensagens_podadas", harvester.commit(item[0]))
+                return item
+            
+            pipeline.add_stage("processamento", parse)
+            pipeline.add_stage("midia", fetch_media, workers=PIPELINE_MEDIA_WORKERS)
+            pipeline.add_stage("gravacao", write)
+            if harvester.prune:
+                pipeline.add_stage("poda", prune, on_driver=True)
+            
+            try:
+                pipeline.run(harvester.harvest_batches(since=since_epoch, until=until_epoch), "coleta")
+                
+                with self.metrics.phase("gravacao"):
+                    # Grava as mensagens em ordem cronológica e registra o checkpoint, para que as
+                    # próximas sincronizações sejam incrementais
+                    messages_count = group_sync.finish(writer)
+                    if snapshot_writer:
+                        snapshot_writer.commit()
+            finally:
+                writer.close()
+                if snapshot_writer:
+                    snapshot_writer.close()
+                
+                # Aguarda os downloads pendentes e contabiliza os arquivos baixados
+                with self.metrics.phase("aguardar_downloads"):
+                    download_report = downloader.close()
+                for result in download_report['files']:
+                    if result['status'] == 'ok':
+                        counters[result['kind']] += 1
+                self.media_store.save_index()
+                self.metrics.increment("passos_rolagem", harvester.steps)
+                self.metrics.increment("mensagens_fora_da_janela", harvester.out_of_window)
+                self.metrics.add_waits(pipeline.waits())
+            
+            logger.debug(f"Extração concluída para o grupo {group_name}:")
+            logger.debug(f"- Mensagens: {messages_count}")
+            logger.debug(f"- Imagens: {counters['images']}")
+            logger.debug(f"- Documentos: {counters['documents']}")
+            
+            self.metrics.increment("mensagens", messages_count)
+            self.metrics.increment("imagens", counters['images'])
+            self.metrics.increment("documentos", counters['documents'])
+            
+            if SEARCH_INDEX_ENABLED:
+                with self.metrics.phase("indice_busca"):
+                    self.update_search_index()
             
             return True
             
         except Exception as e:
-            print(f"[ERROR] Erro durante a extração do grupo {group_name}: {str(e)}")
+            logger.error(f"Erro durante a extração do grupo {group_name}: {str(e)}")
             return False
+        
+        finally:
+            # Mostra quanto tempo cada tipo de espera realmente levou e grava as métricas da execução
+            self.metrics.add_waits(self.wait_engine.summary())
+            self.metrics.add_selectors(self.selector_registry.summary())
+            self.wait_engine.report()
+            self.selector_registry.report()
+            self.write_metrics()
+    
+    def write_metrics(self):
+        """
+        Grava as métricas da execução (comandos WebDriver, fases e esperas) em output_dir/metrics.
+        
+        Returns:
+            str: Caminho do arquivo gravado, ou None se as métricas estiverem desativadas
+        """
+        try:
+            path = self.metrics.write()
+            if path:
+                logger.debug(f"Métricas da execução gravadas em {path} "
+                             f"({self.metrics.total_commands} comandos WebDriver)")
+            return path
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar as métricas: {str(e)}")
+            return None
+    
+    def update_search_index(self):
+        """
+        Indexa no índice de busca as mensagens gravadas desde a última atualização.
+        
+        Returns:
+            int: Quantidade de mensagens novas indexadas
+        """
+        try:
+            search_index = SearchIndex(self.output_dir)
+            try:
+                indexed = search_index.update_from_output()
+            finally:
+                search_index.close()
+            logger.debug(f"- Mensagens indexadas para busca: {indexed}")
+            return indexed
+        except Exception as e:
+            logger.warning(f"Não foi possível atualizar o índice de busca: {str(e)}")
+            return 0
     
-    def extract_from_multiple_groups(self, group_list):
+    def _process_record(self, group_name, record, images_dir, docs_dir, counters, downloads):
+        """
+        Converte um registro para o esquema de saída e agenda o download de sua mídia.
+        
+        Args:
+            group_name (str): Nome do grupo ou contato
+            record (dict): Registro de mensagem do extrator
+            images_dir (str): Diretório de imagens do grupo
+            docs_dir (str): Diretório de documentos do grupo
+            counters (dict): Contadores usados para nomear os arquivos
+            downloads (list): Lista que recebe as tarefas de download (url, path, kind, message_id)
+            
+        Returns:
+            dict: Mensagem no esquema de saída, ou None se não houver texto nem mídia
+        """
+        message_data = None
+        try:
+            timestamp = record['timestamp']
+            media = []
+            
+            file_stamp = timestamp.replace(':', '-').replace(' ', '_').replace('/', '-')
+            
+            # Verifica se há imagens
+            for img_url in record['images']:
+                img_filename = f"image_{counters['queued_images']}_{file_stamp}.jpg"
+                downloads.append({'url': img_url, 'path': os.path.join(images_dir, img_filename),
+                                  'kind': 'images', 'message_id': record.get('message_id')})
+                media.append({'kind': 'images', 'name': img_filename, 'url': img_url})
+                counters['queued_images'] += 1
+            
+            # Verifica se há documentos
+            for doc_url, doc_name in record['documents']:
+                if not doc_name:
+                    doc_name = f"doc_{counters['queued_documents']}_{file_stamp}"
+                downloads.append({'url': doc_url, 'path': os.path.join(docs_dir, doc_name),
+                                  'kind': 'documents', 'message_id': record.get('message_id')})
+                media.append({'kind': 'documents', 'name': doc_name, 'url': doc_url})
+                counters['queued_documents'] += 1
+            
+            # Mensagens de sistema (sem texto nem mídia) não são gravadas
+            if record['text'] or media:
+                message_data = build_message(group_name, record, media)
+                        
+        except StaleElementReferenceException:
+            logger.warning("Elemento ficou obsoleto durante o processamento, ignorando...")
+        except Exception as e:
+            logger.error(f"Erro ao processar mensagem: {str(e)}")
+        
+        return message_data
+    
+    def _download_media(self, downloads, counters, downloader, manifest, run_on_driver=None):
+        """
+        Baixa a mídia agendada de um lote de mensagens para o armazenamento por conteúdo.
+        
+        Arquivos já conhecidos pelo MediaStore não são baixados novamente. Blobs só
+        existem dentro da página e são baixados imediatamente; URLs HTTP são enviadas
+        ao downloader e baixadas em segundo plano. Cada arquivo é registrado no
+        manifesto do grupo e ligado ao diretório do grupo sem duplicar os bytes.
+        
+        Args:
+            downloads (list): Tarefas de download (url, path, kind, message_id)
+            counters (dict): Contadores de imagens e documentos baixados
+            downloader (MediaDownloader): Downloader paralelo de mídia HTTP
+            manifest (GroupManifest): Manifesto de mídia do grupo
+            run_on_driver (callable): Executa a busca dos blobs na thread do navegador
+                (ExtractionPipeline.run_on_driver); se None, busca na thread atual
+        """
+        pending_blobs = []
+        for task in downloads:
+            name = os.path.basename(task['path'])
+            
+            # Pula o download quando a URL já aponta para um objeto armazenado
+            sha256 = self.media_store.lookup(url=task['url'])
+            if sha256:
+                self.media_store.link(sha256, task['path'])
+                manifest.add(sha256, task['kind'], name=name, url=task['url'], message_id=task['message_id'])
+                counters[task['kind']] += 1
+                continue
+            
+            staging_path = self.media_store.staging_path()
+            if task['url'].startswith('blob:'):
+                pending_blobs.append((task, staging_path))
+            else:
+                downloader.submit(
+                    task['url'], staging_path, kind=task['kind'],
+                    callback=lambda result, task=task: self._on_media_downloaded(task, result, manifest)
+                )
+        
+        # Blobs são buscados todos juntos na página, sem trocar de aba
+        if pending_blobs:
+            try:
+                items = [(task['url'], path) for task, path in pending_blobs]
+                if run_on_driver:
+                    saved = run_on_driver(self.file_manager.download_blobs, items)
+                else:
+                    saved = self.file_manager.download_blobs(items)
+                for task, _ in pending_blobs:
+                    if task['url'] in saved:
+                        blob = saved[task['url']]
+                        self._store_media(task, blob['path'], blob['mime'], manifest)
+                        counters[task['kind']] += 1
+            except Exception as e:
+                logger.error(f"Falha ao baixar blobs do lote: {str(e)}")
+            finally:
+                # Remove os temporários dos blobs que não foram armazenados
+                for _, path in pending_blobs:
+                    if os.path.exists(path):
+                        os.remove(path)
+    
+    def _on_media_downloaded(self, task, result, manifest):
+        """
+        Callback do downloader: armazena o arquivo baixado ou descarta o temporário em caso de falha.
+        
+        Args:
+            task (dict): Tarefa de download (url, path, kind, message_id)
+            result (dict): Resultado retornado pelo MediaDownloader
+            manifest (GroupManifest): Manifesto de mídia do grupo
+        """
+        if result['status'] == 'ok':
+            self._store_media(task, result['path'], result['content_type'], manifest)
+        elif os.path.exists(result['path']):
+            os.remove(result['path'])
+    
+    def _store_media(self, task, path, mime, manifest):
+        """
+        Move um arquivo baixado para o MediaStore e o registra no manifesto do grupo.
+        
+        Args:
+            task (dict): Tarefa de download (url, path, kind, message_id)
+            path (str): Caminho temporário do arquivo baixado
+            mime (str): Tipo MIME do arquivo, quando conhecido
+            manifest (GroupManifest): Manifesto de mídia do grupo
+        """
+        name = os.path.basename(task['path'])
+        stored = self.media_store.ingest_file(path, url=task['url'], name=name)
+        self.media_store.link(stored['sha256'], task['path'])
+        manifest.add(stored['sha256'], task['kind'], name=name, size=stored['size'],
+                     url=task['url'], message_id=task['message_id'], mime=mime)
+    
+    def watch_groups(self, group_list, duration=None, watch_unread=True, poll_timeout=25.0, on_messages=None):
+        """
+        Captura ao vivo as mensagens novas dos grupos monitorados.
+        
+        A conversa aberta é observada por um MutationObserver na página e as mensagens
+        novas são gravadas assim que chegam, sem reprocessar o histórico. Com watch_unread,
+        quando outro grupo monitorado recebe mensagens, o scraper abre essa conversa,
+        grava as mensagens ainda não capturadas e passa a observá-la.
+        
+        Args:
+            group_list (list): Grupos monitorados (o primeiro é aberto no início)
+            duration (float): Tempo de observação em segundos (None até Ctrl+C)
+            watch_unread (bool): Observa os contadores de não lidas para alternar entre os grupos
+            poll_timeout (float): Tempo máximo de cada espera por novidades em segundos
+            on_messages (callable): Chamado com (grupo, mensagens) a cada lote gravado
+            
+        Returns:
+            dict: {grupo: quantidade de mensagens capturadas}
+        """
+        counts = {group_name: 0 for group_name in group_list}
+        if not group_list:
+            return counts
+        
+        capture = LiveCapture(self.driver, self.content_extractor, watch_unread=watch_unread,
+                              wait_engine=self.wait_engine)
+        downloader = MediaDownloader()
+        contexts = {}
+        current = None
+        
+        try:
+            if self._open_live_chat(group_list[0], capture, contexts, downloader, counts, on_messages):
+                current = group_list[0]
+            logger.debug(f"Captura ao vivo iniciada: {', '.join(group_list)}")
+            
+            for result in capture.watch(duration=duration, poll_timeout=poll_timeout):
+                if result['records'] and current:
+                    self._store_live_records(current, result['records'], contexts, downloader, counts, on_messages)
+                
+                # Outros grupos monitorados com mensagens não lidas são abertos e passam a ser observados
+                for group_name in (result['unread'] or {}):
+                    if group_name in counts and group_name != current:
+                        if self._open_live_chat(group_name, capture, contexts, downloader, counts, on_messages,
+                                                unread=result['unread'][group_name]):
+                            current = group_name
+                            
+        except KeyboardInterrupt:
+            logger.debug("Captura ao vivo interrompida pelo usuário")
+        
+        finally:
+            capture.uninstall()
+            for context in contexts.values():
+                context['writer'].close()
+            download_report = downloader.close()
+            for result in download_report['files']:
+                if result['status'] == 'ok':
+                    self.metrics.increment(result['kind'])
+            self.media_store.save_index()
+            
+            if SEARCH_INDEX_ENABLED:
+                self.update_search_index()
+            self.write_metrics()
+        
+        logger.debug(f"Captura ao vivo concluída: {sum(counts.values())} mensagens")
+        return counts
+    
+    def _open_live_chat(self, group_name, capture, contexts, downloader, counts, on_messages, unread=None):
+        """
+        Abre uma conversa monitorada, grava as mensagens ainda não capturadas e passa a observá-la.
+        
+        As mensagens renderizadas posteriores à última capturada (ou ao checkpoint do grupo)
+        são gravadas; sem essa referência, são gravadas as "unread" últimas mensagens.
+        
+        Args:
+            group_name (str): Nome do grupo ou contato
+            capture (LiveCapture): Captura ao vivo da sessão
+            contexts (dict): Saídas abertas por grupo
+            downloader (MediaDownloader): Downloader paralelo de mídia HTTP
+            counts (dict): Mensagens capturadas por grupo
+            on_messages (callable): Callback dos lotes gravados
+            unread (int): Quantidade de mensagens não lidas informada pela lista de conversas
+            
+        Returns:
+            bool: True se a conversa foi aberta
+        """
+        self.metrics.start_group(group_name)
+        with self.metrics.phase("localizar_conversa"):
+            found = self.chat_interaction.find_chat(group_name)
+        if not found:
+            logger.error(f"Não foi possível encontrar o grupo: {group_name}")
+            return False
+        
+        # A pesquisa filtra a lista de conversas e esconderia os contadores dos outros grupos
+        self.chat_interaction.clear_search()
+        self.content_extractor.wait_for_messages_to_load()
+        
+        # Os observadores são instalados antes da leitura para que nenhuma mensagem se perca entre as duas
+        capture.install()
+        if unread:
+            records = self.content_extractor.extract_messages_bulk()
+            last_id = (contexts.get(group_name) or {}).get('last_id') or self.checkpoint_store.get(group_name).get('message_id')
+            ids = [record.get('message_id') for record in records]
+            records = records[ids.index(last_id) + 1:] if last_id in ids else records[-unread:]
+            if records:
+                self._store_live_records(group_name, records, contexts, downloader, counts, on_messages)
+        return True
+    
+    def _store_live_records(self, group_name, records, contexts, downloader, counts, on_messages):
+        """
+        Grava um lote da captura ao vivo e baixa sua mídia.
+        
+        Args:
+            group_name (str): Nome do grupo ou contato
+            records (list): Registros capturados, em ordem de chegada
+            contexts (dict): Saídas abertas por grupo (criadas na primeira gravação)
+            downloader (MediaDownloader): Downloader paralelo de mídia HTTP
+            counts (dict): Mensagens capturadas por grupo
+            on_messages (callable): Callback dos lotes gravados
+        """
+        self.metrics.start_group(group_name)
+        with self.metrics.phase("gravacao_ao_vivo"):
+            context = contexts.get(group_name)
+            if context is None:
+                group_dir, images_dir, docs_dir, _ = self.file_manager.create_group_directories(group_name)
+                context = contexts[group_name] = {
+                    'writer': create_writer(self.output_format, group_name, group_dir, self.output_dir),
+                    'images_dir': images_dir,
+                    'docs_dir': docs_dir,
+                    'manifest': GroupManifest(group_dir),
+                    'counters': {'images': 0, 'documents': 0, 'queued_images': 0, 'queued_documents': 0},
+                    'last_id': None,
+                }
+            
+            downloads = []
+            messages = [
+                self._process_record(group_name, record, context['images_dir'], context['docs_dir'],
+                                     context['counters'], downloads)
+                for record in records
+            ]
+            self._download_media(downloads, context['counters'], downloader, context['manifest'])
+            messages = [message for message in messages if message]
+            
+            # Cada lote é gravado imediatamente para manter a latência baixa
+            context['writer'].write_many(messages)
+            context['writer'].flush()
+            
+            # O checkpoint só avança em grupos já sincronizados, para não pular o histórico
+            newest = records[-1]
+            context['last_id'] = newest.get('message_id') or context['last_id']
+            if newest.get('message_id') and self.checkpoint_store.get(group_name).get('message_id'):
+                self.checkpoint_store.complete(group_name, newest['message_id'], newest.get('timestamp'))
+        
+        counts[group_name] += len(records)
+        self.metrics.increment("mensagens_ao_vivo", len(records))
+        logger.debug(f"{len(messages)} mensagens novas em {group_name}")
+        if on_messages:
+            on_messages(group_name, messages)
+    
+    def extract_from_multiple_groups(self, group_list, sync=False, changed_only=False, since=None, until=None):
         """
         Extrai conteúdo de múltiplos grupos.
         
         Args:
             group_list (list): Lista de nomes de grupos
+            sync (bool): Se True, sincroniza apenas as mensagens novas de cada grupo
+            changed_only (bool): Se True, lê a lista de conversas uma vez e processa apenas os
+                grupos que mudaram desde a última sincronização, dos mais atrasados e ativos
+                para os demais; os grupos sem mudança não são abertos
+            since: Início da janela de datas de cada grupo (ver extract_group_content)
+            until: Fim da janela de datas de cada grupo (ver extract_group_content)
             
         Returns:
             dict: Dicionário com os resultados para cada grupo
         """
         results = {}
+        plan = None
+        if changed_only:
+            plan = self.plan_changed_groups(group_list)
+            for group_name in plan['skipped']:
+                results[group_name] = True
+            group_list = plan['queue']
         
         for group_name in group_list:
-            print(f"[DEBUG] Iniciando extração do grupo: {group_name}")
-            success = self.extract_group_content(group_name)
+            logger.debug(f"Iniciando extração do grupo: {group_name}")
+            success = self.extract_group_content(group_name, sync=sync, since=since, until=until)
             results[group_name] = success
             
+            # Guarda o estado da lista de conversas para que a próxima execução detecte mudanças
+            if success and plan is not None:
+                self.sync_scheduler.mark_synced(group_name, plan['rows'].get(group_name),
+                                                self.metrics.counters[(group_name, "mensagens")])
+            
         return results
     
+    def plan_changed_groups(self, group_list):
+        """
+        Lê a lista de conversas e monta a fila dos grupos que mudaram.
+        
+        Args:
+            group_list (list): Lista de nomes de grupos
+            
+        Returns:
+            dict: Plano do ChangeScheduler ('queue', 'skipped', 'details', 'rows')
+        """
+        chat_index = self.chat_interaction.chat_index or ChatIndex(self.driver, self.wait_engine)
+        self.metrics.start_group(None)
+        with self.metrics.phase("lista_conversas"):
+            chat_index.build()
+        plan = self.sync_scheduler.plan(group_list, chat_index.entries)
+        self.metrics.increment("grupos_sem_mudanca", len(plan['skipped']))
+        return plan
+    
     def send_message_to_contact(self, contact_name, message):
         """
         Envia uma mensagem para um contato específico.
@@ -242,12 +728,22 @@ class WhatsappScraper:
             return self.chat_interaction.send_message(message)
         return False
     
-    def close(self):
+    def close(self, keep_browser=False):
         """
         Fecha o navegador e encerra a sessão.
+        
+        Args:
+            keep_browser (bool): Se True, encerra apenas o chromedriver e mantém o navegador
+                aberto e logado, para que a próxima execução se conecte a ele
         """
         if self.driver:
+            self.write_metrics()
+            self.metrics.uninstrument()
+            if keep_browser:
+                self.driver.service.stop()
+                logger.debug("Sessão encerrada; navegador mantido aberto para a próxima execução.")
+                return
             self.driver.quit()
-            print("[DEBUG] Navegador fechado com sucesso.")
+            logger.debug("Navegador fechado com sucesso.")
         else:
-            print("[DEBUG] Navegador já fechado ou não inicializado.")
+            logger.debug("Navegador já fechado ou não inicializado.")
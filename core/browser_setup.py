@@ -1,15 +1,72 @@
 # core/browser.py
+import json
 import os
+import plistlib
+import re
+import shutil
+import socket
+import subprocess
+import sys
 from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
 
+from config.settings import DRIVER_CACHE_FILE, BROWSER_PROFILE, BLOCKED_URL_PATTERNS
+from utils.logger import get_logger
+
+logger = get_logger("browser_setup")
+
+# Executáveis do Chrome consultados para descobrir a versão instalada (Linux)
+CHROME_BINARIES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+
+# Versão completa do Chrome ("124.0.6367.91")
+VERSION_REGEX = re.compile(r"(\d+\.\d+\.\d+\.\d+)")
+
+# Perfil "performance": sem janela, viewport menor e menos processos e serviços em segundo plano
+PERFORMANCE_ARGUMENTS = [
+    "--headless=new",
+    "--window-size=1024,768",
+    "--disable-gpu",
+    "--renderer-process-limit=2",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--mute-audio",
+    "--no-first-run",
+]
+
 class BrowserSetup:
     @staticmethod
-    def setup_chrome_options():
+    def get_profile_dir(index=0):
+        """
+        Retorna o diretório de perfil do Chrome de uma sessão.
+        
+        A sessão 0 usa o perfil padrão do bot; as demais recebem um sufixo,
+        permitindo manter várias contas vinculadas em paralelo.
+        
+        Args:
+            index (int): Índice da sessão
+            
+        Returns:
+            str: Caminho do diretório de perfil
+        """
+        name = "whatsapp_bot_profile" if index == 0 else f"whatsapp_bot_profile_{index}"
+        return os.path.join(os.path.expanduser("~"), name)
+    
+    @staticmethod
+    def setup_chrome_options(user_data_dir=None, debug_port=None, profile=BROWSER_PROFILE):
         """
         Configura as opções do Chrome para otimizar a automação.
         
+        Args:
+            user_data_dir (str): Diretório de perfil do Chrome. Se None, usa o perfil padrão do bot.
+            debug_port (int): Porta de depuração remota (localhost). Permite que as próximas
+                execuções se conectem ao navegador que continua aberto.
+            profile (str): "default" (janela maximizada) ou "performance" (headless, viewport
+                menor e processos reduzidos)
+        
         Returns:
             ChromeOptions: Objeto contendo todas as configurações do navegador.
         """
@@ -26,20 +83,114 @@ class BrowserSetup:
 
         # Define um perfil customizado para o WhatsApp Bot
         # Isso cria um perfil separado que será usado apenas pelo bot
-        user_data_dir = os.path.join(os.path.expanduser("~"), "whatsapp_bot_profile")
+        user_data_dir = user_data_dir or BrowserSetup.get_profile_dir()
         
         # Cria o diretório se não existir
         if not os.path.exists(user_data_dir):
             os.makedirs(user_data_dir)
             
         options.add_argument(f"--user-data-dir={user_data_dir}")
-        options.add_argument("--start-maximized")
+        if profile == "performance":
+            for argument in PERFORMANCE_ARGUMENTS:
+                options.add_argument(argument)
+        else:
+            options.add_argument("--start-maximized")
 
         # Mantém o navegador aberto após a execução
         options.add_experimental_option("detach", True)
         
+        # Expõe o navegador apenas em localhost para que as próximas execuções o reutilizem
+        if debug_port:
+            options.add_argument(f"--remote-debugging-port={debug_port}")
+        
         return options
         
+    @staticmethod
+    def get_chrome_version():
+        """
+        Detecta a versão do Chrome instalado sem abrir o navegador.
+        
+        Returns:
+            str: Versão completa (ex.: "124.0.6367.91"), ou None se não for possível detectar
+        """
+        try:
+            if sys.platform == "win32":
+                import winreg
+                for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                    try:
+                        with winreg.OpenKey(root, r"Software\Google\Chrome\BLBeacon") as key:
+                            return winreg.QueryValueEx(key, "version")[0]
+                    except OSError:
+                        continue
+                return None
+            
+            if sys.platform == "darwin":
+                plist_path = "/Applications/Google Chrome.app/Contents/Info.plist"
+                if os.path.exists(plist_path):
+                    with open(plist_path, 'rb') as f:
+                        return plistlib.load(f).get("CFBundleShortVersionString")
+                return None
+            
+            for binary in CHROME_BINARIES:
+                path = shutil.which(binary)
+                if path:
+                    output = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout
+                    match = VERSION_REGEX.search(output)
+                    if match:
+                        return match.group(1)
+        except Exception as e:
+            logger.warning(f"Não foi possível detectar a versão do Chrome: {str(e)}")
+        return None
+    
+    @staticmethod
+    def _load_driver_cache():
+        """Lê o cache {versão do Chrome: caminho do chromedriver}."""
+        try:
+            with open(DRIVER_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @staticmethod
+    def _save_driver_cache(cache):
+        """Grava o cache de chromedrivers de forma atômica."""
+        try:
+            os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+            temp_path = DRIVER_CACHE_FILE + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=2)
+            os.replace(temp_path, DRIVER_CACHE_FILE)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o cache do chromedriver: {str(e)}")
+    
+    @staticmethod
+    def get_driver_path(refresh=False):
+        """
+        Retorna o caminho do chromedriver compatível com o Chrome instalado.
+        
+        O caminho resolvido pelo webdriver-manager fica em cache por versão do Chrome,
+        então a resolução de versão (e o acesso à rede) só acontece quando o Chrome
+        é atualizado.
+        
+        Args:
+            refresh (bool): Ignora o cache e resolve o chromedriver novamente
+            
+        Returns:
+            str: Caminho do executável do chromedriver
+        """
+        version = BrowserSetup.get_chrome_version()
+        cache = BrowserSetup._load_driver_cache()
+        
+        cached_path = cache.get(version) if version else None
+        if cached_path and not refresh and os.path.isfile(cached_path):
+            return cached_path
+        
+        path = ChromeDriverManager().install()
+        if version:
+            cache[version] = path
+            BrowserSetup._save_driver_cache(cache)
+        return path
+    
     @staticmethod
     def get_chrome_driver(options):
         """
@@ -51,5 +202,105 @@ class BrowserSetup:
         Returns:
             WebDriver: Instância do Chrome WebDriver
         """
-        service = Service(ChromeDriverManager().install())
-        return webdriver.Chrome(service=service, options=options)
\ No newline at end of file
+        try:
+            return webdriver.Chrome(service=Service(BrowserSetup.get_driver_path()), options=options)
+        except SessionNotCreatedException:
+            # O driver em cache pode ter ficado incompatível (ex.: Chrome atualizado sem mudar a versão detectada)
+            logger.warning("Chromedriver em cache incompatível, resolvendo novamente...")
+            return webdriver.Chrome(service=Service(BrowserSetup.get_driver_path(refresh=True)), options=options)
+    
+    @staticmethod
+    def is_debugger_available(debug_port, host="127.0.0.1", timeout=0.3):
+        """
+        Verifica se há um navegador escutando na porta de depuração remota.
+        
+        Args:
+            debug_port (int): Porta de depuração remota
+            host (str): Endereço do navegador
+            timeout (float): Tempo máximo da tentativa de conexão em segundos
+            
+        Returns:
+            bool: True se a porta aceitou a conexão
+        """
+        try:
+            with socket.create_connection((host, debug_port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+    
+    @staticmethod
+    def attach_chrome_driver(debug_port, host="127.0.0.1"):
+        """
+        Conecta um WebDriver a um Chrome já aberto, pela porta de depuração remota.
+        
+        Args:
+            debug_port (int): Porta de depuração remota do navegador
+            host (str): Endereço do navegador
+            
+        Returns:
+            WebDriver: Instância do Chrome WebDriver controlando o navegador existente
+        """
+        options = webdriver.ChromeOptions()
+        options.add_experimental_option("debuggerAddress", f"{host}:{debug_port}")
+        return BrowserSetup.get_chrome_driver(options)
+    
+    @staticmethod
+    def apply_browser_profile(driver, profile=BROWSER_PROFILE):
+        """
+        Aplica as configurações do perfil que dependem do DevTools (CDP).
+        
+        No perfil "performance", bloqueia os recursos que a extração não usa
+        (BLOCKED_URL_PATTERNS: fotos de perfil, figurinhas, prévias de links, fontes),
+        reduz animações e remove "HeadlessChrome" do user agent, que faz o
+        WhatsApp Web recusar o navegador. As configurações valem para a conexão
+        atual e são reaplicadas a cada nova conexão.
+        
+        Args:
+            driver: Instância do WebDriver Selenium
+            profile (str): Perfil do navegador
+        """
+        if profile != "performance":
+            return
+        
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+            
+            user_agent = driver.execute_cdp_cmd("Browser.getVersion", {}).get("userAgent", "")
+            if "HeadlessChrome" in user_agent:
+                driver.execute_cdp_cmd("Network.setUserAgentOverride",
+                                       {"userAgent": user_agent.replace("HeadlessChrome", "Chrome")})
+            
+            driver.execute_cdp_cmd("Emulation.setEmulatedMedia", {
+                "features": [{"name": "prefers-reduced-motion", "value": "reduce"}]
+            })
+        except WebDriverException as e:
+            logger.warning(f"Não foi possível aplicar o perfil de desempenho: {str(e)}")
+    
+    @staticmethod
+    def get_or_attach_driver(user_data_dir=None, debug_port=None, profile=BROWSER_PROFILE):
+        """
+        Reutiliza o navegador deixado aberto por uma execução anterior ou abre um novo.
+        
+        Args:
+            user_data_dir (str): Diretório de perfil do Chrome usado ao abrir um novo navegador
+            debug_port (int): Porta de depuração remota. Se None, sempre abre um novo navegador.
+            profile (str): Perfil do navegador ("default" ou "performance"). Um navegador
+                reutilizado mantém o modo (com ou sem janela) em que foi aberto.
+            
+        Returns:
+            tuple: (WebDriver, True se conectou a um navegador já aberto)
+        """
+        driver, attached = None, False
+        if debug_port and BrowserSetup.is_debugger_available(debug_port):
+            try:
+                driver, attached = BrowserSetup.attach_chrome_driver(debug_port), True
+                logger.debug(f"Conectado ao navegador já aberto na porta {debug_port}")
+            except WebDriverException as e:
+                logger.warning(f"Não foi possível conectar ao navegador na porta {debug_port}: {str(e)}")
+        
+        if driver is None:
+            driver = BrowserSetup.get_chrome_driver(BrowserSetup.setup_chrome_options(user_data_dir, debug_port, profile))
+        
+        BrowserSetup.apply_browser_profile(driver, profile)
+        return driver, attached
\ No newline at end of file
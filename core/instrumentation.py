@@ -0,0 +1,315 @@
+# core/instrumentation.py
+import datetime
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from config.settings import OUTPUT_DIR, METRICS_FORMAT
+
+# Fase atribuída aos comandos enviados fora de qualquer fase
+NO_PHASE = "-"
+
+
+def _new_stats():
+    """Cria o acumulador de uma métrica de tempo."""
+    return {'count': 0, 'seconds': 0.0, 'max': 0.0}
+
+
+def _add(stats, seconds):
+    """Acumula uma duração em um acumulador de tempo."""
+    stats['count'] += 1
+    stats['seconds'] += seconds
+    if seconds > stats['max']:
+        stats['max'] = seconds
+
+
+def _label(value) -> str:
+    """Escapa um valor de rótulo no formato de texto do Prometheus."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RunMetrics:
+    """
+    Métricas de uma execução do scraper.
+
+    Conta e cronometra cada comando WebDriver por tipo (instrumentando o
+    próprio driver, compartilhado por ChatInteraction, ContentExtractor e
+    FileManager), cronometra as fases da extração de cada grupo e acumula
+    contadores e esperas. O resultado é gravado em JSON ou no formato de
+    texto do Prometheus.
+    """
+    def __init__(self, output_dir=OUTPUT_DIR, metrics_format=METRICS_FORMAT, run_id=None):
+        """
+        Inicializa as métricas da execução.
+
+        Args:
+            output_dir (str): Diretório base de saída (as métricas ficam em output_dir/metrics)
+            metrics_format (str): "json" ou "prometheus" (None desativa a gravação)
+            run_id (str): Identificador da execução (padrão: data/hora e sufixo aleatório)
+        """
+        self.output_dir = output_dir
+        self.metrics_format = metrics_format
+        self.run_id = run_id or f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.started = time.time()
+        self.commands = {}
+        self.phases = {}
+        self.counters = Counter()
+        self.waits = {}
+        self.group = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._driver = None
+        self._execute = None
+
+    def instrument(self, driver):
+        """
+        Passa a medir todos os comandos enviados pelo driver.
+
+        O método execute da instância é substituído, então os módulos que recebem
+        o driver não precisam conhecer as métricas.
+
+        Args:
+            driver: Instância do WebDriver Selenium
+
+        Returns:
+            O mesmo driver
+        """
+        self.uninstrument()
+        self._driver = driver
+        self._execute = driver.execute
+
+        def instrumented_execute(command, params=None):
+            started = time.perf_counter()
+            try:
+                return self._execute(command, params)
+            finally:
+                self._record_command(command, time.perf_counter() - started)
+
+        driver.execute = instrumented_execute
+        return driver
+
+    def uninstrument(self):
+        """Restaura o método execute original do driver instrumentado."""
+        if self._driver is not None:
+            self._driver.execute = self._execute
+            self._driver = self._execute = None
+
+    @property
+    def _phase_stack(self):
+        """Fases abertas na thread atual (etapas do pipeline rodam em threads próprias)."""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _record_command(self, command, seconds):
+        """Acumula um comando WebDriver no total e na fase atual."""
+        with self._lock:
+            _add(self.commands.setdefault(command, _new_stats()), seconds)
+            if self._phase_stack:
+                phase = self._phase_stack[-1]
+                phase['commands'][command] += 1
+                phase['command_seconds'] += seconds
+
+    def start_group(self, group_name):
+        """Define o grupo ao qual as próximas fases, contadores e esperas pertencem."""
+        self.group = group_name
+
+    def _phase_entry(self, name):
+        """Retorna o acumulador da fase no grupo atual."""
+        key = (self.group or NO_PHASE, name)
+        if key not in self.phases:
+            self.phases[key] = dict(_new_stats(), commands=Counter(), command_seconds=0.0)
+        return self.phases[key]
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Cronometra um trecho como uma fase do grupo atual.
+
+        Fases repetidas (ex.: uma por lote) são acumuladas. Os comandos WebDriver
+        enviados dentro do trecho são atribuídos à fase mais interna da mesma thread.
+
+        Args:
+            name (str): Nome da fase
+        """
+        with self._lock:
+            entry = self._phase_entry(name)
+            self._phase_stack.append(entry)
+        started = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._phase_stack.remove(entry)
+                _add(entry, elapsed)
+
+    def timed_iter(self, iterable, name):
+        """
+        Percorre um iterável cronometrando apenas o tempo gasto para produzir cada item.
+
+        Args:
+            iterable: Iterável ou gerador (ex.: lotes do MessageHarvester)
+            name (str): Nome da fase
+
+        Yields:
+            Os itens do iterável
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def increment(self, name, value=1):
+        """Soma um valor a um contador do grupo atual."""
+        with self._lock:
+            self.counters[(self.group or NO_PHASE, name)] += value
+
+    def add_waits(self, summary):
+        """
+        Acumula o resumo de esperas do WaitEngine no grupo atual.
+
+        Args:
+            summary (dict): Resultado de WaitEngine.summary()
+        """
+        with self._lock:
+            for label, entry in summary.items():
+                stats = self.waits.setdefault((self.group or NO_PHASE, label),
+                                              {'count': 0, 'seconds': 0.0, 'max': 0.0, 'timeouts': 0})
+                stats['count'] += entry['count']
+                stats['seconds'] += entry['total']
+                stats['max'] = max(stats['max'], entry['max'])
+                stats['timeouts'] += entry['timeouts']
+
+    def add_selectors(self, summary):
+        """
+        Acumula as consultas do SelectorRegistry como contadores do grupo atual.
+
+        Args:
+            summary (dict): Resultado de SelectorRegistry.summary()
+        """
+        for name, entry in summary.items():
+            self.increment(f"seletor:{name}:consultas", entry['lookups'])
+            self.increment(f"seletor:{name}:sem_resultado", entry['misses'])
+            for key, hits in entry['hits'].items():
+                self.increment(f"seletor:{name}:{key}", hits)
+
+    @property
+    def total_commands(self) -> int:
+        """Total de comandos WebDriver enviados na execução."""
+        return sum(stats['count'] for stats in self.commands.values())
+
+    def to_dict(self) -> dict:
+        """
+        Converte as métricas para um dicionário serializável.
+
+        Returns:
+            dict: {'run_id', 'started', 'duration', 'commands', 'groups'}
+        """
+        with self._lock:
+            groups = {}
+            for (group, name), entry in self.phases.items():
+                groups.setdefault(group, {'phases': {}, 'counters': {}, 'waits': {}})['phases'][name] = {
+                    'count': entry['count'],
+                    'seconds': round(entry['seconds'], 4),
+                    'max': round(entry['max'], 4),
+                    'webdriver_commands': dict(entry['commands']),
+                    'webdriver_seconds': round(entry['command_seconds'], 4),
+                }
+            for (group, name), value in self.counters.items():
+                groups.setdefault(group, {'phases': {}, 'counters': {}, 'waits': {}})['counters'][name] = value
+            for (group, label), stats in self.waits.items():
+                groups.setdefault(group, {'phases': {}, 'counters': {}, 'waits': {}})['waits'][label] = {
+                    key: round(value, 4) if isinstance(value, float) else value for key, value in stats.items()
+                }
+
+            return {
+                'run_id': self.run_id,
+                'started': datetime.datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+                'duration': round(time.time() - self.started, 3),
+                'commands': {
+                    command: {'count': stats['count'], 'seconds': round(stats['seconds'], 4), 'max': round(stats['max'], 4)}
+                    for command, stats in sorted(self.commands.items())
+                },
+                'groups': groups,
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Converte as métricas para o formato de texto do Prometheus.
+
+        Returns:
+            str: Métricas com os rótulos run, command, group, phase e label
+        """
+        data = self.to_dict()
+        run = _label(data['run_id'])
+        lines = [
+            "# TYPE whatsapp_run_duration_seconds gauge",
+            f'whatsapp_run_duration_seconds{{run="{run}"}} {data["duration"]}',
+            "# TYPE whatsapp_webdriver_commands_total counter",
+        ]
+        lines += [f'whatsapp_webdriver_commands_total{{run="{run}",command="{_label(command)}"}} {stats["count"]}'
+                  for command, stats in data['commands'].items()]
+        lines.append("# TYPE whatsapp_webdriver_command_seconds_total counter")
+        lines += [f'whatsapp_webdriver_command_seconds_total{{run="{run}",command="{_label(command)}"}} {stats["seconds"]}'
+                  for command, stats in data['commands'].items()]
+
+        phase_lines, phase_commands, counter_lines, wait_lines, timeout_lines = [], [], [], [], []
+        for group, entry in data['groups'].items():
+            base = f'run="{run}",group="{_label(group)}"'
+            for name, phase in entry['phases'].items():
+                phase_lines.append(f'whatsapp_phase_seconds_total{{{base},phase="{_label(name)}"}} {phase["seconds"]}')
+                phase_commands += [
+                    f'whatsapp_phase_webdriver_commands_total{{{base},phase="{_label(name)}",command="{_label(command)}"}} {count}'
+                    for command, count in phase['webdriver_commands'].items()
+                ]
+            counter_lines += [f'whatsapp_events_total{{{base},name="{_label(name)}"}} {value}'
+                              for name, value in entry['counters'].items()]
+            for label, stats in entry['waits'].items():
+                wait_lines.append(f'whatsapp_wait_seconds_total{{{base},label="{_label(label)}"}} {stats["seconds"]}')
+                timeout_lines.append(f'whatsapp_wait_timeouts_total{{{base},label="{_label(label)}"}} {stats["timeouts"]}')
+
+        for metric_type, name, metric_lines in (
+            ("counter", "whatsapp_phase_seconds_total", phase_lines),
+            ("counter", "whatsapp_phase_webdriver_commands_total", phase_commands),
+            ("counter", "whatsapp_events_total", counter_lines),
+            ("counter", "whatsapp_wait_seconds_total", wait_lines),
+            ("counter", "whatsapp_wait_timeouts_total", timeout_lines),
+        ):
+            if metric_lines:
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines += metric_lines
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        """
+        Grava as métricas da execução, substituindo o arquivo de forma atômica.
+
+        Args:
+            path (str): Caminho do arquivo (padrão: output_dir/metrics/run-<run_id>.json ou .prom)
+
+        Returns:
+            str: Caminho gravado, ou None se as métricas estiverem desativadas
+        """
+        if not self.metrics_format and not path:
+            return None
+
+        prometheus = self.metrics_format == "prometheus" if not path else path.endswith(".prom")
+        if not path:
+            path = os.path.join(self.output_dir, "metrics", f"run-{self.run_id}.{'prom' if prometheus else 'json'}")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        content = self.to_prometheus() if prometheus else json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        return path
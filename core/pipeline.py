@@ -0,0 +1,306 @@
+# core/pipeline.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+from config.settings import PIPELINE_QUEUE_SIZE
+from utils.logger import get_logger
+
+logger = get_logger("pipeline")
+
+# Sinal de fim do fluxo entre as etapas
+_END = object()
+
+
+def _new_wait():
+    """Cria o acumulador de uma espera no formato de WaitEngine.summary()."""
+    return {'count': 0, 'total': 0.0, 'max': 0.0, 'timeouts': 0}
+
+
+def _add_wait(stats, seconds):
+    """Acumula uma espera em um acumulador."""
+    stats['count'] += 1
+    stats['total'] += seconds
+    if seconds > stats['max']:
+        stats['max'] = seconds
+
+
+class PipelineStage:
+    """Etapa do pipeline: função aplicada a cada item, com seu próprio limite de concorrência."""
+    def __init__(self, name, function: Callable, workers=1, on_driver=False):
+        """
+        Inicializa a etapa.
+
+        Args:
+            name (str): Nome da etapa (também usado como fase nas métricas)
+            function (callable): Recebe o item da etapa anterior e retorna o item da próxima
+            workers (int): Quantidade de itens processados ao mesmo tempo
+            on_driver (bool): Se True, executa na thread do navegador (comandos WebDriver)
+        """
+        self.name = name
+        self.function = function
+        self.workers = 1 if on_driver else max(1, workers)
+        self.on_driver = on_driver
+        self.stats = {'items': 0, 'busy': 0.0, 'input': _new_wait(), 'output': _new_wait(), 'max_queue': 0}
+
+
+class ExtractionPipeline:
+    """
+    Executa a extração de um grupo como etapas ligadas por filas limitadas.
+
+    A fonte (coleta no DOM) e as etapas que usam o WebDriver rodam em uma única
+    thread do navegador, já que o Selenium não é seguro entre threads; as demais
+    etapas (processamento, mídia, gravação) rodam em threads próprias. Um loop
+    asyncio move os itens entre as filas: quando uma etapa fica para trás, sua
+    fila enche e as anteriores param, então o tempo total é o da etapa mais lenta
+    e não a soma de todas. Os itens chegam à saída de cada etapa na ordem da fonte.
+    """
+    def __init__(self, metrics=None, queue_size=PIPELINE_QUEUE_SIZE, concurrent=True):
+        """
+        Inicializa o pipeline.
+
+        Args:
+            metrics (RunMetrics): Métricas da execução (cada etapa é uma fase)
+            queue_size (int): Quantidade máxima de itens aguardando em cada fila
+            concurrent (bool): Se False, cada item percorre todas as etapas antes do próximo
+        """
+        self.metrics = metrics
+        self.queue_size = max(1, queue_size)
+        self.concurrent = concurrent
+        self.stages: List[PipelineStage] = []
+        self.source_stage = None
+        self._stopped = False
+        self._driver_executor = None
+        self._driver_thread = None
+
+    def add_stage(self, name, function: Callable, workers=1, on_driver=False) -> 'ExtractionPipeline':
+        """
+        Acrescenta uma etapa ao final do pipeline.
+
+        Args:
+            name (str): Nome da etapa
+            function (callable): Função aplicada a cada item
+            workers (int): Quantidade de itens processados ao mesmo tempo
+            on_driver (bool): Se True, executa na thread do navegador
+
+        Returns:
+            ExtractionPipeline: O próprio pipeline
+        """
+        self.stages.append(PipelineStage(name, function, workers, on_driver))
+        return self
+
+    def stop(self):
+        """Para a fonte; os itens já produzidos ainda passam pelas etapas seguintes."""
+        self._stopped = True
+
+    def run_on_driver(self, function: Callable, *args):
+        """
+        Executa uma função na thread do navegador e aguarda o resultado.
+
+        Permite que etapas fora da thread do navegador enviem comandos WebDriver
+        (ex.: buscar blobs na página) sem disputar o driver com a coleta.
+
+        Args:
+            function (callable): Função que usa o driver
+            *args: Argumentos da função
+
+        Returns:
+            O retorno da função
+        """
+        if self._driver_executor is None or threading.current_thread() is self._driver_thread:
+            return function(*args)
+        return self._driver_executor.submit(function, *args).result()
+
+    def run(self, source: Iterable, source_name="coleta") -> Dict:
+        """
+        Percorre a fonte passando cada item por todas as etapas.
+
+        Args:
+            source (iterable): Fonte dos itens, consumida na thread do navegador
+            source_name (str): Nome da etapa da fonte
+
+        Returns:
+            dict: Estatísticas por etapa (ver summary())
+        """
+        self._stopped = False
+        self.source_stage = PipelineStage(source_name, None, on_driver=True)
+        if self.concurrent:
+            asyncio.run(self._run(iter(source)))
+        else:
+            self._run_sequential(iter(source))
+        self.report()
+        return self.summary()
+
+    def _run_sequential(self, iterator):
+        """Executa as etapas uma após a outra na thread atual."""
+        while not self._stopped:
+            item = self._next_item(iterator)
+            if item is _END:
+                break
+            for stage in self.stages:
+                item = self._call(stage, item)
+
+    def _mark_driver_thread(self):
+        """Inicializador da thread do navegador."""
+        self._driver_thread = threading.current_thread()
+
+    def _timed(self, stage: PipelineStage, function: Callable, *args):
+        """Executa uma função contabilizando o tempo ocupado da etapa e sua fase nas métricas."""
+        started = time.perf_counter()
+        try:
+            if self.metrics:
+                with self.metrics.phase(stage.name):
+                    return function(*args)
+            return function(*args)
+        finally:
+            stage.stats['busy'] += time.perf_counter() - started
+
+    def _next_item(self, iterator):
+        """Produz o próximo item da fonte, ou _END."""
+        item = self._timed(self.source_stage, next, iterator, _END)
+        if item is not _END:
+            self.source_stage.stats['items'] += 1
+        return item
+
+    def _call(self, stage: PipelineStage, item):
+        """Aplica a função da etapa a um item."""
+        result = self._timed(stage, stage.function, item)
+        stage.stats['items'] += 1
+        return result
+
+    async def _run(self, iterator):
+        """Executa a fonte e as etapas como tarefas ligadas por filas limitadas."""
+        self._driver_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-driver",
+                                                   initializer=self._mark_driver_thread)
+        stage_executor = ThreadPoolExecutor(
+            max_workers=max(1, sum(stage.workers for stage in self.stages if not stage.on_driver)),
+            thread_name_prefix="pipeline-stage"
+        )
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        tasks = [asyncio.ensure_future(self._produce(iterator, queues[0] if queues else None))]
+        for index, stage in enumerate(self.stages):
+            output = queues[index + 1] if index + 1 < len(queues) else None
+            executor = self._driver_executor if stage.on_driver else stage_executor
+            tasks.append(asyncio.ensure_future(self._consume(stage, queues[index], output, executor)))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Uma etapa falhou: cancela as demais e aguarda as threads terminarem o item atual
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            stage_executor.shutdown(wait=True)
+            self._driver_executor.shutdown(wait=True)
+            self._driver_executor = self._driver_thread = None
+            if hasattr(iterator, 'close'):
+                iterator.close()
+
+    async def _put(self, stage: PipelineStage, queue: asyncio.Queue, entry):
+        """Entrega um item à próxima fila, contabilizando o tempo bloqueado pela fila cheia."""
+        started = time.perf_counter()
+        await queue.put(entry)
+        _add_wait(stage.stats['output'], time.perf_counter() - started)
+
+    async def _produce(self, iterator, output):
+        """Consome a fonte na thread do navegador e alimenta a primeira fila."""
+        loop = asyncio.get_running_loop()
+        sequence = 0
+        while not self._stopped:
+            item = await loop.run_in_executor(self._driver_executor, self._next_item, iterator)
+            if item is _END:
+                break
+            if output is not None:
+                await self._put(self.source_stage, output, (sequence, item))
+            sequence += 1
+        if output is not None:
+            await output.put(_END)
+
+    async def _consume(self, stage: PipelineStage, input_queue: asyncio.Queue, output, executor):
+        """Processa os itens de uma fila com até stage.workers itens simultâneos, mantendo a ordem na saída."""
+        loop = asyncio.get_running_loop()
+        state = {'next': 0, 'active': stage.workers}
+        in_order = asyncio.Condition()
+
+        async def worker():
+            while True:
+                started = time.perf_counter()
+                entry = await input_queue.get()
+                _add_wait(stage.stats['input'], time.perf_counter() - started)
+                stage.stats['max_queue'] = max(stage.stats['max_queue'], input_queue.qsize() + 1)
+
+                if entry is _END:
+                    # Repassa o sinal aos outros workers da etapa
+                    await input_queue.put(_END)
+                    break
+
+                sequence, item = entry
+                result = await loop.run_in_executor(executor, self._call, stage, item)
+                if output is not None:
+                    async with in_order:
+                        await in_order.wait_for(lambda: state['next'] == sequence)
+                        await self._put(stage, output, (sequence, result))
+                        state['next'] += 1
+                        in_order.notify_all()
+
+            state['active'] -= 1
+            if state['active'] == 0 and output is not None:
+                await output.put(_END)
+
+        await asyncio.gather(*(worker() for _ in range(stage.workers)))
+
+    def summary(self) -> Dict:
+        """
+        Resume as estatísticas de cada etapa.
+
+        Returns:
+            dict: {etapa: {'items', 'workers', 'busy', 'utilization', 'waiting_input',
+                'blocked_output', 'max_queue'}} e 'bottleneck' com a etapa mais ocupada
+        """
+        stages = [self.source_stage] + self.stages if self.source_stage else list(self.stages)
+        result = {}
+        for stage in stages:
+            stats = stage.stats
+            result[stage.name] = {
+                'items': stats['items'],
+                'workers': stage.workers,
+                'busy': round(stats['busy'], 4),
+                # Tempo ocupado por worker: a etapa com o maior valor limita o pipeline
+                'utilization': round(stats['busy'] / stage.workers, 4),
+                'waiting_input': round(stats['input']['total'], 4),
+                'blocked_output': round(stats['output']['total'], 4),
+                'max_queue': stats['max_queue'],
+            }
+        if result:
+            result['bottleneck'] = max(result, key=lambda name: result[name]['utilization'])
+        return result
+
+    def waits(self) -> Dict:
+        """
+        Converte as esperas entre as filas para o formato de WaitEngine.summary().
+
+        Returns:
+            dict: {"pipeline:<etapa>:entrada" | "pipeline:<etapa>:saida": {'count', 'total', 'max', 'timeouts'}}
+        """
+        stages = [self.source_stage] + self.stages if self.source_stage else list(self.stages)
+        waits = {}
+        for stage in stages:
+            for key, label in (('input', 'entrada'), ('output', 'saida')):
+                if stage.stats[key]['count']:
+                    waits[f"pipeline:{stage.name}:{label}"] = stage.stats[key]
+        return waits
+
+    def report(self):
+        """Registra no log o tempo ocupado e as esperas de cada etapa."""
+        summary = self.summary()
+        bottleneck = summary.pop('bottleneck', None)
+        for name, stats in summary.items():
+            logger.debug(f"Pipeline {name}: {stats['items']} itens, {stats['busy']:.2f}s ocupada "
+                         f"({stats['workers']} worker(s)), {stats['waiting_input']:.2f}s aguardando entrada, "
+                         f"{stats['blocked_output']:.2f}s bloqueada pela fila seguinte")
+        if bottleneck and self.concurrent:
+            logger.debug(f"Pipeline: etapa mais lenta: {bottleneck}")
@@ -0,0 +1,192 @@
+# core/session_pool.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import OUTPUT_DIR, CHROME_DEBUG_PORT, BROWSER_PROFILE
+from core.base_scraper import WhatsappScraper
+from core.browser_setup import BrowserSetup
+from modules.checkpoint_store import CheckpointStore
+from modules.media_store import MediaStore
+from utils.logger import get_logger
+
+logger = get_logger("session_pool")
+
+
+class WorkStealingScheduler:
+    """
+    Distribui grupos entre sessões com filas próprias e roubo de trabalho.
+
+    Cada sessão consome a própria fila pelo início; quando ela esvazia, a
+    sessão rouba grupos do fim da fila mais longa entre as demais. Grupos
+    vinculados a contas específicas (afinidade) só são entregues às sessões
+    dessas contas.
+    """
+    def __init__(self, num_sessions, group_list, affinity=None):
+        """
+        Inicializa o escalonador e faz a distribuição inicial dos grupos.
+
+        Args:
+            num_sessions (int): Quantidade de sessões
+            group_list (list): Lista de nomes de grupos
+            affinity (dict): {grupo: [índices das sessões que enxergam o grupo]} (opcional)
+        """
+        self.affinity = affinity or {}
+        self.queues = [deque() for _ in range(num_sessions)]
+        self.lock = threading.Lock()
+        self.steals = 0
+
+        # Distribui cada grupo para a sessão permitida com a menor fila
+        for group_name in group_list:
+            allowed = self._allowed_sessions(group_name)
+            target = min(allowed, key=lambda index: len(self.queues[index]))
+            self.queues[target].append(group_name)
+
+    def _allowed_sessions(self, group_name):
+        """Retorna os índices das sessões que podem processar o grupo."""
+        return self.affinity.get(group_name) or range(len(self.queues))
+
+    def next_group(self, session_index):
+        """
+        Obtém o próximo grupo para uma sessão, roubando de outra fila se necessário.
+
+        Args:
+            session_index (int): Índice da sessão
+
+        Returns:
+            str: Nome do grupo, ou None se não houver mais trabalho para a sessão
+        """
+        with self.lock:
+            own = self.queues[session_index]
+            if own:
+                return own.popleft()
+
+            # Rouba do fim das filas mais longas primeiro
+            victims = sorted(
+                (index for index in range(len(self.queues)) if index != session_index),
+                key=lambda index: -len(self.queues[index])
+            )
+            for victim in victims:
+                queue = self.queues[victim]
+                for position in range(len(queue) - 1, -1, -1):
+                    group_name = queue[position]
+                    if session_index in self._allowed_sessions(group_name):
+                        del queue[position]
+                        self.steals += 1
+                        return group_name
+            return None
+
+
+class SessionPool:
+    """
+    Executa a extração em várias sessões do navegador em paralelo.
+
+    Cada sessão usa um diretório de perfil próprio do Chrome (uma conta
+    vinculada por perfil). Checkpoints e armazenamento de mídia são
+    compartilhados entre as sessões, e os resultados são combinados ao final.
+    """
+    def __init__(self, num_sessions=None, profile_dirs=None, output_dir=OUTPUT_DIR, browser_profile=BROWSER_PROFILE):
+        """
+        Inicializa o pool de sessões.
+
+        Args:
+            num_sessions (int): Quantidade de sessões, usando os perfis padrão do bot
+            profile_dirs (list): Diretórios de perfil explícitos (substitui num_sessions)
+            output_dir (str): Diretório de saída compartilhado
+            browser_profile (str): Perfil do navegador das sessões ("default" ou "performance")
+        """
+        if profile_dirs is None:
+            profile_dirs = [BrowserSetup.get_profile_dir(index) for index in range(num_sessions or 1)]
+        self.profile_dirs = list(profile_dirs)
+        self.browser_profile = browser_profile
+        self.checkpoint_store = CheckpointStore(output_dir)
+        self.media_store = MediaStore(output_dir)
+        self.scrapers = []
+
+    def start(self):
+        """Abre todas as sessões do navegador em paralelo."""
+        logger.debug(f"Iniciando {len(self.profile_dirs)} sessões do navegador...")
+        with ThreadPoolExecutor(max_workers=len(self.profile_dirs)) as executor:
+            # Cada sessão usa uma porta de depuração própria para ser reutilizada nas próximas execuções
+            self.scrapers = list(executor.map(
+                lambda index: WhatsappScraper(
+                    self.profile_dirs[index], self.checkpoint_store, self.media_store,
+                    debug_port=CHROME_DEBUG_PORT + index if CHROME_DEBUG_PORT else None,
+                    browser_profile=self.browser_profile
+                ),
+                range(len(self.profile_dirs))
+            ))
+
+    def _run_session(self, session_index, scheduler, results, sync):
+        """
+        Processa grupos em uma sessão até o escalonador ficar sem trabalho.
+
+        Args:
+            session_index (int): Índice da sessão
+            scheduler (WorkStealingScheduler): Escalonador compartilhado
+            results (dict): Dicionário de resultados compartilhado
+            sync (bool): Se True, sincroniza apenas as mensagens novas
+        """
+        scraper = self.scrapers[session_index]
+        while True:
+            group_name = scheduler.next_group(session_index)
+            if group_name is None:
+                return
+
+            started = time.perf_counter()
+            try:
+                success = scraper.extract_group_content(group_name, sync=sync)
+            except Exception as e:
+                logger.error(f"Sessão {session_index} falhou no grupo {group_name}: {str(e)}")
+                success = False
+
+            results[group_name] = {
+                'success': success,
+                'session': session_index,
+                'seconds': time.perf_counter() - started,
+            }
+
+    def run(self, group_list, sync=False, affinity=None):
+        """
+        Extrai os grupos distribuindo-os entre as sessões.
+
+        Args:
+            group_list (list): Lista de nomes de grupos
+            sync (bool): Se True, sincroniza apenas as mensagens novas de cada grupo
+            affinity (dict): {grupo: [índices das sessões/contas que participam do grupo]} (opcional)
+
+        Returns:
+            dict: {grupo: {'success', 'session', 'seconds'}}
+        """
+        if not self.scrapers:
+            self.start()
+
+        scheduler = WorkStealingScheduler(len(self.scrapers), group_list, affinity)
+        results = {}
+        started = time.perf_counter()
+
+        threads = [
+            threading.Thread(target=self._run_session, args=(index, scheduler, results, sync), name=f"session-{index}")
+            for index in range(len(self.scrapers))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        succeeded = sum(1 for result in results.values() if result['success'])
+        logger.debug(f"{succeeded}/{len(group_list)} grupos extraídos em {time.perf_counter() - started:.1f}s "
+                     f"com {len(self.scrapers)} sessões ({scheduler.steals} roubos de trabalho)")
+        return results
+
+    def close(self, keep_browser=False):
+        """
+        Fecha todas as sessões do navegador.
+
+        Args:
+            keep_browser (bool): Se True, mantém os navegadores abertos para a próxima execução
+        """
+        for scraper in self.scrapers:
+            scraper.close(keep_browser=keep_browser)
+        self.scrapers = []
@@ -0,0 +1,126 @@
+# core/sync_scheduler.py
+import datetime
+import time
+from typing import Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger("sync_scheduler")
+
+# Peso da última sincronização na atividade de cada grupo (média móvel exponencial de mensagens novas)
+ACTIVITY_WEIGHT = 0.3
+
+# Defasagem (em horas) atribuída aos grupos sem data da última sincronização
+UNKNOWN_STALENESS_HOURS = 24 * 365
+
+
+class ChangeScheduler:
+    """
+    Escolhe os grupos a sincronizar a partir dos metadados da lista de conversas.
+
+    Cada linha da lista mostra o horário e a prévia da última mensagem e o
+    contador de não lidas. Esses valores são comparados com os gravados no
+    checkpoint do grupo na última sincronização; grupos sem mudança são pulados
+    sem abrir a conversa. Os demais são ordenados por defasagem (horas desde a
+    última sincronização) vezes atividade (não lidas e média de mensagens novas
+    por sincronização), para que os grupos mais atrasados e movimentados vão primeiro.
+    """
+    def __init__(self, checkpoint_store, clock=time.time):
+        """
+        Inicializa o escalonador.
+
+        Args:
+            checkpoint_store (CheckpointStore): Checkpoints com o estado de cada grupo
+            clock (callable): Função que retorna o horário atual em segundos (epoch)
+        """
+        self.checkpoint_store = checkpoint_store
+        self.clock = clock
+
+    @staticmethod
+    def change_reason(checkpoint: Dict, row: Optional[Dict]) -> Optional[str]:
+        """
+        Indica por que um grupo precisa ser sincronizado.
+
+        Args:
+            checkpoint (dict): Checkpoint do grupo
+            row (dict): Linha do grupo no ChatIndex, ou None se ele não estiver na lista
+
+        Returns:
+            str: Motivo da sincronização, ou None se o grupo não mudou
+        """
+        if not checkpoint.get('message_id'):
+            return "nunca sincronizado"
+        if checkpoint.get('pending'):
+            return "sincronização interrompida"
+        if row is None:
+            return "fora da lista de conversas"
+        if row.get('unread'):
+            return f"{row['unread']} não lidas"
+
+        state = checkpoint.get('chat_list')
+        if not state:
+            return "sem estado da lista de conversas"
+        if (row.get('last_time'), row.get('preview')) != (state.get('last_time'), state.get('preview')):
+            return "última mensagem mudou"
+        return None
+
+    def _staleness_hours(self, checkpoint: Dict) -> float:
+        """Horas desde a última sincronização do grupo."""
+        try:
+            updated = datetime.datetime.fromisoformat(checkpoint['updated_at']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return UNKNOWN_STALENESS_HOURS
+        return max(0.1, (self.clock() - updated) / 3600)
+
+    def plan(self, group_list: List[str], rows: Dict[str, Dict]) -> Dict:
+        """
+        Monta a fila de sincronização.
+
+        Args:
+            group_list (list): Grupos candidatos
+            rows (dict): {título: linha} lidos da lista de conversas (ChatIndex.entries)
+
+        Returns:
+            dict: {'queue': grupos a sincronizar em ordem, 'skipped': grupos sem mudança,
+                'details': [{'group', 'reason', 'score'}], 'rows': linhas dos grupos}
+        """
+        details, skipped = [], []
+        for group_name in dict.fromkeys(group_list):
+            checkpoint = self.checkpoint_store.get(group_name)
+            row = rows.get(group_name)
+            reason = self.change_reason(checkpoint, row)
+            if reason is None:
+                skipped.append(group_name)
+                continue
+
+            activity = 1 + (row or {}).get('unread', 0) + (checkpoint.get('chat_list') or {}).get('activity', 0.0)
+            details.append({'group': group_name, 'reason': reason,
+                            'score': round(self._staleness_hours(checkpoint) * activity, 3)})
+
+        details.sort(key=lambda detail: -detail['score'])
+        for detail in details:
+            logger.debug(f"Sincronizar {detail['group']}: {detail['reason']} (prioridade {detail['score']})")
+        logger.debug(f"{len(details)} grupos com mudanças, {len(skipped)} sem mudanças desde a última sincronização")
+        return {
+            'queue': [detail['group'] for detail in details],
+            'skipped': skipped,
+            'details': details,
+            'rows': {group_name: rows[group_name] for group_name in group_list if group_name in rows},
+        }
+
+    def mark_synced(self, group_name, row: Optional[Dict], new_messages=0):
+        """
+        Grava o estado da lista de conversas de um grupo sincronizado.
+
+        Args:
+            group_name (str): Nome do grupo ou contato
+            row (dict): Linha do grupo lida antes da sincronização (None se ele não estava na lista)
+            new_messages (int): Quantidade de mensagens novas gravadas
+        """
+        previous = self.checkpoint_store.get(group_name).get('chat_list') or {}
+        activity = ACTIVITY_WEIGHT * new_messages + (1 - ACTIVITY_WEIGHT) * previous.get('activity', 0.0)
+        self.checkpoint_store.save_chat_state(group_name, {
+            'last_time': (row or {}).get('last_time'),
+            'preview': (row or {}).get('preview'),
+            'activity': round(activity, 3),
+        })
@@ -0,0 +1,234 @@
+# core/wait_engine.py
+import time
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from utils.logger import get_logger
+
+logger = get_logger("wait_engine")
+
+# Expressão JavaScript padrão para o painel da conversa aberta
+CONVERSATION_PANE_JS = "document.querySelector('#main') || document.body"
+
+# Instala um MutationObserver que conta os nós adicionados sob o alvo.
+# arguments[0]: chave da observação; o nó alvo é definido por "target" antes deste trecho
+ARM_MUTATION_SCRIPT = """
+window.__waWaits = window.__waWaits || {};
+const previous = window.__waWaits[arguments[0]];
+if (previous) { previous.observer.disconnect(); }
+
+const state = {added: 0, last: 0, observer: null};
+state.observer = new MutationObserver((mutations) => {
+    for (const mutation of mutations) {
+        state.added += mutation.addedNodes.length;
+    }
+    state.last = performance.now();
+});
+state.observer.observe(target, {childList: true, subtree: true});
+window.__waWaits[arguments[0]] = state;
+"""
+
+# Aguarda, dentro da página, até que a observação registre nós adicionados
+# e o DOM fique estável por "settle" milissegundos.
+# arguments: chave, timeout (ms), settle (ms), callback
+WAIT_MUTATION_SCRIPT = """
+const key = arguments[0], timeout = arguments[1], settle = arguments[2];
+const done = arguments[arguments.length - 1];
+const state = (window.__waWaits || {})[key];
+if (!state) { done({ok: false, added: 0}); return; }
+
+const started = performance.now();
+const finish = (ok) => {
+    clearInterval(timer);
+    state.observer.disconnect();
+    delete window.__waWaits[key];
+    done({ok: ok, added: state.added});
+};
+const timer = setInterval(() => {
+    const now = performance.now();
+    if (state.added > 0 && now - state.last >= settle) { finish(true); }
+    else if (now - started >= timeout) { finish(state.added > 0); }
+}, 25);
+"""
+
+
+class WaitEngine:
+    """
+    Aguarda estados do DOM em vez de usar pausas fixas.
+
+    Cada espera retorna assim que a condição é satisfeita e registra quanto
+    tempo levou, permitindo medir onde o tempo de cada grupo é gasto.
+    """
+    def __init__(self, driver, default_timeout=30, poll_frequency=0.05):
+        """
+        Inicializa o mecanismo de espera.
+
+        Args:
+            driver: Instância do WebDriver Selenium
+            default_timeout (float): Tempo máximo padrão de cada espera em segundos
+            poll_frequency (float): Intervalo entre verificações das condições em segundos
+        """
+        self.driver = driver
+        self.default_timeout = default_timeout
+        self.poll_frequency = poll_frequency
+        self.timings = []
+        self._script_timeout = None
+
+    def _record(self, label, started, success):
+        """Registra a duração de uma espera."""
+        elapsed = time.perf_counter() - started
+        self.timings.append({'label': label, 'seconds': elapsed, 'success': success})
+        return elapsed
+
+    def set_script_timeout(self, seconds):
+        """
+        Define o tempo máximo dos scripts assíncronos do driver.
+
+        O valor fica em cache e é compartilhado pelos módulos que usam este
+        mecanismo de espera, evitando chamadas repetidas ao WebDriver.
+
+        Args:
+            seconds (float): Tempo máximo em segundos
+        """
+        if self._script_timeout != seconds:
+            self.driver.set_script_timeout(seconds)
+            self._script_timeout = seconds
+
+    def until(self, condition, timeout=None, label="condicao"):
+        """
+        Aguarda uma condição do WebDriverWait.
+
+        Args:
+            condition: Condição no formato de expected_conditions (callable que recebe o driver)
+            timeout (float): Tempo máximo de espera em segundos
+            label (str): Nome da espera nos relatórios de tempo
+
+        Returns:
+            O valor retornado pela condição, ou None em caso de timeout
+        """
+        started = time.perf_counter()
+        try:
+            result = WebDriverWait(
+                self.driver, timeout or self.default_timeout, poll_frequency=self.poll_frequency
+            ).until(condition)
+            self._record(label, started, True)
+            return result
+        except TimeoutException:
+            self._record(label, started, False)
+            return None
+
+    def until_script(self, script, *args, timeout=None, label="script"):
+        """
+        Aguarda até que um script JavaScript retorne um valor verdadeiro.
+
+        Args:
+            script (str): Script com "return" da condição avaliada na página
+            *args: Argumentos repassados ao script
+            timeout (float): Tempo máximo de espera em segundos
+            label (str): Nome da espera nos relatórios de tempo
+
+        Returns:
+            O valor retornado pelo script, ou None em caso de timeout
+        """
+        return self.until(lambda driver: driver.execute_script(script, *args), timeout, label)
+
+    def wait_for_element(self, locator, timeout=None, clickable=False, label=None):
+        """
+        Aguarda a presença (ou a possibilidade de clique) de um elemento.
+
+        Args:
+            locator (tuple): Localizador no formato (By, valor)
+            timeout (float): Tempo máximo de espera em segundos
+            clickable (bool): True para aguardar o elemento ficar clicável
+            label (str): Nome da espera nos relatórios de tempo
+
+        Returns:
+            WebElement encontrado, ou None em caso de timeout
+        """
+        condition = EC.element_to_be_clickable(locator) if clickable else EC.presence_of_element_located(locator)
+        return self.until(condition, timeout, label or f"elemento {locator[1]}")
+
+    def arm_mutation(self, key, target_js=CONVERSATION_PANE_JS):
+        """
+        Começa a observar nós adicionados sob um elemento da página.
+
+        Deve ser chamado antes da ação que provoca a mudança (clique, rolagem),
+        para que nenhuma mutação se perca entre a ação e a espera.
+
+        Args:
+            key (str): Identificador da observação
+            target_js (str): Expressão JavaScript que retorna o nó observado
+        """
+        self.driver.execute_script(f"const target = {target_js};" + ARM_MUTATION_SCRIPT, key)
+
+    def wait_for_mutation(self, key, timeout=None, settle=0.15, label=None):
+        """
+        Aguarda novos nós sob o elemento observado e a estabilização do DOM.
+
+        Args:
+            key (str): Identificador usado em arm_mutation
+            timeout (float): Tempo máximo de espera em segundos
+            settle (float): Tempo sem mutações para considerar o DOM estável
+            label (str): Nome da espera nos relatórios de tempo
+
+        Returns:
+            bool: True se novos nós foram adicionados dentro do prazo
+        """
+        timeout = timeout or self.default_timeout
+        started = time.perf_counter()
+        try:
+            self.set_script_timeout(timeout + 5)
+            result = self.driver.execute_async_script(
+                WAIT_MUTATION_SCRIPT, key, int(timeout * 1000), int(settle * 1000)
+            )
+            success = bool(result and result.get('ok'))
+        except WebDriverException as e:
+            logger.warning(f"Falha ao aguardar mutações do DOM: {str(e)}")
+            success = False
+        self._record(label or f"mutacao {key}", started, success)
+        return success
+
+    def wait_for_media_loaded(self, timeout=None, label="midia carregada"):
+        """
+        Aguarda que todas as imagens e vídeos da página terminem de carregar.
+
+        Args:
+            timeout (float): Tempo máximo de espera em segundos
+            label (str): Nome da espera nos relatórios de tempo
+
+        Returns:
+            bool: True se a mídia foi carregada dentro do prazo
+        """
+        script = """
+        const images = Array.from(document.images);
+        const videos = Array.from(document.querySelectorAll('video'));
+        return images.length + videos.length > 0
+            && images.every((img) => img.complete && img.naturalWidth > 0)
+            && videos.every((video) => video.readyState >= 2);
+        """
+        return bool(self.until_script(script, timeout=timeout, label=label))
+
+    def summary(self):
+        """
+        Agrupa os tempos registrados por nome de espera.
+
+        Returns:
+            dict: {label: {'count', 'total', 'max', 'timeouts'}}
+        """
+        result = {}
+        for timing in self.timings:
+            entry = result.setdefault(timing['label'], {'count': 0, 'total': 0.0, 'max': 0.0, 'timeouts': 0})
+            entry['count'] += 1
+            entry['total'] += timing['seconds']
+            entry['max'] = max(entry['max'], timing['seconds'])
+            if not timing['success']:
+                entry['timeouts'] += 1
+        return result
+
+    def report(self):
+        """Registra o tempo gasto em cada tipo de espera e limpa os registros."""
+        for label, entry in sorted(self.summary().items(), key=lambda item: -item[1]['total']):
+            logger.debug(f"Espera '{label}': {entry['count']}x, total {entry['total']:.2f}s, "
+                         f"máx {entry['max']:.2f}s, timeouts {entry['timeouts']}")
+        self.timings = []
@@ -0,0 +1,255 @@
+# modules/chat_index.py
+from typing import Dict, Optional
+
+from config.settings import CHAT_INDEX_MAX_STEPS
+from core.wait_engine import WaitEngine
+from utils.logger import get_logger
+
+logger = get_logger("chat_index")
+
+# Funções comuns: localizam a lista de conversas e leem as linhas renderizadas.
+# A lista é virtualizada, então apenas as linhas próximas da área visível existem no DOM.
+CHAT_LIST_JS = """
+const TIME_PATTERN = /^(\\d{1,2}:\\d{2}(\\s?[AaPp]\\.?[Mm]\\.?)?|\\d{1,2}\\/\\d{1,2}\\/\\d{2,4}|ontem|yesterday|hoje|today|domingo|segunda-feira|terça-feira|quarta-feira|quinta-feira|sexta-feira|sábado|sunday|monday|tuesday|wednesday|thursday|friday|saturday)$/i;
+const findList = () => {
+    const grid = document.querySelector('[aria-label="Lista de conversas"][role="grid"]')
+        || document.querySelector('#pane-side [role="grid"]');
+    if (!grid) { return null; }
+    let pane = grid.parentElement;
+    while (pane && pane !== document.body) {
+        const overflow = getComputedStyle(pane).overflowY;
+        if ((overflow === 'auto' || overflow === 'scroll') && pane.scrollHeight > pane.clientHeight) { break; }
+        pane = pane.parentElement;
+    }
+    if (!pane || pane === document.body) { pane = document.querySelector('#pane-side') || grid; }
+    return {grid: grid, pane: pane};
+};
+const readRows = (list) => {
+    const rows = new Map();
+    const top = list.pane.getBoundingClientRect().top;
+    for (const row of list.grid.querySelectorAll('[role="listitem"], [role="row"]')) {
+        const title = row.querySelector('span[title]');
+        if (!title) { continue; }
+        const name = title.getAttribute('title');
+        if (rows.has(name)) { continue; }
+        const holder = row.querySelector('[data-id]') || row.closest('[data-id]');
+
+        // Metadados da última mensagem: horário/data exibidos, prévia e contador de não lidas
+        let lastTime = null;
+        for (const leaf of row.querySelectorAll('div, span')) {
+            if (leaf.children.length === 0 && TIME_PATTERN.test(leaf.textContent.trim())) {
+                lastTime = leaf.textContent.trim();
+                break;
+            }
+        }
+        const preview = row.querySelectorAll('span[title]')[1];
+        const badge = row.querySelector('[aria-label*="não lida"], [aria-label*="unread"]');
+
+        rows.set(name, {
+            element: row,
+            title: name,
+            chat_id: holder ? holder.getAttribute('data-id') : null,
+            row_index: parseInt(row.getAttribute('aria-rowindex'), 10) || null,
+            offset: Math.round(list.pane.scrollTop + row.getBoundingClientRect().top - top),
+            last_time: lastTime,
+            preview: preview ? preview.getAttribute('title') : null,
+            unread: badge ? (parseInt(badge.textContent, 10) || 1) : 0
+        });
+    }
+    return rows;
+};
+const plain = (row) => ({title: row.title, chat_id: row.chat_id, row_index: row.row_index, offset: row.offset,
+                         last_time: row.last_time, preview: row.preview, unread: row.unread});
+"""
+
+# Percorre a lista de conversas inteira uma vez e devolve as linhas encontradas.
+# arguments[0]: quantidade máxima de passos de rolagem, arguments[1]: pausa (ms) para a renderização
+SCAN_CHAT_LIST_SCRIPT = CHAT_LIST_JS + """
+const maxSteps = arguments[0], delay = arguments[1];
+const done = arguments[arguments.length - 1];
+const list = findList();
+if (!list) { done(null); return; }
+
+const seen = new Map();
+let steps = 0;
+list.pane.scrollTop = 0;
+const step = () => {
+    for (const [name, row] of readRows(list)) {
+        if (!seen.has(name)) { seen.set(name, plain(row)); }
+    }
+    const before = list.pane.scrollTop;
+    const atEnd = before + list.pane.clientHeight >= list.pane.scrollHeight - 2;
+    if (atEnd || steps >= maxSteps) {
+        list.pane.scrollTop = 0;
+        done({rows: Array.from(seen.values()), complete: atEnd});
+        return;
+    }
+    steps += 1;
+    list.pane.scrollTop = before + Math.floor(list.pane.clientHeight * 0.8);
+    setTimeout(step, delay);
+};
+setTimeout(step, delay);
+"""
+
+# Localiza a linha de uma conversa pelo título exato (passado como argumento, sem montar seletores):
+# primeiro entre as linhas renderizadas, depois na posição guardada no índice e, por fim,
+# percorrendo a lista a partir do topo.
+# arguments[0]: título, arguments[1]: posição (px) conhecida ou null,
+# arguments[2]: passos máximos, arguments[3]: pausa (ms)
+LOCATE_CHAT_SCRIPT = CHAT_LIST_JS + """
+const title = arguments[0], offset = arguments[1], maxSteps = arguments[2], delay = arguments[3];
+const done = arguments[arguments.length - 1];
+const list = findList();
+if (!list) { done(null); return; }
+
+const seen = new Map();
+const check = () => {
+    const rows = readRows(list);
+    for (const [name, row] of rows) { seen.set(name, plain(row)); }
+    const row = rows.get(title);
+    if (!row) { return false; }
+    row.element.scrollIntoView({block: 'center'});
+    done({element: row.element, row: plain(row), rows: Array.from(seen.values())});
+    return true;
+};
+if (check()) { return; }
+
+let steps = 0;
+const scan = () => {
+    if (check()) { return; }
+    const before = list.pane.scrollTop;
+    if (before + list.pane.clientHeight >= list.pane.scrollHeight - 2 || steps >= maxSteps) {
+        done({element: null, row: null, rows: Array.from(seen.values())});
+        return;
+    }
+    steps += 1;
+    list.pane.scrollTop = before + Math.floor(list.pane.clientHeight * 0.8);
+    setTimeout(scan, delay);
+};
+const fromTop = () => {
+    list.pane.scrollTop = 0;
+    setTimeout(scan, delay);
+};
+
+if (offset !== null) {
+    list.pane.scrollTop = Math.max(0, offset - Math.floor(list.pane.clientHeight / 2));
+    setTimeout(() => { if (!check()) { fromTop(); } }, delay);
+} else {
+    fromTop();
+}
+"""
+
+
+class ChatIndex:
+    """
+    Índice título → linha da lista de conversas, mantido durante a sessão.
+
+    A lista é percorrida uma única vez; cada conversa guarda sua posição na
+    lista (e o id estável, quando a linha o expõe) e os metadados da última
+    mensagem exibidos na linha (horário, prévia e não lidas). Para abrir uma
+    conversa, a lista é rolada direto até a posição guardada, sem digitar na
+    pesquisa. As conversas sobem na lista ao receber mensagens, então uma posição
+    desatualizada leva a uma busca na própria lista, que também atualiza o índice.
+    """
+    def __init__(self, driver, wait_engine=None, max_steps=CHAT_INDEX_MAX_STEPS, step_delay=0.06):
+        """
+        Inicializa o índice.
+
+        Args:
+            driver: Instância do WebDriver Selenium
+            wait_engine (WaitEngine): Mecanismo de espera compartilhado (opcional)
+            max_steps (int): Quantidade máxima de passos de rolagem ao percorrer a lista
+            step_delay (float): Pausa em segundos entre os passos para a lista renderizar as linhas
+        """
+        self.driver = driver
+        self.wait_engine = wait_engine or WaitEngine(driver)
+        self.max_steps = max_steps
+        self.step_delay = step_delay
+        self.entries: Dict[str, Dict] = {}
+        self.built = False
+        self.complete = False
+        self.hits = 0
+        self.misses = 0
+
+    def _set_timeout(self):
+        """Ajusta o tempo máximo dos scripts assíncronos para uma varredura completa."""
+        self.wait_engine.set_script_timeout(max(30, self.max_steps * (self.step_delay + 0.05) + 10))
+
+    def _update(self, rows):
+        """Acrescenta ou atualiza as linhas lidas da página."""
+        for row in rows or []:
+            self.entries[row['title']] = row
+
+    def build(self) -> int:
+        """
+        Percorre a lista de conversas e monta o índice.
+
+        Returns:
+            int: Quantidade de conversas indexadas
+        """
+        self._set_timeout()
+        result = self.driver.execute_async_script(SCAN_CHAT_LIST_SCRIPT, self.max_steps, int(self.step_delay * 1000))
+        self.built = True
+        self.complete = False
+        if result is None:
+            logger.warning("Lista de conversas não encontrada; o índice ficará vazio")
+            return 0
+
+        self.entries = {}
+        self._update(result['rows'])
+        self.complete = bool(result['complete'])
+        if not self.complete:
+            logger.warning(f"Lista de conversas percorrida parcialmente ({self.max_steps} passos)")
+        logger.debug(f"Índice da lista de conversas: {len(self.entries)} conversas")
+        return len(self.entries)
+
+    def get(self, title) -> Optional[Dict]:
+        """
+        Retorna a entrada de uma conversa no índice.
+
+        Args:
+            title (str): Título da conversa
+
+        Returns:
+            dict: {'title', 'chat_id', 'row_index', 'offset', 'last_time', 'preview', 'unread'}, ou None
+        """
+        return self.entries.get(title)
+
+    def locate(self, title):
+        """
+        Rola a lista até a conversa e retorna sua linha.
+
+        Args:
+            title (str): Título exato da conversa
+
+        Returns:
+            WebElement: Linha da conversa visível na lista, ou None se ela não estiver na lista
+        """
+        if not self.built:
+            self.build()
+
+        entry = self.entries.get(title)
+        if entry is None and self.complete:
+            # A lista inteira já foi indexada: a conversa não está nela e a busca assume
+            self.misses += 1
+            return None
+
+        self._set_timeout()
+        result = self.driver.execute_async_script(
+            LOCATE_CHAT_SCRIPT, title, entry['offset'] if entry else None, self.max_steps, int(self.step_delay * 1000)
+        )
+        if result is None:
+            return None
+
+        self._update(result['rows'])
+        if result['element'] is None:
+            self.entries.pop(title, None)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return result['element']
+
+    def invalidate(self, title):
+        """Remove uma conversa do índice (ex.: a linha localizada não abriu a conversa)."""
+        self.entries.pop(title, None)
@@ -1,25 +1,126 @@
 # modules/chat_interaction.py
-import time
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+
+from config.settings import TIME_WAIT, CHAT_INDEX_ENABLED
+from core.wait_engine import WaitEngine
+from modules.chat_index import ChatIndex
+from modules.selector_registry import SelectorRegistry
+from utils.logger import get_logger
+from utils.timestamp_normalizer import TimestampNormalizer, to_epoch
+
+logger = get_logger("chat_interaction")
+
+# Confirma que o cabeçalho da conversa aberta mostra o título esperado (arguments[0])
+CHAT_OPENED_SCRIPT = """
+const main = document.querySelector('#main');
+if (!main) { return false; }
+const title = main.querySelector('header span[title]');
+return !title || title.getAttribute('title') === arguments[0];
+"""
+
+# Lê o conteúdo mais antigo renderizado na conversa: os candidatos a divisor de data (linhas
+# sem mensagem, do mais antigo ao mais recente, validados em Python) e o prefixo da primeira mensagem
+OLDEST_RENDERED_SCRIPT = """
+const result = {dividers: [], prefix: null};
+const contentSelector = '.message-in, .message-out, [data-id]';
+for (const row of document.querySelectorAll('div.focusable-list-item')) {
+    if (!row.matches(contentSelector) && !row.querySelector(contentSelector)) {
+        const label = (row.textContent || '').trim();
+        if (label) { result.dividers.push(label); }
+    }
+}
+const copyable = document.querySelector('div.message-in .copyable-text[data-pre-plain-text], '
+                                        + 'div.message-out .copyable-text[data-pre-plain-text]');
+result.prefix = copyable ? copyable.getAttribute('data-pre-plain-text') : null;
+return result;
+"""
+
+
+def xpath_literal(value) -> str:
+    """
+    Converte um texto em literal XPath, inclusive quando contém aspas simples e duplas.
+
+    Args:
+        value (str): Texto a ser comparado no XPath
+
+    Returns:
+        str: Literal entre aspas ou expressão concat()
+    """
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    parts = value.split('"')
+    return "concat(" + ", '\"', ".join(f'"{part}"' for part in parts) + ")"
 
-from config.settings import TIME_WAIT
 
 class ChatInteraction:
     """
     Gerencia interações com chats e contatos no WhatsApp Web.
     """
-    def __init__(self, driver):
-        """Inicializa com o driver do selenium."""
+    def __init__(self, driver, wait_engine=None, use_index=CHAT_INDEX_ENABLED, selector_registry=None):
+        """
+        Inicializa com o driver do selenium e o mecanismo de espera.
+        
+        Args:
+            driver: Instância do WebDriver Selenium
+            wait_engine (WaitEngine): Mecanismo de espera compartilhado (opcional)
+            use_index (bool): Se True, abre as conversas pelo índice da lista de conversas,
+                usando a pesquisa apenas para as que não estiverem nele
+            selector_registry (SelectorRegistry): Registro de seletores compartilhado (opcional)
+        """
         self.driver = driver
+        self.wait_engine = wait_engine or WaitEngine(driver)
+        self.selectors = selector_registry or SelectorRegistry(driver, self.wait_engine)
+        self.timestamp_normalizer = TimestampNormalizer()
+        self.chat_index = ChatIndex(driver, self.wait_engine) if use_index else None
     
     def find_chat(self, contact_name):
         """
-        Procura por um contato ou grupo específico.
+        Procura por um contato ou grupo específico e abre a conversa.
+        
+        Com o índice ativo, a conversa é aberta direto pela lista de conversas;
+        a barra de pesquisa é usada apenas quando ela não está na lista.
+        
+        Args:
+            contact_name (str): Nome do contato ou grupo a ser buscado
+            
+        Returns:
+            bool: True se encontrado, False caso contrário
+        """
+        if self.chat_index is not None:
+            try:
+                row = self.chat_index.locate(contact_name)
+                if row is not None:
+                    row.click()
+                    if self._wait_chat_opened(contact_name):
+                        logger.debug(f"Contato '{contact_name}' aberto pela lista de conversas!")
+                        return True
+                    self.chat_index.invalidate(contact_name)
+            except Exception as e:
+                logger.debug(f"Não foi possível abrir '{contact_name}' pela lista de conversas: {str(e)}")
+        
+        found = self.search_chat(contact_name)
+        
+        # A pesquisa filtra a lista; limpa para que as próximas conversas sejam abertas pelo índice
+        if found and self.chat_index is not None:
+            self.clear_search()
+        return found
+    
+    def _wait_chat_opened(self, contact_name):
+        """Aguarda o painel da conversa exibir o título informado."""
+        return bool(self.wait_engine.until_script(
+            CHAT_OPENED_SCRIPT, contact_name, timeout=TIME_WAIT * 4, label="conversa aberta"
+        ))
+    
+    def search_chat(self, contact_name):
+        """
+        Abre um contato ou grupo pela barra de pesquisa.
         
         Args:
             contact_name (str): Nome do contato ou grupo a ser buscado
@@ -29,32 +130,52 @@ class ChatInteraction:
         """
         try:
             # Clica na barra de pesquisa
-            search_box = WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, '//div[@aria-label="Caixa de texto de pesquisa"]'))
-            )
+            search_box = self.selectors.find("caixa_pesquisa", timeout=30)
+            if search_box is None:
+                logger.error("Barra de pesquisa não encontrada.")
+                return False
             search_box.click()
             search_box.clear()
             search_box.send_keys(contact_name)
             
-            time.sleep(TIME_WAIT)  # Aguarda a busca ser realizada
-            
-            # Tenta encontrar o contato na lista de resultados
-            try:
-                contact = WebDriverWait(self.driver, 30).until(
-                    EC.element_to_be_clickable((By.XPATH, f'//span[@title="{contact_name}"]'))
-                )
-                time.sleep(TIME_WAIT)
-                contact.click()
-                print(f"[DEBUG] Contato '{contact_name}' encontrado e selecionado!")
-                return True
+            # Aguarda o contato aparecer na lista de resultados, sem pausa fixa
+            contact = self.wait_engine.wait_for_element(
+                (By.XPATH, f'//span[@title={xpath_literal(contact_name)}]'), timeout=30, clickable=True,
+                label="resultado da busca"
+            )
             
-            # Caso o contato não seja encontrado, trata a exceção
-            except TimeoutException:
-                print(f"[DEBUG] Contato '{contact_name}' não encontrado.")
+            # Caso o contato não seja encontrado, encerra a busca
+            if contact is None:
+                logger.debug(f"Contato '{contact_name}' não encontrado.")
                 return False
+            
+            contact.click()
+            
+            # Aguarda o painel da conversa ser aberto
+            self._wait_chat_opened(contact_name)
+            logger.debug(f"Contato '{contact_name}' encontrado e selecionado!")
+            return True
                 
         except Exception as e:
-            print(f"Erro ao buscar contato: {str(e)}")
+            logger.error(f"Erro ao buscar contato: {str(e)}")
+            return False
+    
+    def clear_search(self):
+        """
+        Limpa a barra de pesquisa, voltando a lista de conversas completa.
+        
+        Returns:
+            bool: True se a pesquisa foi limpa
+        """
+        try:
+            search_box = self.selectors.find("caixa_pesquisa")
+            if search_box is None:
+                return False
+            search_box.clear()
+            search_box.send_keys(Keys.ESCAPE)
+            return True
+        except Exception as e:
+            logger.debug(f"Não foi possível limpar a pesquisa: {str(e)}")
             return False
     
     def send_message(self, message):
@@ -85,19 +206,51 @@ class ChatInteraction:
             )
             send_button.click()
             
-            print(f"Mensagem enviada: '{message}'")
+            logger.debug(f"Mensagem enviada: '{message}'")
             return True
             
         except Exception as e:
-            print(f"Erro ao enviar mensagem: {str(e)}")
+            logger.error(f"Erro ao enviar mensagem: {str(e)}")
             return False
     
-    def scroll_to_top(self):
+    def reached_date(self, since) -> bool:
+        """
+        Indica se a conversa já mostra conteúdo anterior a uma data.
+        
+        Args:
+            since: Início da janela de datas (date, datetime, epoch ou "AAAA-MM-DD")
+            
+        Returns:
+            bool: True se o divisor de data ou a mensagem mais antiga renderizados são anteriores a since
+        """
+        since = to_epoch(since)
+        oldest = self.driver.execute_script(OLDEST_RENDERED_SCRIPT) or {}
+
+        # O primeiro rótulo reconhecido como dia é o divisor mais antigo renderizado
+        for label in oldest.get('dividers') or []:
+            day_start = self.timestamp_normalizer.day_label_epoch(label)
+            if day_start is not None:
+                if day_start <= since:
+                    return True
+                break
+        _, epoch = self.timestamp_normalizer.normalize(oldest.get('prefix'))
+        return epoch is not None and epoch < since
+    
+    def scroll_to_top(self, since=None):
         """
         Rola para cima para carregar mensagens mais antigas.
         Implementa múltiplos métodos para garantir que a rolagem funcione.
+        
+        Args:
+            since: Início da janela de datas (date, datetime, epoch ou "AAAA-MM-DD"); a rolagem
+                para assim que a conversa mostra uma data anterior (opcional)
+            
+        Returns:
+            bool: True se a rolagem parou por ter alcançado since
         """
-        print("[DEBUG] Iniciando carregamento de mensagens antigas...")
+        # Convertido uma única vez: as comparações com os divisores de data usam epochs
+        since = to_epoch(since)
+        logger.debug("Iniciando carregamento de mensagens antigas...")
           
         # Método 1: Usar o HOME do teclado
         try:
@@ -111,11 +264,25 @@ class ChatInteraction:
             scroll_attempts = 100
             
             for i in range(scroll_attempts):
+                # Cada rolagem aguarda as mensagens antigas entrarem no painel; sem novas
+                # mensagens, o topo carregado foi alcançado
+                self.wait_engine.arm_mutation("rolagem")
                 actions.send_keys(Keys.HOME).perform()
-                time.sleep(0.1)  # Espera um pouco entre as rolagens
+                if not self.wait_engine.wait_for_mutation("rolagem", timeout=2, settle=0.1, label="rolagem home"):
+                    break
+                
+                # Verifica a data a cada 10 rolagens, em uma única chamada
+                if since is not None and i % 10 == 9 and self.reached_date(since):
+                    logger.debug("Início da janela de datas alcançado")
+                    return True
+            
+            if since is not None and self.reached_date(since):
+                logger.debug("Início da janela de datas alcançado")
+                return True
                 
         except Exception as e:
-            print(f"[DEBUG] Método de rolagem HOME falhou: {str(e)}")
+            logger.debug(f"Método de rolagem HOME falhou: {str(e)}")
+        return False
     
     def find_message(self):
         """
@@ -127,46 +294,41 @@ class ChatInteraction:
             actions = ActionChains(self.driver)
             actions.send_keys(Keys.HOME).perform()
 
-            # Tenta encontrar o botão "Carregar mensagens anteriores"
-            # Os XPaths podem variar de acordo com a versão do WhatsApp Web
-            load_more_selectors = [
-                '//div[contains(text(), "Clique neste aviso para carregar mensagens mais antigas do seu celular.")]',
-                '//div[contains(text(), "Carregar mais")]',
-                '//span[contains(text(), "mensagens anteriores")]',
-                '//div[contains(@data-testid, "load-earlier-messages")]',
-                '//div[contains(text(), "Carregando")]',
-                '//div[contains(text(), "carregar")]', 
-            ]
-            
-            # Percorre os seletores para encontrar o botão
-            for selector in load_more_selectors:
+            # Procura o botão "Carregar mensagens anteriores" com todos os seletores conhecidos
+            # (idiomas e versões do WhatsApp Web) em uma única consulta na página
+            load_more_button = self.selectors.find("carregar_anteriores", timeout=3, clickable=True)
+            if load_more_button is not None:
                 try:
-                    load_more_button = WebDriverWait(self.driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
+                    # Observa o painel antes do clique para não perder as novas mensagens
+                    self.wait_engine.arm_mutation("historico")
                     load_more_button.click()
-                    print("[DEBUG] Botão 'Carregar mensagens anteriores' encontrado e clicado")
-                    time.sleep(5)  # Espera carregar as mensagens
+                    logger.debug("Botão 'Carregar mensagens anteriores' encontrado e clicado")
+                    
+                    # Espera as mensagens antigas serem adicionadas ao painel
+                    self.wait_engine.wait_for_mutation("historico", timeout=10, label="historico carregado")
                     return True
                 
-                except (TimeoutException, NoSuchElementException, StaleElementReferenceException):
-                    continue
+                except (NoSuchElementException, StaleElementReferenceException):
+                    pass
             
-            print("[DEBUG] Botão 'Carregar mensagens anteriores' não encontrado")
+            logger.debug("Botão 'Carregar mensagens anteriores' não encontrado")
             return False
             
         except Exception as e:
-            print(f"[DEBUG] Não foi possível encontrar o botão de carregar mensagens")
+            logger.debug(f"Não foi possível encontrar o botão de carregar mensagens: {str(e)}")
             return False
     
-    def load_all_messages(self, max_attempts=100):
+    def load_all_messages(self, max_attempts=100, since=None):
         """
         Combina várias estratégias para tentar carregar o máximo de mensagens antigas.
         
         Args:
             max_attempts (int): Número máximo de tentativas
+            since: Início da janela de datas (date, datetime, epoch ou "AAAA-MM-DD"); o carregamento
+                para assim que a conversa mostra uma data anterior (opcional)
         """
-        print("[DEBUG] Iniciando carregamento completo do histórico de mensagens...")      
+        since = to_epoch(since)
+        logger.debug("Iniciando carregamento completo do histórico de mensagens...")      
             
         # Permite que o usuário role para cima manualmente
         loading_messages = True
@@ -178,7 +340,8 @@ class ChatInteraction:
         while loading_messages and max_attempt > 0:
             
             # Aguarda um pouco para garantir que as mensagens sejam carregadas
-            self.scroll_to_top()
+            if self.scroll_to_top(since):
+                break
 
             # Verifica novamente se o botão de carregar mensagens ainda está presente
             loading_messages = self.find_message()
@@ -186,4 +349,4 @@ class ChatInteraction:
             # Aumenta o contador de tentativas
             max_attempt -= 1
     
-        print("[DEBUG] Processo de carregamento de mensagens antigas concluído")
\ No newline at end of file
+        logger.debug("Processo de carregamento de mensagens antigas concluído")
@@ -0,0 +1,316 @@
+# modules/checkpoint_store.py
+import datetime
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger("checkpoint_store")
+
+# Bytes lidos por vez ao reenviar uma faixa de preparação de trás para frente
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def read_lines_reversed(path, block_size=READ_BLOCK_SIZE) -> Iterator[str]:
+    """
+    Lê as linhas de um arquivo UTF-8 da última para a primeira, em blocos de tamanho fixo.
+
+    Args:
+        path (str): Caminho do arquivo
+        block_size (int): Bytes lidos por vez
+
+    Returns:
+        iterator: Linhas não vazias, sem a quebra de linha
+    """
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            # O início do bloco pode ser o fim de uma linha que continua no bloco anterior
+            lines = (f.read(size) + remainder).split(b"\n")
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode('utf-8')
+        if remainder:
+            yield remainder.decode('utf-8')
+
+
+class CheckpointStore:
+    """
+    Armazena, por grupo, a última mensagem sincronizada e o estado de execuções interrompidas.
+
+    O arquivo fica em OUTPUT_DIR/checkpoints.json e é sempre regravado de forma
+    atômica, então uma interrupção nunca deixa o checkpoint corrompido. Uma mesma
+    instância pode ser compartilhada por várias sessões do navegador.
+    """
+    def __init__(self, output_dir, file_name="checkpoints.json"):
+        """
+        Inicializa o armazenamento de checkpoints.
+
+        Args:
+            output_dir (str): Diretório de saída onde o arquivo de checkpoints é mantido
+            file_name (str): Nome do arquivo de checkpoints
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, file_name)
+        os.makedirs(output_dir, exist_ok=True)
+        self.lock = threading.RLock()
+        self.checkpoints = self._load()
+
+    def _load(self) -> Dict:
+        """Carrega os checkpoints do disco, ou um dicionário vazio se não existirem."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Não foi possível ler os checkpoints em {self.path}: {str(e)}")
+            return {}
+
+    def _save(self):
+        """Grava os checkpoints em um arquivo temporário e o move sobre o original."""
+        with self.lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, prefix=".checkpoints-", suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.checkpoints, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def get(self, group_name) -> Dict:
+        """
+        Obtém o checkpoint de um grupo.
+
+        Args:
+            group_name (str): Nome do grupo ou contato
+
+        Returns:
+            dict: Checkpoint com 'message_id', 'timestamp', 'pending', 'updated_at' e
+                'chat_list' (vazio se inexistente)
+        """
+        with self.lock:
+            return dict(self.checkpoints.get(group_name) or {})
+
+    def save_pending(self, group_name, pending: List[Dict]):
+        """
+        Registra os lotes já gravados por uma sincronização em andamento.
+
+        Args:
+            group_name (str): Nome do grupo ou contato
+            pending (list): Faixas gravadas ({'newest_id', 'oldest_id', 'file'})
+        """
+        with self.lock:
+            checkpoint = self.checkpoints.setdefault(group_name, {})
+            checkpoint['pending'] = pending
+            self._save()
+
+    def save_chat_state(self, group_name, state: Dict):
+        """
+        Registra o estado do grupo na lista de conversas após uma sincronização.
+
+        Args:
+            group_name (str): Nome do grupo ou contato
+            state (dict): {'last_time', 'preview', 'activity'} usados pelo escalonador de sincronização
+        """
+        with self.lock:
+            checkpoint = self.checkpoints.setdefault(group_name, {})
+            checkpoint['chat_list'] = state
+            self._save()
+
+    def complete(self, group_name, message_id, timestamp):
+        """
+        Conclui a sincronização de um grupo, avançando a última mensagem vista.
+
+        Args:
+            group_name (str): Nome do grupo ou contato
+            message_id (str): Id da mensagem mais recente sincronizada
+            timestamp (str): Timestamp da mensagem mais recente sincronizada
+        """
+        with self.lock:
+            checkpoint = self.checkpoints.setdefault(group_name, {})
+            if message_id:
+                checkpoint['message_id'] = message_id
+                checkpoint['timestamp'] = timestamp
+            checkpoint['pending'] = []
+            checkpoint['updated_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+            self._save()
+
+
+class GroupSync:
+    """
+    Controla uma sincronização incremental de um grupo.
+
+    Os lotes coletados (do mais recente para o mais antigo) são filtrados até
+    a mensagem do checkpoint. Cada faixa contínua de mensagens novas é gravada
+    em um arquivo de preparação próprio (JSON Lines) e registrada no checkpoint,
+    permitindo que uma execução interrompida pule as faixas já gravadas ao ser
+    retomada. Ao final, as faixas são enviadas ao gravador de saída em ordem cronológica.
+    A extração completa usa o mesmo fluxo sem o checkpoint (resume=False), para
+    que a saída do grupo fique sempre em ordem cronológica.
+    """
+    def __init__(self, store: CheckpointStore, file_manager, group_name, group_dir, resume=True):
+        """
+        Inicializa a sincronização.
+
+        Args:
+            store (CheckpointStore): Armazenamento de checkpoints
+            file_manager (FileManager): Gerenciador usado para gravar os arquivos de preparação
+            group_name (str): Nome do grupo ou contato
+            group_dir (str): Diretório do grupo
+            resume (bool): Se False, ignora o checkpoint e descarta as faixas pendentes
+                (extração completa): todas as mensagens coletadas são gravadas
+        """
+        self.store = store
+        self.file_manager = file_manager
+        self.group_name = group_name
+        self.group_dir = group_dir
+
+        checkpoint = store.get(group_name)
+        if not resume:
+            self._discard_pending(checkpoint.get('pending') or [])
+            checkpoint = {}
+        self.stop_id = checkpoint.get('message_id')
+        self.ranges = list(checkpoint.get('pending') or [])
+
+        self.reached = False
+        self.newest_record: Optional[Dict] = None
+        self.current = None
+        self.skip_until = None
+        self.encounter_order = []
+
+        # Faixa de cada registro devolvido pelo último filter_batch
+        self.batch_ranges = []
+
+    def _discard_pending(self, pending: List[Dict]):
+        """Remove os arquivos de preparação de uma sincronização interrompida e suas faixas do checkpoint."""
+        for committed in pending:
+            staging_path = os.path.join(self.group_dir, committed['file'])
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+        if pending:
+            self.store.save_pending(self.group_name, [])
+
+    def filter_batch(self, batch: List[Dict]) -> List[Dict]:
+        """
+        Remove do lote as mensagens já sincronizadas.
+
+        Args:
+            batch (list): Registros do harvester, do mais recente para o mais antigo
+
+        Returns:
+            list: Registros que ainda precisam ser gravados
+        """
+        new_records = []
+        self.batch_ranges = []
+        for record in batch:
+            message_id = record.get('message_id')
+
+            # Chegou à última mensagem da sincronização anterior
+            if self.stop_id and message_id == self.stop_id:
+                self.reached = True
+                break
+
+            if self.newest_record is None:
+                self.newest_record = record
+
+            # Pula a faixa gravada por uma execução interrompida
+            if self.skip_until is not None:
+                if message_id == self.skip_until:
+                    self.skip_until = None
+                continue
+
+            committed = next((r for r in self.ranges if r['newest_id'] == message_id), None)
+            if committed:
+                self.encounter_order.append(committed)
+                self.skip_until = committed['oldest_id'] if committed['oldest_id'] != message_id else None
+
+                # A próxima mensagem nova inicia outra faixa contínua
+                self.current = None
+                continue
+
+            # As faixas são criadas na ordem em que aparecem no histórico
+            if self.current is None:
+                self.current = {'newest_id': message_id, 'oldest_id': None, 'file': f".sync-{len(self.ranges):04d}.tmp"}
+                self.encounter_order.append(self.current)
+                self.ranges.append(self.current)
+
+            new_records.append(record)
+            self.batch_ranges.append(self.current)
+        return new_records
+
+    def commit_batch(self, records: List[Dict], messages: List[Optional[Dict]], batch_ranges: Optional[List[Dict]] = None):
+        """
+        Grava um lote nos arquivos de preparação e registra as faixas no checkpoint.
+
+        Args:
+            records (list): Registros retornados por filter_batch, do mais recente para o mais antigo
+            messages (list): Mensagem no esquema de saída de cada registro (None para ignorar)
+            batch_ranges (list): Faixa de cada registro, copiada de batch_ranges logo após o
+                filter_batch do lote (padrão: as do último filter_batch)
+        """
+        if not records:
+            return
+        if batch_ranges is None:
+            batch_ranges = self.batch_ranges
+
+        # Agrupa as linhas por faixa contínua antes de gravar
+        writes = []
+        for record, message, committed in zip(records, messages, batch_ranges):
+            if not writes or writes[-1][0] is not committed:
+                writes.append((committed, []))
+
+            committed['oldest_id'] = record.get('message_id')
+            if message:
+                writes[-1][1].append(json.dumps(message, ensure_ascii=False))
+
+        for committed, range_lines in writes:
+            self.file_manager.append_messages_to_file(range_lines, os.path.join(self.group_dir, committed['file']))
+
+        # Faixas abertas por lotes filtrados mas ainda não gravados ficam fora do checkpoint
+        self.store.save_pending(self.group_name, [r for r in self.ranges if r['oldest_id'] is not None])
+
+    def finish(self, writer) -> int:
+        """
+        Envia as faixas gravadas ao gravador de saída em ordem cronológica e avança o checkpoint.
+
+        Args:
+            writer (MessageWriter): Gravador das mensagens do grupo
+
+        Returns:
+            int: Quantidade de mensagens gravadas
+        """
+        # Faixas não reencontradas nesta execução ficam após as demais
+        ordered = self.encounter_order + [r for r in self.ranges if r not in self.encounter_order]
+
+        # Cada faixa foi preparada da mais recente para a mais antiga e é lida de trás para frente,
+        # em blocos, então a memória não cresce com o tamanho da faixa
+        appended = 0
+        for committed in reversed(ordered):
+            staging_path = os.path.join(self.group_dir, committed['file'])
+            if not os.path.exists(staging_path):
+                continue
+            for line in read_lines_reversed(staging_path):
+                writer.write(json.loads(line))
+                appended += 1
+
+        # As mensagens precisam estar no destino (e uma extração completa, trocada pela saída
+        # anterior) antes de o checkpoint avançar
+        writer.commit()
+
+        newest = self.newest_record or {}
+        self.store.complete(self.group_name, newest.get('message_id'), newest.get('timestamp'))
+
+        # Remove os arquivos de preparação somente após o checkpoint ser concluído
+        for committed in ordered:
+            staging_path = os.path.join(self.group_dir, committed['file'])
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+        return appended
@@ -7,8 +7,131 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
 
-from utils.timestamp_regex import get_timestamp_regex
-import re
+from utils.logger import SampledLogger, get_logger
+from utils.timestamp_normalizer import TimestampNormalizer
+
+logger = get_logger("content_extractor")
+
+# Avisos e mensagens por elemento são registrados por amostragem
+sampled_logger = SampledLogger(logger)
+
+# Função JavaScript que converte um elemento de mensagem em um registro.
+# Reproduz no navegador as mesmas regras dos métodos extract_* (por elemento).
+MESSAGE_RECORD_JS = """
+function (element) {
+    const first = (xpath) => document.evaluate(
+        xpath, element, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue;
+    const text = (node) => (node ? (node.innerText || node.textContent || '') : '');
+
+    const holder = element.closest('[data-id]') || element.querySelector('[data-id]');
+    const author = first('.//span[@data-testid="author"]');
+    const meta = first('.//div[@data-testid="msg-meta"]');
+    const body = first('.//div[@data-testid="msg-container"]//span[@dir="ltr"]');
+    const copyable = element.querySelector('.copyable-text[data-pre-plain-text]');
+
+    const images = [];
+    element.querySelectorAll('img').forEach((img) => {
+        if (img.getAttribute('tabindex') !== '-1' && img.src) {
+            images.push(img.src);
+        }
+    });
+
+    const documents = [];
+    element.querySelectorAll('a[href]').forEach((link) => {
+        const href = link.href;
+        if (href && (href.includes('blob:') || href.includes('https://'))) {
+            documents.push([href, link.getAttribute('download') || '']);
+        }
+    });
+
+    return {
+        message_id: holder ? holder.getAttribute('data-id') : null,
+        pre_plain_text: copyable ? copyable.getAttribute('data-pre-plain-text') : null,
+        sender: author ? text(author) : 'Você',
+        timestamp: meta ? text(meta) : null,
+        text: body ? text(body).trim() : '',
+        images: images,
+        documents: documents
+    };
+}
+"""
+
+# Script de extração em lote: uma única chamada ao WebDriver para todas as mensagens
+BULK_EXTRACT_SCRIPT = """
+const extract = """ + MESSAGE_RECORD_JS + """;
+const nodes = arguments[0] || document.querySelectorAll(
+    'div.message-in, div.message-out'
+);
+const records = [];
+for (const node of nodes) {
+    try {
+        records.push(extract(node));
+    } catch (e) {
+        records.push(null);
+    }
+}
+return records;
+"""
+
+# Script que percorre a lista de mensagens uma única vez, na ordem da conversa.
+# Mensagens trazem a data do próprio prefixo "[hora, data] remetente:"; as linhas da lista
+# sem mensagem voltam como candidatas a divisor ("HOJE", "ONTEM", "12/03/2024") e são
+# validadas em Python antes de datar as mensagens sem prefixo que as seguem.
+MESSAGES_BY_DATE_SCRIPT = """
+const extract = """ + MESSAGE_RECORD_JS + """;
+const messageSelector = 'div.message-in, div.message-out';
+const contentSelector = '.message-in, .message-out, [data-id]';
+const nodes = document.querySelectorAll('div.focusable-list-item, ' + messageSelector);
+const prefix = /^\\[([^,\\]]+), ([^\\]]+)\\] (.*?):\\s*$/;
+
+const rows = [];
+for (const node of nodes) {
+    if (node.matches(messageSelector)) {
+        try {
+            const record = extract(node);
+            const match = record.pre_plain_text ? prefix.exec(record.pre_plain_text) : null;
+            rows.push({
+                date: match ? match[2] : null,
+                time: match ? match[1] : record.timestamp,
+                sender: match ? match[3] : record.sender,
+                text: record.text,
+                message_id: record.message_id
+            });
+        } catch (e) {
+            // Nó removido pela virtualização durante a leitura
+        }
+    } else if (!node.matches(contentSelector) && !node.querySelector(contentSelector)) {
+        const label = (node.textContent || '').trim();
+        if (label) {
+            rows.push({divider: label});
+        }
+    }
+}
+return rows;
+"""
+
+# Script que lê todos os contêineres "copyable-text" de uma só vez
+COPYABLE_TEXT_SCRIPT = """
+const containers = document.evaluate(
+    '//div[@class="copyable-text"]', document, null,
+    XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+);
+const result = [];
+for (let i = 0; i < containers.snapshotLength; i++) {
+    const container = containers.snapshotItem(i);
+    const spans = document.evaluate(
+        './/span[@class=""]', container, null,
+        XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+    );
+    const texts = [];
+    for (let j = 0; j < spans.snapshotLength; j++) {
+        texts.push((spans.snapshotItem(j).innerText || '').trim());
+    }
+    result.push({pre: container.getAttribute('data-pre-plain-text'), texts: texts});
+}
+return result;
+"""
 
 class ContentExtractor:
     """
@@ -24,81 +147,38 @@ class ContentExtractor:
         """
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
+        
+        # Converte os prefixos "[hora, data] remetente:" em lote, com cache de datas
+        self.timestamp_normalizer = TimestampNormalizer()
     
-    def get_messages_by_date(self):
+    def get_messages_by_date(self) -> List[dict]:
         """
-        Obtém mensagens de uma conversa específica.
-
-        Args:
-            date (str): Data da conversa no formato "dd/mm/yyyy"
+        Obtém as mensagens renderizadas da conversa, separadas pelos divisores de data.
+        
+        Percorre a lista de mensagens uma única vez dentro da página, então o
+        custo é proporcional ao número de mensagens e não ao de divisores.
+        
+        Returns:
+            Lista de dicionários (date, time, sender, text, message_id), na ordem da conversa
         """
-
-        # Cria uma lista para armazenar as mensagens
-        messages = []
-
         try:
-            # Obtém as datas das mensagens
-            list_messages_date = self.driver.find_elements(By.XPATH, '//div[@class="_amjw _amk1 _aotl  focusable-list-item"]')
-            
-            # Percorre as mensagens e verifica se há pelo menos duas mensagens
-            for index in range(len(list_messages_date)):
-
-                # Verifica se há pelo menos dois elementos na lista
-                if 2 <= len(list_messages_date) and index < len(list_messages_date) - 1:
-
-                    # Obtém o HTML entre o primeiro e o segundo elemento
-                    first_element = list_messages_date[index]
-                    second_element = list_messages_date[index + 1]
-                    
-                    # Usa JavaScript para obter o HTML entre os dois elementos
-                    html_between = self.driver.execute_script(
-                        """
-                        let range = document.createRange();
-                        range.setStart(arguments[0], 0);
-                        range.setEnd(arguments[1], arguments[1].childNodes.length);
-                        return range.cloneContents().textContent;
-                        """,
-                        first_element, second_element
-                    )
-                    print(f"[DEBUG] HTML entre os elementos: {html_between}")
-
-                    # Separe o HTML extraído em partes
-                    html_between_list = html_between.split('tail-out')
-                    html_between_list = [part.split('msg-check')[0] for part in html_between_list if 'msg-check' in part]
-
-                    # Percorre cada parte do HTML extraído
-                    for string_html in html_between_list:
-                        
-                        # Define regex mais flexível para capturar diferentes formatos de timestamps
-                        timestamp_regex_XX_XXXX_XX = r'\d{2}:\d{2}\d{2}:\d{2}'
-                        timestamp_regex_XX_XX = r'(?<!\d{2}:\d{2})\d{2}:\d{2}(?!\d{2}:\d{2})'
-
-                        # Verifica se o timestamp está no formato "XX:XX" ou "XX:XX:XX"
-                        timestamp_regex = re.search(timestamp_regex_XX_XX, string_html) or re.search(timestamp_regex_XX_XXXX_XX, string_html)
-                        
-                        # Checa se o timestamp foi encontrado
-                        if timestamp_regex:
-                            # Remove os caracteres indesejados do message_text
-                            message_text = string_html.replace(timestamp_regex.group(), '')
-                            
-                            # Extrai a data da string
-                            data_time = timestamp_regex.group()
-
-                        # Armazena o HTML extraído na lista de resultados
-                        messages.append({
-                            "date": first_element.text.strip(),
-                            "message_text": message_text,
-                            "timestamp": data_time
-                        })
-
-                        print(f"[DEBUG] Mensagem extraída: {messages[-1]}")
-
-            return messages
-
-        except:
-            print("[ERROR] Erro ao obter mensagens por data.")
+            rows = self.driver.execute_script(MESSAGES_BY_DATE_SCRIPT) or []
+        
+        except Exception as e:
+            logger.error(f"Erro ao obter mensagens por data: {str(e)}")
             return []
         
+        # Só rótulos reconhecidos como dia viram divisor; a data do prefixo tem precedência
+        records = []
+        date = None
+        for row in rows:
+            if "divider" in row:
+                if self.timestamp_normalizer.day_label_epoch(row["divider"]) is not None:
+                    date = row["divider"]
+                continue
+            records.append({**row, "date": row.get("date") or date})
+        return records
+        
     def get_all_messages(self) -> List[str]:
         """
         Obtém todos os textos de mensagens visíveis na conversa atual.
@@ -114,7 +194,7 @@ class ContentExtractor:
             return chat_messages
         
         except Exception as e:
-            print(f"[ERROR] Erro ao obter mensagens: {str(e)}")
+            logger.error(f"Erro ao obter mensagens: {str(e)}")
             return []
     
     def _get_incoming_messages(self) -> List[str]:
@@ -128,31 +208,29 @@ class ContentExtractor:
         messages_text = []
 
         try:
-            # Localiza contêineres de mensagens recebidas
-            list_message_container = self.driver.find_elements(By.XPATH, '//div[@class="copyable-text"]')                  
-            
-            for message_container in list_message_container:
-                
-                # Obtém o usuário remetente da mensagem 
-                user, timestamp = get_timestamp_regex(message_container.get_attribute('data-pre-plain-text'))
+            # Lê todos os contêineres de mensagens em uma única chamada ao WebDriver
+            list_message_container = self.driver.execute_script(COPYABLE_TEXT_SCRIPT) or []
+
+            # Interpreta todos os prefixos de uma só vez
+            batch = self.timestamp_normalizer.normalize_batch(
+                [message_container['pre'] for message_container in list_message_container], with_text=True
+            )
+
+            for message_container, user, timestamp in zip(list_message_container, batch.senders, batch.timestamps):
 
-                # Busca spans que contêm o texto das mensagens
-                list_message = message_container.find_elements(By.XPATH, './/span[@class=""]')
-                
                 # Extrai o texto de cada mensagem
-                for message in list_message:
-                    text = message.text.strip()
-                    
+                for text in message_container['texts']:
+
                     # Verifica se o texto não está vazio e se não é uma mensagem de sistema
                     if text:
-                        messages_text.append({'user': user, 'timestamp': timestamp, 'text': text})
-                        print(f"[DEBUG] Mensagem recebida: {text}")
+                        messages_text.append({'user': user or None, 'timestamp': timestamp, 'text': text})
+                        sampled_logger.debug("mensagem_recebida", "Mensagem recebida: %s", text)
             
             return messages_text
         
         # Tratamento de exceções para evitar falhas em mensagens não visíveis ou removidas
         except Exception as e:
-            print(f"[ERROR] Erro ao obter mensagens recebidas: {str(e)}")
+            logger.error(f"Erro ao obter mensagens recebidas: {str(e)}")
             return []
         
     def get_message_details(self):
@@ -160,7 +238,8 @@ class ContentExtractor:
         Obtém detalhes completos de todas as mensagens visíveis.
         
         Returns:
-            Lista de dicionários contendo detalhes das mensagens (remetente, timestamp, texto, mídia)
+            Lista de dicionários contendo detalhes das mensagens (id, remetente, timestamp, texto, mídia),
+            normalizados como em extract_messages_bulk
         """
         messages = []
         try:
@@ -171,6 +250,8 @@ class ContentExtractor:
             
             for element in message_elements:
                 # Extrai detalhes da mensagem
+                message_id = self.extract_message_id(element)
+                pre_plain_text = self.extract_pre_plain_text(element)
                 sender = self.extract_sender(element)
                 timestamp = self.extract_timestamp(element)
                 text = self.extract_text(element)
@@ -178,6 +259,8 @@ class ContentExtractor:
                 documents = self.extract_documents(element)
                 
                 messages.append({
+                    'message_id': message_id,
+                    'pre_plain_text': pre_plain_text,
                     'sender': sender,
                     'timestamp': timestamp,
                     'text': text,
@@ -185,11 +268,121 @@ class ContentExtractor:
                     'documents': documents
                 })
             
-            return messages
+            # Mesma normalização do caminho em lote: epoch e timestamp completo a partir do prefixo
+            return self.normalize_records(messages)
+        except Exception as e:
+            logger.error(f"Erro ao obter detalhes das mensagens: {str(e)}")
+            return []
+    
+    def extract_messages_bulk(self, message_elements=None, batch_size=500) -> List[dict]:
+        """
+        Extrai os detalhes das mensagens com uma única chamada JavaScript por lote.
+        
+        Produz os mesmos registros de get_message_details, mas sem uma chamada
+        ao WebDriver para cada campo de cada mensagem.
+        
+        Args:
+            message_elements: Elementos de mensagem a processar. Se None, processa
+                todas as mensagens renderizadas na conversa em uma única chamada.
+            batch_size: Quantidade de elementos enviados por chamada quando
+                message_elements é informado
+            
+        Returns:
+            Lista de dicionários contendo detalhes das mensagens (id, remetente, timestamp, texto, mídia)
+        """
+        try:
+            if message_elements is None:
+                raw_records = self.driver.execute_script(BULK_EXTRACT_SCRIPT, None) or []
+            else:
+                raw_records = []
+                for start in range(0, len(message_elements), batch_size):
+                    batch = message_elements[start:start + batch_size]
+                    raw_records.extend(self.driver.execute_script(BULK_EXTRACT_SCRIPT, batch) or [])
+            
+            return self.normalize_records([record for record in raw_records if record])
+        
         except Exception as e:
-            print(f"[ERROR] Erro ao obter detalhes das mensagens: {str(e)}")
+            logger.error(f"Erro ao extrair mensagens em lote: {str(e)}")
             return []
     
+    def normalize_record(self, record: dict) -> dict:
+        """
+        Ajusta um registro vindo do JavaScript ao formato do caminho por elemento.
+        
+        Args:
+            record: Registro retornado pelo script de extração
+            
+        Returns:
+            Registro com os mesmos tipos e valores padrão de get_message_details
+        """
+        return {
+            'message_id': record.get('message_id'),
+            'pre_plain_text': record.get('pre_plain_text'),
+            'sender': record.get('sender') or "Você",
+            'timestamp': record.get('timestamp') or datetime.datetime.now().strftime("%d/%m/%Y %H:%M"),
+            'text': record.get('text') or "",
+            'images': list(record.get('images') or []),
+            'documents': [tuple(doc) for doc in record.get('documents') or []]
+        }
+    
+    def normalize_records(self, records: List[dict]) -> List[dict]:
+        """
+        Normaliza um lote de registros e completa seus timestamps em uma única passagem.
+        
+        Além dos campos de normalize_record, cada registro recebe 'epoch' (segundos,
+        ou None) e, quando o prefixo da mensagem é reconhecido, o timestamp completo
+        no formato "AAAA-MM-DD-HH:MM".
+        
+        Args:
+            records: Registros retornados pelo script de extração
+            
+        Returns:
+            Lista de registros normalizados, na mesma ordem
+        """
+        return self.timestamp_normalizer.normalize_records([self.normalize_record(record) for record in records])
+    
+    def extract_message_id(self, message_element) -> Optional[str]:
+        """
+        Extrai o identificador estável (data-id) de uma mensagem.
+        
+        Args:
+            message_element: Elemento DOM da mensagem
+            
+        Returns:
+            Identificador da mensagem ou None se não encontrado
+        """
+        try:
+            holder = message_element.find_element(
+                By.XPATH, './ancestor-or-self::*[@data-id][1] | .//*[@data-id]'
+            )
+            return holder.get_attribute('data-id')
+        except NoSuchElementException:
+            return None
+        except Exception as e:
+            sampled_logger.warning("extrair_id", "Não foi possível extrair o id da mensagem: %s", e)
+            return None
+    
+    def extract_pre_plain_text(self, message_element) -> Optional[str]:
+        """
+        Extrai o prefixo "[hora, data] remetente:" (data-pre-plain-text) de uma mensagem.
+        
+        Args:
+            message_element: Elemento DOM da mensagem
+            
+        Returns:
+            Prefixo da mensagem ou None se não encontrado
+        """
+        try:
+            copyable = message_element.find_element(
+                By.XPATH, './/div[contains(@class, "copyable-text") and @data-pre-plain-text]'
+            )
+            return copyable.get_attribute('data-pre-plain-text')
+        except NoSuchElementException:
+            return None
+        except Exception as e:
+            sampled_logger.warning("extrair_prefixo", "Não foi possível extrair o prefixo da mensagem: %s", e)
+            return None
+    
     def extract_sender(self, message_element) -> str:
         """
         Extrai o nome do remetente de uma mensagem.
@@ -207,7 +400,7 @@ class ContentExtractor:
             # Provavelmente é uma mensagem enviada pelo próprio usuário
             return "Você"
         except Exception as e:
-            print(f"[WARN] Não foi possível extrair o remetente: {str(e)}")
+            sampled_logger.warning("extrair_remetente", "Não foi possível extrair o remetente: %s", e)
             return "Desconhecido"
     
     def extract_timestamp(self, message_element) -> str:
@@ -224,7 +417,7 @@ class ContentExtractor:
             timestamp_element = message_element.find_element(By.XPATH, './/div[@data-testid="msg-meta"]')
             return timestamp_element.text
         except Exception as e:
-            print(f"[WARN] Não foi possível extrair o timestamp: {str(e)}")
+            sampled_logger.warning("extrair_timestamp", "Não foi possível extrair o timestamp: %s", e)
             return datetime.datetime.now().strftime("%d/%m/%Y %H:%M")
     
     def extract_text(self, message_element) -> str:
@@ -247,7 +440,7 @@ class ContentExtractor:
             # Pode ser uma mensagem sem texto (apenas mídia)
             return ""
         except Exception as e:
-            print(f"[WARN] Não foi possível extrair o texto: {str(e)}")
+            sampled_logger.warning("extrair_texto", "Não foi possível extrair o texto: %s", e)
             return ""
     
     def extract_images(self, message_element) -> List[str]:
@@ -263,12 +456,12 @@ class ContentExtractor:
         try:
             # Procura por imagens na mensagem
             image_elements = message_element.find_elements(
-                By.XPATH, '//img[not(@tabindex="-1")]'
+                By.XPATH, './/img[not(@tabindex="-1")]'
             )
             return [img.get_attribute('src') for img in image_elements if img.get_attribute('src')]
         
         except Exception as e:
-            print(f"[WARN] Não foi possível extrair imagens: {str(e)}")
+            sampled_logger.warning("extrair_imagens", "Não foi possível extrair imagens: %s", e)
             return []
     
     def extract_documents(self, message_element) -> List[Tuple[str, str]]:
@@ -296,7 +489,7 @@ class ContentExtractor:
             
             return docs
         except Exception as e:
-            print(f"[WARN] Não foi possível extrair documentos: {str(e)}")
+            sampled_logger.warning("extrair_documentos", "Não foi possível extrair documentos: %s", e)
             return []
     
     def wait_for_messages_to_load(self, timeout=10) -> bool:
@@ -315,5 +508,5 @@ class ContentExtractor:
             )
             return True
         except TimeoutException:
-            print("[WARN] Timeout esperando mensagens carregarem")
+            logger.warning("Timeout esperando mensagens carregarem")
             return False
\ No newline at end of file
@@ -0,0 +1,114 @@
+# modules/dom_snapshot.py
+import datetime
+import gzip
+import html
+import os
+import shutil
+from typing import List, Optional
+
+from modules.output_writers import replace_directory
+from utils.logger import get_logger
+
+logger = get_logger("dom_snapshot")
+
+# Classe do elemento que envolve cada mensagem capturada no snapshot
+SNAPSHOT_ROW_CLASS = "wa-snapshot-row"
+
+
+class SnapshotWriter:
+    """
+    Grava o HTML bruto das mensagens coletadas em blocos comprimidos (gzip).
+
+    Cada bloco é um documento HTML independente com até rows_per_chunk
+    mensagens, na ordem da coleta (da mais recente para a mais antiga).
+    Os blocos de uma execução compartilham o mesmo identificador, o que
+    permite ao parser offline ordenar execuções de sincronização diferentes.
+    Com truncate=True, os blocos são gravados em um diretório de preparação que
+    só substitui os snapshots anteriores em commit().
+    """
+    def __init__(self, snapshot_dir, group_name, rows_per_chunk=500, compresslevel=6, truncate=False):
+        """
+        Inicializa o gravador de snapshots.
+
+        Args:
+            snapshot_dir (str): Diretório onde os blocos são gravados
+            group_name (str): Nome do grupo ou contato
+            rows_per_chunk (int): Quantidade de mensagens por bloco
+            compresslevel (int): Nível de compressão do gzip (1 a 9)
+            truncate (bool): Se True, substitui os snapshots de execuções anteriores no commit
+        """
+        self.target_dir = snapshot_dir
+        self.staging_dir = snapshot_dir + ".tmp" if truncate else None
+        if self.staging_dir and os.path.isdir(self.staging_dir):
+            shutil.rmtree(self.staging_dir)
+        os.makedirs(self.staging_dir or snapshot_dir, exist_ok=True)
+
+        self.snapshot_dir = self.staging_dir or snapshot_dir
+        self.group_name = group_name
+        self.rows_per_chunk = rows_per_chunk
+        self.compresslevel = compresslevel
+        self.run_id = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+        self.rows: List[str] = []
+        self.chunks = 0
+        self.seq = 0
+        self.bytes_written = 0
+
+    def add(self, message_id: Optional[str], row_html: str):
+        """
+        Adiciona o HTML de uma mensagem ao bloco atual.
+
+        Args:
+            message_id (str): Id (data-id) da mensagem, se conhecido
+            row_html (str): HTML externo (outerHTML) do elemento da mensagem
+        """
+        if not row_html:
+            return
+        self.rows.append(
+            f'<div class="{SNAPSHOT_ROW_CLASS}" data-seq="{self.seq}" '
+            f'data-message-id="{html.escape(message_id or "", quote=True)}">{row_html}</div>'
+        )
+        self.seq += 1
+        if len(self.rows) >= self.rows_per_chunk:
+            self.flush()
+
+    def flush(self):
+        """Grava o bloco atual em um arquivo .html.gz."""
+        if not self.rows:
+            return
+
+        document = (
+            f'<!DOCTYPE html><html><head><meta charset="utf-8"></head>'
+            f'<body data-group="{html.escape(self.group_name, quote=True)}" '
+            f'data-run="{self.run_id}" data-chunk="{self.chunks}">'
+            + "".join(self.rows)
+            + "</body></html>"
+        )
+        path = os.path.join(self.snapshot_dir, f"{self.run_id}-{self.chunks:06d}.html.gz")
+
+        # Grava em um arquivo temporário para nunca deixar um bloco incompleto
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=self.compresslevel) as f:
+            f.write(document)
+        os.replace(tmp_path, path)
+
+        self.bytes_written += os.path.getsize(path)
+        self.chunks += 1
+        self.rows = []
+
+    def commit(self):
+        """Grava o bloco pendente e, com truncate=True, substitui os snapshots anteriores."""
+        self.flush()
+        if self.staging_dir:
+            replace_directory(self.staging_dir, self.target_dir)
+            self.staging_dir = None
+            self.snapshot_dir = self.target_dir
+
+    def close(self):
+        """Grava o bloco pendente e mostra o resumo da captura; uma substituição não confirmada é descartada."""
+        self.flush()
+        if self.staging_dir:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            logger.debug(f"Snapshots descartados: a extração não foi concluída ({self.seq} mensagens)")
+            return
+        logger.debug(f"Snapshots: {self.seq} mensagens em {self.chunks} blocos "
+                     f"({self.bytes_written / 1024:.1f} KB) em {self.snapshot_dir}")
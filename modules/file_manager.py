@@ -1,14 +1,60 @@
 # modules/file_manager.py
+import base64
+import mimetypes
 import os
-import re
 import requests
-import time
+from collections import deque
+
+from core.wait_engine import WaitEngine
+from modules.output_writers import group_dir_name
+from utils.logger import SampledLogger, get_logger
+
+logger = get_logger("file_manager")
+
+# Cada arquivo baixado gera uma mensagem; apenas uma amostra é registrada
+sampled_logger = SampledLogger(logger)
+
+# Busca vários blobs dentro da página e os mantém em memória para a transferência em partes.
+# arguments[0]: lista de URLs blob:, último argumento: callback
+FETCH_BLOBS_SCRIPT = """
+const urls = arguments[0];
+const done = arguments[arguments.length - 1];
+window.__waBlobs = window.__waBlobs || {};
+Promise.all(urls.map(async (url) => {
+    try {
+        const response = await fetch(url);
+        const blob = await response.blob();
+        window.__waBlobs[url] = new Uint8Array(await blob.arrayBuffer());
+        return {url: url, ok: true, size: blob.size, type: blob.type};
+    } catch (e) {
+        return {url: url, ok: false, error: String(e)};
+    }
+})).then(done);
+"""
+
+# Converte trechos dos blobs em memória para base64.
+# arguments[0]: lista de [url, início, tamanho]
+READ_BLOB_CHUNKS_SCRIPT = """
+return arguments[0].map(([url, start, length]) => {
+    const bytes = window.__waBlobs[url].subarray(start, start + length);
+    let binary = '';
+    for (let i = 0; i < bytes.length; i += 0x8000) {
+        binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+    }
+    return btoa(binary);
+});
+"""
+
+# Libera os blobs já transferidos
+RELEASE_BLOBS_SCRIPT = """
+for (const url of arguments[0]) { delete (window.__waBlobs || {})[url]; }
+"""
 
 class FileManager:
     """
     Gerencia operações de arquivo e download de conteúdo.
     """
-    def __init__(self, driver, output_dir, main_window):
+    def __init__(self, driver, output_dir, main_window, wait_engine=None):
         """
         Inicializa o gerenciador de arquivos.
         
@@ -16,10 +62,13 @@ class FileManager:
             driver (webdriver): Instância do webdriver do Selenium
             output_dir (str): Diretório de saída para salvar os arquivos
             main_window (str): Handle da janela principal do navegador
+            wait_engine (WaitEngine): Mecanismo de espera compartilhado (opcional)
         """
         self.driver = driver
         self.output_dir = output_dir
         self.main_window = main_window
+        self.wait_engine = wait_engine or WaitEngine(driver)
+        self.session = requests.Session()
         
         # Garante que o diretório de saída exista
         os.makedirs(self.output_dir, exist_ok=True)
@@ -35,16 +84,16 @@ class FileManager:
             tuple: Diretórios criados (group_dir, images_dir, docs_dir, messages_file)
         """
         # Cria um diretório específico para o grupo
-        group_dir = os.path.join(self.output_dir, re.sub(r'[\\/*?:"<>|]', '', group_name))
+        group_dir = os.path.join(self.output_dir, group_dir_name(group_name))
         os.makedirs(group_dir, exist_ok=True)
-        print(f"[DEBUG] Diretório criado: {group_dir}")
+        logger.debug(f"Diretório criado: {group_dir}")
             
         # Cria subdiretórios para imagens e documentos
         images_dir = os.path.join(group_dir, "images")
         docs_dir = os.path.join(group_dir, "documents")
         os.makedirs(images_dir, exist_ok=True)
         os.makedirs(docs_dir, exist_ok=True)
-        print(f"[DEBUG] Subdiretórios criados: {images_dir}, {docs_dir}")
+        logger.debug(f"Subdiretórios criados: {images_dir}, {docs_dir}")
             
         # Arquivo para salvar as mensagens de texto
         messages_file = os.path.join(group_dir, "messages.txt")
@@ -63,6 +112,20 @@ class FileManager:
             for message in messages:
                 f.write(message + "\n")
     
+    def append_messages_to_file(self, messages, file_path):
+        """
+        Anexa mensagens ao final de um arquivo de texto, garantindo a gravação em disco.
+        
+        Args:
+            messages (list): Lista de strings de mensagens
+            file_path (str): Caminho do arquivo
+        """
+        with open(file_path, 'a', encoding='utf-8') as f:
+            for message in messages:
+                f.write(message + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
     def download_file(self, url, local_path):
         """
         Baixa um arquivo da URL especificada para o caminho local.
@@ -72,33 +135,81 @@ class FileManager:
             local_path (str): Caminho local para salvar o arquivo
         """
         try:
-            # Para URLs blob:, precisamos usar o webdriver para baixá-las
+            # Para URLs blob:, os bytes são lidos dentro da própria página
             if url.startswith('blob:'):
-                # Abre uma nova aba
-                self.driver.execute_script("window.open(arguments[0]);", url)
-                
-                # Muda para a nova aba
-                self.driver.switch_to.window(self.driver.window_handles[-1])
-                
-                # Aguarda o carregamento da imagem
-                time.sleep(2)
-                
-                # Salva a página (imagem)
-                self.driver.save_screenshot(local_path)
-                
-                # Fecha a aba e volta para a aba principal
-                self.driver.close()
-                self.driver.switch_to.window(self.main_window)
+                self.download_blobs([(url, local_path)])
             else:
-                # Para URLs HTTP normais, usa requests
-                response = requests.get(url, stream=True)
+                # Para URLs HTTP normais, usa a sessão compartilhada do requests
+                response = self.session.get(url, stream=True, timeout=30)
+                response.raise_for_status()
                 with open(local_path, 'wb') as file:
-                    for chunk in response.iter_content(chunk_size=1024):
+                    for chunk in response.iter_content(chunk_size=256 * 1024):
                         if chunk:
                             file.write(chunk)
-                            
-            print(f"[DEBUG] Arquivo baixado com sucesso: {local_path}")
+                sampled_logger.debug("arquivo_baixado", "Arquivo baixado com sucesso: %s", local_path)
                             
         except Exception as e:
-            print(f"[ERROR] Erro ao baixar arquivo {url}: {str(e)}")
-            raise
\ No newline at end of file
+            logger.error(f"Erro ao baixar arquivo {url}: {str(e)}")
+            raise
+    
+    def download_blobs(self, items, chunk_size=2 * 1024 * 1024):
+        """
+        Baixa vários arquivos blob: com os bytes originais, sem sair da janela principal.
+        
+        Os blobs são buscados na página com fetch() em uma única chamada e
+        transferidos para o Python em partes codificadas em base64, agrupando
+        partes de vários blobs na mesma chamada até o limite de chunk_size.
+        
+        Args:
+            items (list): Lista de tuplas (url, caminho_local)
+            chunk_size (int): Quantidade máxima de bytes transferida por chamada
+            
+        Returns:
+            dict: {url: {'path', 'mime'}} dos arquivos salvos. Se o caminho não tiver
+                extensão, ela é definida a partir do tipo MIME do blob.
+        """
+        if not items:
+            return {}
+        
+        paths = dict(items)
+        self.wait_engine.set_script_timeout(120)
+        fetched = self.driver.execute_async_script(FETCH_BLOBS_SCRIPT, list(paths))
+        
+        saved = {}
+        pending = deque()
+        for info in fetched:
+            url = info['url']
+            if not info.get('ok'):
+                logger.error(f"Erro ao buscar blob {url}: {info.get('error')}")
+                continue
+            
+            # Define a extensão pelo tipo MIME quando o caminho não possui uma
+            local_path = paths[url]
+            if not os.path.splitext(local_path)[1] and info.get('type'):
+                local_path += mimetypes.guess_extension(info['type'].split(';')[0]) or ''
+            saved[url] = {'path': local_path, 'mime': info.get('type') or None}
+            open(local_path, 'wb').close()
+            
+            # Divide o blob em partes que serão lidas em lote
+            for start in range(0, info['size'], chunk_size):
+                pending.append([url, start, min(chunk_size, info['size'] - start)])
+        
+        try:
+            # Agrupa partes de vários blobs em cada chamada ao WebDriver
+            while pending:
+                request, budget = [], chunk_size
+                while pending and (not request or pending[0][2] <= budget):
+                    part = pending.popleft()
+                    request.append(part)
+                    budget -= part[2]
+                
+                chunks = self.driver.execute_script(READ_BLOB_CHUNKS_SCRIPT, request)
+                for (url, _, _), chunk in zip(request, chunks):
+                    with open(saved[url]['path'], 'ab') as file:
+                        file.write(base64.b64decode(chunk))
+        finally:
+            self.driver.execute_script(RELEASE_BLOBS_SCRIPT, [info['url'] for info in fetched])
+        
+        for blob in saved.values():
+            sampled_logger.debug("arquivo_baixado", "Arquivo baixado com sucesso: %s", blob['path'])
+        return saved
\ No newline at end of file
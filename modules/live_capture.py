@@ -0,0 +1,255 @@
+# modules/live_capture.py
+import time
+from typing import Dict, Iterator, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+from core.wait_engine import WaitEngine
+from modules.content_extractor import MESSAGE_RECORD_JS
+from utils.logger import get_logger
+
+logger = get_logger("live_capture")
+
+# Instala os observadores da captura ao vivo.
+# arguments[0]: True para observar também os contadores de não lidas da lista de conversas
+# arguments[1]: quantidade de ids recentes mantidos para deduplicação
+# arguments[2]: tempo (ms) para agrupar mensagens que chegam juntas antes de acordar o Python
+INSTALL_LIVE_SCRIPT = """
+const extract = """ + MESSAGE_RECORD_JS + """;
+const watchUnread = arguments[0], maxSeen = arguments[1], settle = arguments[2];
+const selector = 'div.message-in, div.message-out';
+
+const previous = window.__waLive;
+if (previous) {
+    previous.observers.forEach((observer) => observer.disconnect());
+    if (previous.waiter) { previous.waiter(); }
+}
+
+const state = {queue: [], unread: {}, unreadChanged: false, seen: new Set(), order: [],
+               observers: [], waiter: null, pending: null};
+window.__waLive = state;
+
+const remember = (id) => {
+    state.seen.add(id);
+    state.order.push(id);
+    if (state.order.length > maxSeen) { state.seen.delete(state.order.shift()); }
+};
+const holderId = (node) => {
+    const holder = node.closest('[data-id]') || node.querySelector('[data-id]');
+    return holder ? holder.getAttribute('data-id') : null;
+};
+
+// Acorda o long-poll do Python, agrupando as mutações dos próximos "settle" ms
+const wake = () => {
+    if (state.pending === null) {
+        state.pending = setTimeout(() => {
+            state.pending = null;
+            if (state.waiter) { state.waiter(); }
+        }, settle);
+    }
+};
+
+// Mensagens já renderizadas não são novas
+document.querySelectorAll(selector).forEach((node) => {
+    const id = holderId(node);
+    if (id) { remember(id); }
+});
+
+const main = document.querySelector('#main');
+if (main) {
+    const observer = new MutationObserver((mutations) => {
+        let added = false;
+        for (const mutation of mutations) {
+            for (const node of mutation.addedNodes) {
+                if (node.nodeType !== 1) { continue; }
+                const found = node.matches(selector) ? [node] : node.querySelectorAll(selector);
+                for (const element of found) {
+                    const id = holderId(element);
+                    if (!id || state.seen.has(id)) { continue; }
+                    remember(id);
+                    try {
+                        // Extrai na hora: a virtualização pode remover o nó antes do próximo drain
+                        state.queue.push(extract(element));
+                        added = true;
+                    } catch (e) {
+                        // Nó incompleto ou removido durante a leitura
+                    }
+                }
+            }
+        }
+        if (added) { wake(); }
+    });
+    observer.observe(main, {childList: true, subtree: true});
+    state.observers.push(observer);
+}
+
+const side = watchUnread ? document.querySelector('#pane-side') : null;
+if (side) {
+    // Lê os contadores de não lidas das conversas visíveis na lista
+    let scheduled = false;
+    const scan = () => {
+        scheduled = false;
+        const unread = {};
+        for (const badge of side.querySelectorAll('[aria-label*="não lida"], [aria-label*="unread"]')) {
+            const row = badge.closest('[role="listitem"], [role="row"]');
+            const title = row && row.querySelector('span[title]');
+            const count = parseInt(badge.textContent, 10);
+            if (title && count > 0) { unread[title.getAttribute('title')] = count; }
+        }
+        const changed = Object.keys(unread).some((name) => unread[name] !== state.unread[name]);
+        state.unread = unread;
+        if (changed) {
+            state.unreadChanged = true;
+            wake();
+        }
+    };
+    const observer = new MutationObserver(() => {
+        if (!scheduled) {
+            scheduled = true;
+            setTimeout(scan, 100);
+        }
+    });
+    observer.observe(side, {childList: true, subtree: true, characterData: true,
+                            attributes: true, attributeFilter: ['aria-label']});
+    state.observers.push(observer);
+    scan();
+}
+return {main: Boolean(main), side: Boolean(side), seen: state.seen.size};
+"""
+
+# Long-poll: retorna imediatamente se houver mensagens na fila; caso contrário, aguarda
+# a próxima mensagem (ou mudança nas não lidas) até o timeout, sem consumir CPU.
+# arguments[0]: tamanho máximo do lote, arguments[1]: timeout (ms), último argumento: callback
+DRAIN_LIVE_SCRIPT = """
+const maxBatch = arguments[0], timeout = arguments[1];
+const done = arguments[arguments.length - 1];
+const state = window.__waLive;
+if (!state) { done(null); return; }
+
+let timer = null;
+const flush = () => {
+    clearTimeout(timer);
+    state.waiter = null;
+    const unread = state.unreadChanged ? state.unread : null;
+    state.unreadChanged = false;
+    done({records: state.queue.splice(0, maxBatch), unread: unread, pending: state.queue.length});
+};
+if (state.queue.length || state.unreadChanged) {
+    flush();
+    return;
+}
+state.waiter = flush;
+timer = setTimeout(flush, timeout);
+"""
+
+# Remove os observadores da captura ao vivo
+UNINSTALL_LIVE_SCRIPT = """
+const state = window.__waLive;
+if (state) {
+    state.observers.forEach((observer) => observer.disconnect());
+    clearTimeout(state.pending);
+    if (state.waiter) { state.waiter(); }
+    delete window.__waLive;
+}
+"""
+
+
+class LiveCapture:
+    """
+    Captura as mensagens novas da conversa aberta assim que são renderizadas.
+
+    Um MutationObserver na página extrai cada mensagem adicionada para uma
+    fila; o Python esvazia a fila em lotes com um long-poll assíncrono, que
+    retorna assim que há mensagens e fica parado (sem polling) enquanto a
+    conversa está quieta. Opcionalmente, observa os contadores de não lidas
+    da lista de conversas.
+    """
+    def __init__(self, driver, content_extractor, watch_unread=False, max_seen_ids=5000, settle=0.05,
+                 wait_engine=None):
+        """
+        Inicializa a captura ao vivo.
+
+        Args:
+            driver: Instância do WebDriver Selenium
+            content_extractor (ContentExtractor): Extrator usado para normalizar os registros
+            watch_unread (bool): Se True, informa as mudanças nos contadores de não lidas
+            max_seen_ids (int): Quantidade de ids recentes mantidos na página para deduplicação
+            settle (float): Tempo em segundos para agrupar mensagens que chegam juntas
+            wait_engine (WaitEngine): Mecanismo de espera compartilhado (opcional)
+        """
+        self.driver = driver
+        self.content_extractor = content_extractor
+        self.watch_unread = watch_unread
+        self.max_seen_ids = max_seen_ids
+        self.settle = settle
+        self.wait_engine = wait_engine or WaitEngine(driver)
+        self.total_records = 0
+
+    def install(self) -> bool:
+        """
+        Instala (ou reinstala) os observadores na conversa aberta.
+
+        As mensagens já renderizadas são marcadas como vistas; apenas as que
+        chegarem depois são capturadas.
+
+        Returns:
+            bool: True se o painel da conversa foi encontrado
+        """
+        result = self.driver.execute_script(
+            INSTALL_LIVE_SCRIPT, self.watch_unread, self.max_seen_ids, int(self.settle * 1000)
+        ) or {}
+        if not result.get('main'):
+            logger.warning("Painel da conversa não encontrado; apenas a lista de conversas será observada")
+        return bool(result.get('main'))
+
+    def uninstall(self):
+        """Remove os observadores da página."""
+        try:
+            self.driver.execute_script(UNINSTALL_LIVE_SCRIPT)
+        except WebDriverException as e:
+            logger.warning(f"Não foi possível remover a captura ao vivo: {str(e)}")
+
+    def drain(self, timeout=25.0, max_batch=500) -> Dict:
+        """
+        Aguarda e retira da fila as mensagens capturadas.
+
+        Args:
+            timeout (float): Tempo máximo de espera por novidades em segundos
+            max_batch (int): Quantidade máxima de registros retornados
+
+        Returns:
+            dict: {'records': registros normalizados, 'unread': {conversa: não lidas} se
+                os contadores mudaram (ou None), 'reinstalled': True se a página foi
+                recarregada e os observadores reinstalados}
+        """
+        self.wait_engine.set_script_timeout(timeout + 5)
+        result = self.driver.execute_async_script(DRAIN_LIVE_SCRIPT, max_batch, int(timeout * 1000))
+
+        # A página foi recarregada (ex.: reconexão do WhatsApp Web) e perdeu os observadores
+        if result is None:
+            logger.warning("Observadores da captura ao vivo perdidos, reinstalando...")
+            self.install()
+            return {'records': [], 'unread': None, 'reinstalled': True}
+
+        records = self.content_extractor.normalize_records([record for record in result['records'] if record])
+        self.total_records += len(records)
+        return {'records': records, 'unread': result.get('unread'), 'reinstalled': False}
+
+    def watch(self, duration: Optional[float] = None, poll_timeout=25.0, max_batch=500) -> Iterator[Dict]:
+        """
+        Entrega as novidades da conversa aberta conforme chegam.
+
+        Args:
+            duration (float): Tempo total de observação em segundos (None para ilimitado)
+            poll_timeout (float): Tempo máximo de cada long-poll em segundos
+            max_batch (int): Quantidade máxima de registros por lote
+
+        Yields:
+            dict: Resultado de drain() que contenha mensagens ou mudanças nas não lidas
+        """
+        deadline = time.monotonic() + duration if duration else None
+        while deadline is None or time.monotonic() < deadline:
+            timeout = poll_timeout if deadline is None else max(0.1, min(poll_timeout, deadline - time.monotonic()))
+            result = self.drain(timeout=timeout, max_batch=max_batch)
+            if result['records'] or result['unread']:
+                yield result
@@ -0,0 +1,191 @@
+# modules/media_downloader.py
+import os
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.logger import SampledLogger, get_logger
+
+logger = get_logger("media_downloader")
+
+# Falhas de download e de callback acontecem por arquivo; apenas uma amostra é registrada
+sampled_logger = SampledLogger(logger)
+
+# Status HTTP que justificam uma nova tentativa
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Sinal usado para encerrar as threads de download
+_STOP = object()
+
+
+class MediaDownloader:
+    """
+    Baixa mídia HTTP em paralelo enquanto a extração continua.
+
+    As tarefas entram em uma fila limitada consumida por um conjunto de
+    threads que compartilham uma única requests.Session (pool de conexões
+    reaproveitadas). Cada download é gravado em um arquivo ".part" e movido
+    para o destino somente ao final, com novas tentativas e espera exponencial.
+    """
+    def __init__(self, max_workers=8, queue_size=1000, chunk_size=256 * 1024,
+                 retries=3, backoff=0.5, timeout=30):
+        """
+        Inicializa o downloader e suas threads.
+
+        Args:
+            max_workers (int): Quantidade de threads de download
+            queue_size (int): Tamanho máximo da fila de tarefas pendentes
+            chunk_size (int): Tamanho do buffer de leitura do streaming em bytes
+            retries (int): Quantidade de novas tentativas após uma falha
+            backoff (float): Espera base entre tentativas em segundos (dobra a cada falha)
+            timeout (float): Timeout de conexão e leitura em segundos
+        """
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        # Sessão compartilhada com um pool do tamanho do número de threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.tasks = queue.Queue(maxsize=queue_size)
+        self.results: List[Dict] = []
+        self.results_lock = threading.Lock()
+        self.started_at = time.perf_counter()
+
+        self.workers = [
+            threading.Thread(target=self._worker, name=f"media-downloader-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, url, local_path, callback: Optional[Callable[[Dict], None]] = None, **metadata):
+        """
+        Agenda o download de um arquivo.
+
+        Retorna imediatamente, exceto quando a fila está cheia, o que limita
+        a memória usada por tarefas pendentes.
+
+        Args:
+            url (str): URL HTTP(S) do arquivo
+            local_path (str): Caminho local de destino
+            callback (callable): Função chamada com o resultado ao fim do download (opcional)
+            **metadata: Informações extras copiadas para o resultado (ex.: kind="images")
+        """
+        self.tasks.put({'url': url, 'path': local_path, 'callback': callback, 'metadata': metadata})
+
+    def _worker(self):
+        """Consome a fila de tarefas até receber o sinal de parada."""
+        while True:
+            task = self.tasks.get()
+            try:
+                if task is _STOP:
+                    return
+                result = self._download(task['url'], task['path'])
+                result.update(task['metadata'])
+
+                with self.results_lock:
+                    self.results.append(result)
+
+                if task['callback']:
+                    try:
+                        task['callback'](result)
+                    except Exception as e:
+                        sampled_logger.error("callback_download", "Erro no callback do download %s: %s", task['url'], e)
+            finally:
+                self.tasks.task_done()
+
+    def _download(self, url, local_path) -> Dict:
+        """
+        Baixa um arquivo com novas tentativas e espera exponencial.
+
+        Args:
+            url (str): URL do arquivo
+            local_path (str): Caminho local de destino
+
+        Returns:
+            dict: Resultado com url, path, status, bytes, content_type, seconds, attempts e error
+        """
+        started = time.perf_counter()
+        part_path = local_path + ".part"
+        error = None
+
+        for attempt in range(1, self.retries + 2):
+            try:
+                with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                    if response.status_code in RETRY_STATUS:
+                        raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                    response.raise_for_status()
+
+                    content_type = response.headers.get('Content-Type')
+                    size = 0
+                    with open(part_path, 'wb') as file:
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            if chunk:
+                                file.write(chunk)
+                                size += len(chunk)
+
+                os.replace(part_path, local_path)
+                return {'url': url, 'path': local_path, 'status': 'ok', 'bytes': size, 'content_type': content_type,
+                        'seconds': time.perf_counter() - started, 'attempts': attempt, 'error': None}
+
+            except requests.RequestException as e:
+                error = str(e)
+                status = e.response.status_code if e.response is not None else None
+
+                # Erros do cliente (exceto 429) não melhoram com novas tentativas
+                if status is not None and status not in RETRY_STATUS:
+                    break
+                if attempt <= self.retries:
+                    time.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.1))
+
+            except OSError as e:
+                error = str(e)
+                break
+
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return {'url': url, 'path': local_path, 'status': 'failed', 'bytes': 0, 'content_type': None,
+                'seconds': time.perf_counter() - started, 'attempts': attempt, 'error': error}
+
+    def close(self) -> Dict:
+        """
+        Aguarda os downloads pendentes, encerra as threads e gera o relatório.
+
+        Returns:
+            dict: {'files': resultados por arquivo, 'ok', 'failed', 'bytes', 'seconds', 'throughput_mb_s'}
+        """
+        self.tasks.join()
+        for _ in self.workers:
+            self.tasks.put(_STOP)
+        for worker in self.workers:
+            worker.join()
+        self.session.close()
+
+        elapsed = time.perf_counter() - self.started_at
+        total_bytes = sum(result['bytes'] for result in self.results)
+        report = {
+            'files': list(self.results),
+            'ok': sum(1 for result in self.results if result['status'] == 'ok'),
+            'failed': sum(1 for result in self.results if result['status'] == 'failed'),
+            'bytes': total_bytes,
+            'seconds': elapsed,
+            'throughput_mb_s': total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+        }
+
+        for result in self.results:
+            if result['status'] == 'failed':
+                sampled_logger.error("falha_download", "Falha ao baixar %s após %d tentativas: %s",
+                                     result['url'], result['attempts'], result['error'])
+        logger.debug(f"Downloads: {report['ok']} ok, {report['failed']} falhas, "
+                     f"{total_bytes / (1024 * 1024):.1f} MB em {elapsed:.1f}s ({report['throughput_mb_s']:.2f} MB/s)")
+        return report
@@ -0,0 +1,200 @@
+# modules/media_store.py
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger("media_store")
+
+
+class MediaStore:
+    """
+    Armazena a mídia de todos os grupos endereçada pelo SHA-256 do conteúdo.
+
+    Um arquivo encaminhado para vários grupos é gravado uma única vez em
+    OUTPUT_DIR/media/objects/<2 primeiros caracteres>/<sha256>. Um índice de
+    dicas (URL e nome + tamanho) permite reconhecer arquivos já armazenados
+    antes mesmo de baixá-los.
+    """
+    def __init__(self, output_dir, dir_name="media"):
+        """
+        Inicializa o armazenamento de mídia.
+
+        Args:
+            output_dir (str): Diretório de saída do scraper
+            dir_name (str): Nome do diretório do armazenamento dentro de output_dir
+        """
+        self.root = os.path.join(output_dir, dir_name)
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.staging_dir = os.path.join(self.root, "staging")
+        self.index_path = os.path.join(self.root, "index.json")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.index = self._load_index()
+
+    def _load_index(self) -> Dict:
+        """Carrega o índice de dicas do disco."""
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                index.setdefault('urls', {})
+                index.setdefault('hints', {})
+                return index
+            except (OSError, ValueError) as e:
+                logger.warning(f"Não foi possível ler o índice de mídia: {str(e)}")
+        return {'urls': {}, 'hints': {}}
+
+    def save_index(self):
+        """Grava o índice de dicas de forma atômica."""
+        with self.lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".index-", suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _hint_key(name, size) -> Optional[str]:
+        """Monta a chave de dica por nome e tamanho, quando ambos são conhecidos."""
+        if name and size:
+            return f"{name}|{size}"
+        return None
+
+    def object_path(self, sha256) -> str:
+        """Retorna o caminho do objeto correspondente a um hash."""
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def has(self, sha256) -> bool:
+        """Informa se o objeto já está armazenado."""
+        return bool(sha256) and os.path.exists(self.object_path(sha256))
+
+    def lookup(self, url=None, name=None, size=None) -> Optional[str]:
+        """
+        Procura um objeto já armazenado a partir das dicas disponíveis, sem baixar nada.
+
+        Args:
+            url (str): URL de origem do arquivo
+            name (str): Nome original do arquivo
+            size (int): Tamanho do arquivo em bytes
+
+        Returns:
+            str: SHA-256 do objeto armazenado, ou None se nenhuma dica corresponder
+        """
+        with self.lock:
+            sha256 = self.index['urls'].get(url) if url else None
+            hint = self._hint_key(name, size)
+            if not sha256 and hint:
+                sha256 = self.index['hints'].get(hint)
+        return sha256 if self.has(sha256) else None
+
+    def staging_path(self) -> str:
+        """Cria um caminho temporário para um download que ainda será ingerido."""
+        fd, path = tempfile.mkstemp(dir=self.staging_dir, suffix=".download")
+        os.close(fd)
+        return path
+
+    def ingest_file(self, path, url=None, name=None) -> Dict:
+        """
+        Move um arquivo baixado para o armazenamento, descartando-o se já existir.
+
+        Args:
+            path (str): Caminho do arquivo baixado (é removido ou movido)
+            url (str): URL de origem, registrada como dica para próximas execuções
+            name (str): Nome original, registrado como dica junto com o tamanho
+
+        Returns:
+            dict: {'sha256', 'size', 'path', 'stored'} onde stored indica se o objeto era novo
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        size = os.path.getsize(path)
+        target = self.object_path(sha256)
+
+        with self.lock:
+            stored = not os.path.exists(target)
+            if stored:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(path, target)
+            else:
+                os.remove(path)
+
+            if url and not url.startswith('blob:'):
+                self.index['urls'][url] = sha256
+            hint = self._hint_key(name, size)
+            if hint:
+                self.index['hints'][hint] = sha256
+
+        return {'sha256': sha256, 'size': size, 'path': target, 'stored': stored}
+
+    def link(self, sha256, local_path) -> bool:
+        """
+        Cria um hard link do objeto no diretório do grupo, sem duplicar os bytes.
+
+        Args:
+            sha256 (str): Hash do objeto armazenado
+            local_path (str): Caminho do arquivo dentro do diretório do grupo
+
+        Returns:
+            bool: True se o link foi criado (ou já existia)
+        """
+        if os.path.exists(local_path):
+            return True
+        try:
+            os.link(self.object_path(sha256), local_path)
+            return True
+        except OSError:
+            # Sistemas de arquivos sem hard link: o manifesto continua apontando para o objeto
+            return False
+
+
+class GroupManifest:
+    """
+    Manifesto de mídia de um grupo, em JSON Lines, apontando para o MediaStore.
+    """
+    def __init__(self, group_dir, file_name="manifest.jsonl"):
+        """
+        Inicializa o manifesto.
+
+        Args:
+            group_dir (str): Diretório do grupo
+            file_name (str): Nome do arquivo do manifesto
+        """
+        self.path = os.path.join(group_dir, file_name)
+        self.lock = threading.Lock()
+
+    def add(self, sha256, kind, name=None, size=None, url=None, message_id=None, mime=None):
+        """
+        Registra um arquivo de mídia do grupo.
+
+        Args:
+            sha256 (str): Hash do objeto no MediaStore
+            kind (str): Tipo da mídia ("images" ou "documents")
+            name (str): Nome do arquivo no grupo
+            size (int): Tamanho em bytes
+            url (str): URL de origem
+            message_id (str): Id da mensagem que contém a mídia
+            mime (str): Tipo MIME, quando conhecido
+        """
+        entry = {
+            'sha256': sha256,
+            'kind': kind,
+            'name': name,
+            'size': size,
+            'mime': mime,
+            'url': url,
+            'message_id': message_id,
+            'added_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
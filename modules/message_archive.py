@@ -0,0 +1,424 @@
+# modules/message_archive.py
+import argparse
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import zlib
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from utils.logger import get_logger
+from utils.timestamp_normalizer import to_epoch
+
+logger = get_logger("message_archive")
+
+# Compressão: zstandard (mais rápida e compacta, em requirements.txt); sem ela, os segmentos usam zlib
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Arquivos do arquivo de mensagens de um grupo (tmp/whatsapp/<grupo>/archive/)
+SEGMENT_FILE = "segments.dat"
+INDEX_FILE = "segments.idx"
+
+# Codecs de compressão dos segmentos (o codec de cada segmento fica no índice)
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+
+# Cabeçalho do índice, seguido de um registro de tamanho fixo por segmento
+INDEX_MAGIC = b"WAARCH01"
+
+# Filtro de Bloom dos ids de mensagem de cada segmento: os ids do WhatsApp não têm ordem,
+# então a faixa de ids do segmento é a faixa de sequência mais este filtro
+BLOOM_BYTES = 512
+BLOOM_HASHES = 3
+
+# Registro do índice: posição e tamanho comprimido no arquivo de segmentos, quantidade de mensagens,
+# sequência da primeira mensagem, menor e maior epoch, codec e filtro de ids
+INDEX_RECORD = struct.Struct(f"<QIIQqqB3x{BLOOM_BYTES}s")
+BLOOM_OFFSET = INDEX_RECORD.size - BLOOM_BYTES
+
+# Faixa de tempo de um segmento sem nenhum timestamp reconhecido (não se sobrepõe a nenhuma consulta)
+EMPTY_MIN_EPOCH = 2 ** 63 - 1
+EMPTY_MAX_EPOCH = -(2 ** 63)
+
+# Formato do timestamp gravado por build_message
+TIMESTAMP_FORMAT = "%Y-%m-%d-%H:%M"
+
+
+class SegmentEntry(NamedTuple):
+    """Registro de um segmento no índice."""
+    number: int         # Posição do segmento no índice
+    offset: int         # Início do segmento no arquivo de segmentos
+    length: int         # Tamanho comprimido em bytes
+    count: int          # Quantidade de mensagens
+    first_seq: int      # Sequência da primeira mensagem no arquivo do grupo
+    min_epoch: int      # Menor epoch das mensagens (EMPTY_MIN_EPOCH se nenhuma tiver timestamp)
+    max_epoch: int      # Maior epoch das mensagens (EMPTY_MAX_EPOCH se nenhuma tiver timestamp)
+    codec: int          # Codec de compressão (CODEC_*)
+
+    @property
+    def last_seq(self) -> int:
+        """Sequência da última mensagem do segmento."""
+        return self.first_seq + self.count - 1
+
+    def overlaps(self, since: Optional[int], until: Optional[int]) -> bool:
+        """Indica se a faixa de tempo do segmento tem interseção com [since, until]."""
+        if self.min_epoch > self.max_epoch:
+            return since is None and until is None
+        return (since is None or self.max_epoch >= since) and (until is None or self.min_epoch <= until)
+
+
+def available_codec(codec=None) -> int:
+    """
+    Escolhe o codec de compressão dos segmentos.
+
+    Args:
+        codec (str): "zstd", "zlib", "none" ou None para zstd, se disponível, ou zlib
+
+    Returns:
+        int: Codec escolhido (CODEC_*)
+    """
+    if codec is None:
+        if zstandard is not None:
+            return CODEC_ZSTD
+        logger.warning("Pacote zstandard não instalado; os segmentos serão comprimidos com zlib")
+        return CODEC_ZLIB
+    if codec not in CODECS:
+        raise ValueError(f"Codec desconhecido: {codec}")
+    if CODECS[codec] == CODEC_ZSTD and zstandard is None:
+        raise ImportError("A compressão zstd requer o pacote zstandard (pip install zstandard)")
+    return CODECS[codec]
+
+
+def compress(data: bytes, codec: int, level: Optional[int] = None) -> bytes:
+    """Comprime o conteúdo de um segmento."""
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=level or 9).compress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, level or 6)
+    return data
+
+
+def decompress(data: bytes, codec: int) -> bytes:
+    """Descomprime o conteúdo de um segmento."""
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ImportError("Segmento comprimido com zstd: instale o pacote zstandard para lê-lo")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    return data
+
+
+def message_epoch(message: Dict) -> Optional[int]:
+    """
+    Retorna o epoch de uma mensagem gravada.
+
+    Args:
+        message (dict): Mensagem no esquema de output_writers
+
+    Returns:
+        int: Epoch em segundos, ou None se o timestamp não for reconhecido
+    """
+    try:
+        return int(datetime.datetime.strptime(message.get('timestamp') or "", TIMESTAMP_FORMAT).timestamp())
+    except ValueError:
+        return None
+
+
+def _bloom_positions(message_id: str) -> List[int]:
+    """Bits do filtro de ids ocupados por um id de mensagem."""
+    digest = hashlib.blake2b(message_id.encode('utf-8'), digest_size=4 * BLOOM_HASHES).digest()
+    return [int.from_bytes(digest[4 * k:4 * k + 4], 'little') % (BLOOM_BYTES * 8) for k in range(BLOOM_HASHES)]
+
+
+def _read_entries(index, count) -> List[SegmentEntry]:
+    """Lê os registros de um índice (bytes ou mmap)."""
+    return [
+        SegmentEntry(number, *INDEX_RECORD.unpack_from(index, len(INDEX_MAGIC) + number * INDEX_RECORD.size)[:7])
+        for number in range(count)
+    ]
+
+
+class SegmentArchive:
+    """
+    Arquivo de mensagens de um grupo em segmentos comprimidos, somente para anexar.
+
+    Cada lote gravado vira um segmento: as mensagens em JSON Lines, comprimidas
+    com zstd (ou zlib) e acrescentadas ao fim de segments.dat. Depois que o
+    segmento está no disco, um registro de tamanho fixo com a faixa de tempo,
+    a faixa de sequência e um filtro dos ids é acrescentado a segments.idx.
+    Os dados antigos nunca são regravados; um segmento incompleto deixado por
+    uma falha (sem registro no índice) é descartado ao reabrir o arquivo.
+    """
+    def __init__(self, archive_dir, codec=None, level=None, truncate=False):
+        """
+        Abre (ou cria) o arquivo de segmentos para anexar.
+
+        Args:
+            archive_dir (str): Diretório do arquivo do grupo
+            codec (str): "zstd", "zlib", "none" ou None para o melhor disponível
+            level (int): Nível de compressão (padrão do codec se None)
+            truncate (bool): Se True, descarta os segmentos anteriores
+        """
+        if truncate and os.path.isdir(archive_dir):
+            shutil.rmtree(archive_dir)
+        os.makedirs(archive_dir, exist_ok=True)
+
+        self.archive_dir = archive_dir
+        self.codec = available_codec(codec)
+        self.level = level
+        self.bytes_written = 0
+        segment_path = os.path.join(archive_dir, SEGMENT_FILE)
+        index_path = os.path.join(archive_dir, INDEX_FILE)
+
+        if not os.path.exists(index_path):
+            if os.path.exists(segment_path) and os.path.getsize(segment_path):
+                raise ValueError(f"Arquivo de segmentos sem índice: {segment_path}")
+            with open(index_path, 'wb') as f:
+                f.write(INDEX_MAGIC)
+
+        self.index_file = open(index_path, 'r+b')
+        self.segment_file = open(segment_path, 'a+b')
+        self._recover()
+
+    def _recover(self):
+        """Descarta o registro e o segmento incompletos de uma gravação interrompida."""
+        index = self.index_file.read()
+        if index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"Índice inválido: {self.index_file.name}")
+
+        self.segments = (len(index) - len(INDEX_MAGIC)) // INDEX_RECORD.size
+        entries = _read_entries(index, self.segments)
+        last = entries[-1] if entries else None
+        self.next_seq = last.first_seq + last.count if last else 0
+        end = last.offset + last.length if last else 0
+
+        size = os.path.getsize(self.segment_file.name)
+        if size < end:
+            raise ValueError(f"Arquivo de segmentos menor que o índice: {self.segment_file.name}")
+
+        self.index_file.truncate(len(INDEX_MAGIC) + self.segments * INDEX_RECORD.size)
+        self.index_file.seek(0, os.SEEK_END)
+        self.segment_file.truncate(end)
+        self.segment_file.seek(0, os.SEEK_END)
+
+    def append(self, messages: List[Dict], fsync=True) -> Optional[SegmentEntry]:
+        """
+        Grava um lote de mensagens como um novo segmento.
+
+        Args:
+            messages (list): Mensagens no esquema de output_writers
+            fsync (bool): Se True, sincroniza o segmento e o índice com o disco
+
+        Returns:
+            SegmentEntry: Registro do segmento gravado, ou None se o lote estiver vazio
+        """
+        if not messages:
+            return None
+
+        epochs = [epoch for epoch in map(message_epoch, messages) if epoch is not None]
+        bloom = bytearray(BLOOM_BYTES)
+        for message in messages:
+            if message.get('message_id'):
+                for position in _bloom_positions(message['message_id']):
+                    bloom[position >> 3] |= 1 << (position & 7)
+
+        payload = compress(
+            "".join(json.dumps(message, ensure_ascii=False) + "\n" for message in messages).encode('utf-8'),
+            self.codec, self.level
+        )
+        entry = SegmentEntry(
+            self.segments, self.segment_file.tell(), len(payload), len(messages), self.next_seq,
+            min(epochs) if epochs else EMPTY_MIN_EPOCH, max(epochs) if epochs else EMPTY_MAX_EPOCH, self.codec
+        )
+
+        # O segmento vai para o disco antes do registro: o índice nunca aponta para dados incompletos
+        self.segment_file.write(payload)
+        self.segment_file.flush()
+        if fsync:
+            os.fsync(self.segment_file.fileno())
+        self.index_file.write(INDEX_RECORD.pack(*entry[1:], bytes(bloom)))
+        self.index_file.flush()
+        if fsync:
+            os.fsync(self.index_file.fileno())
+
+        self.segments += 1
+        self.next_seq += len(messages)
+        self.bytes_written += len(payload)
+        return entry
+
+    def close(self):
+        """Fecha os arquivos."""
+        self.segment_file.close()
+        self.index_file.close()
+
+
+class ArchiveReader:
+    """
+    Leitura de um arquivo de segmentos com acesso aleatório.
+
+    O índice é mapeado em memória e consultado sem ser carregado; apenas os
+    segmentos cuja faixa de tempo (ou filtro de ids) corresponde à consulta
+    são lidos e descomprimidos. O leitor enxerga os segmentos existentes ao
+    ser aberto.
+    """
+    def __init__(self, archive_dir):
+        """
+        Abre o arquivo de segmentos de um grupo.
+
+        Args:
+            archive_dir (str): Diretório do arquivo do grupo
+        """
+        self.archive_dir = archive_dir
+        self.index_file = open(os.path.join(archive_dir, INDEX_FILE), 'rb')
+        self.index = mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"Índice inválido: {self.index_file.name}")
+        self.segment_file = open(os.path.join(archive_dir, SEGMENT_FILE), 'rb')
+        self.segments = (len(self.index) - len(INDEX_MAGIC)) // INDEX_RECORD.size
+        self.segments_read = 0
+
+    def __len__(self):
+        return self.segments
+
+    def entry(self, number) -> SegmentEntry:
+        """Retorna o registro de um segmento."""
+        if not 0 <= number < self.segments:
+            raise IndexError(number)
+        return SegmentEntry(number, *INDEX_RECORD.unpack_from(self.index, len(INDEX_MAGIC) + number * INDEX_RECORD.size)[:7])
+
+    def entries(self, since=None, until=None) -> Iterator[SegmentEntry]:
+        """
+        Percorre os registros dos segmentos que se sobrepõem a um intervalo.
+
+        Args:
+            since: Início do intervalo (date, datetime, epoch ou "AAAA-MM-DD"), ou None
+            until: Fim do intervalo (date, datetime, epoch ou "AAAA-MM-DD"), ou None
+
+        Returns:
+            iterator: Registros dos segmentos, na ordem de gravação
+        """
+        since_epoch, until_epoch = to_epoch(since), to_epoch(until, end_of_day=True)
+        for number in range(self.segments):
+            entry = self.entry(number)
+            if entry.overlaps(since_epoch, until_epoch):
+                yield entry
+
+    def may_contain(self, number, message_id) -> bool:
+        """Indica, pelo filtro de ids, se um segmento pode conter a mensagem (sem falsos negativos)."""
+        base = len(INDEX_MAGIC) + number * INDEX_RECORD.size + BLOOM_OFFSET
+        return all(self.index[base + (position >> 3)] & (1 << (position & 7))
+                   for position in _bloom_positions(message_id))
+
+    def read_segment(self, entry: SegmentEntry) -> List[Dict]:
+        """
+        Lê e descomprime as mensagens de um segmento.
+
+        Args:
+            entry (SegmentEntry): Registro do segmento
+
+        Returns:
+            list: Mensagens do segmento, na ordem de gravação
+        """
+        self.segment_file.seek(entry.offset)
+        data = decompress(self.segment_file.read(entry.length), entry.codec)
+        self.segments_read += 1
+        return [json.loads(line) for line in data.decode('utf-8').splitlines() if line]
+
+    def query(self, since=None, until=None) -> Iterator[Dict]:
+        """
+        Percorre as mensagens de um intervalo de tempo.
+
+        Args:
+            since: Início do intervalo (date, datetime, epoch ou "AAAA-MM-DD"), ou None
+            until: Fim do intervalo (date, datetime, epoch ou "AAAA-MM-DD"), ou None
+
+        Returns:
+            iterator: Mensagens do intervalo, na ordem de gravação (sem intervalo, todas as mensagens)
+        """
+        since_epoch, until_epoch = to_epoch(since), to_epoch(until, end_of_day=True)
+        for entry in self.entries(since_epoch, until_epoch):
+            for message in self.read_segment(entry):
+                if since_epoch is None and until_epoch is None:
+                    yield message
+                    continue
+                epoch = message_epoch(message)
+                if epoch is not None and (since_epoch is None or epoch >= since_epoch) \
+                        and (until_epoch is None or epoch <= until_epoch):
+                    yield message
+
+    def get(self, message_id) -> Optional[Dict]:
+        """
+        Procura uma mensagem pelo id, descomprimindo apenas os segmentos que podem contê-la.
+
+        Args:
+            message_id (str): Id (data-id) da mensagem
+
+        Returns:
+            dict: Mensagem gravada mais recentemente com esse id, ou None
+        """
+        for number in reversed(range(self.segments)):
+            if not self.may_contain(number, message_id):
+                continue
+            for message in reversed(self.read_segment(self.entry(number))):
+                if message.get('message_id') == message_id:
+                    return message
+        return None
+
+    def close(self):
+        """Libera o mapeamento e os arquivos."""
+        self.index.close()
+        self.index_file.close()
+        if hasattr(self, 'segment_file'):
+            self.segment_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main(args: Optional[List[str]] = None):
+    """Linha de comando: python -m modules.message_archive <diretório do grupo> ..."""
+    parser = argparse.ArgumentParser(description="Lê mensagens do arquivo de segmentos de um grupo.")
+    parser.add_argument("group_dir", help="Diretório do grupo (com a pasta archive/) ou do próprio arquivo")
+    parser.add_argument("--since", default=None, help="Início do intervalo (AAAA-MM-DD [HH:MM])")
+    parser.add_argument("--until", default=None, help="Fim do intervalo (AAAA-MM-DD [HH:MM])")
+    parser.add_argument("--id", dest="message_id", default=None, help="Id de uma mensagem")
+    parser.add_argument("--stats", action="store_true", help="Mostra apenas os segmentos do índice")
+    options = parser.parse_args(args)
+
+    archive_dir = options.group_dir
+    if not os.path.exists(os.path.join(archive_dir, INDEX_FILE)):
+        archive_dir = os.path.join(archive_dir, "archive")
+
+    with ArchiveReader(archive_dir) as reader:
+        if options.stats:
+            for entry in reader.entries(options.since, options.until):
+                print(f"{entry.number}: {entry.count} mensagens (seq {entry.first_seq}-{entry.last_seq}), "
+                      f"{entry.length} bytes, epochs {entry.min_epoch}-{entry.max_epoch}")
+            return
+
+        if options.message_id:
+            message = reader.get(options.message_id)
+            messages = [message] if message else []
+        else:
+            messages = reader.query(options.since, options.until)
+        for message in messages:
+            sys.stdout.write(json.dumps(message, ensure_ascii=False) + "\n")
+        logger.debug(f"{reader.segments_read} de {len(reader)} segmentos lidos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+# modules/message_harvester.py
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from core.wait_engine import WaitEngine
+from modules.content_extractor import MESSAGE_RECORD_JS
+from utils.logger import get_logger
+
+logger = get_logger("message_harvester")
+
+# Script executado a cada passo: extrai as mensagens visíveis e rola o painel para cima.
+# arguments[0]: fração da altura visível usada em cada rolagem
+# arguments[1]: True para posicionar o painel no fim da conversa antes da extração
+# arguments[2]: True para devolver também o HTML de cada mensagem (snapshots)
+# arguments[3]: True para devolver os rótulos dos divisores de data renderizados
+HARVEST_STEP_SCRIPT = """
+const extract = """ + MESSAGE_RECORD_JS + """;
+const nodes = document.querySelectorAll('div.message-in, div.message-out');
+
+// Localiza o contêiner rolável que envolve a lista de mensagens
+let pane = null;
+if (nodes.length) {
+    let parent = nodes[0].parentElement;
+    while (parent && parent !== document.body) {
+        const overflow = getComputedStyle(parent).overflowY;
+        if ((overflow === 'auto' || overflow === 'scroll') && parent.scrollHeight > parent.clientHeight) {
+            pane = parent;
+            break;
+        }
+        parent = parent.parentElement;
+    }
+}
+if (!pane) {
+    return {records: [], html: [], dividers: [], scroll_top: 0, scroll_height: 0, at_top: true, found: false};
+}
+if (arguments[1]) {
+    pane.scrollTop = pane.scrollHeight;
+}
+
+const records = [];
+const html = [];
+for (const node of nodes) {
+    try {
+        const record = extract(node);
+        if (arguments[2]) {
+            html.push(node.outerHTML);
+        }
+        records.push(record);
+    } catch (e) {
+        // Nó removido pela virtualização durante a leitura
+    }
+}
+
+// Candidatos a divisor de data (linhas da lista sem mensagem), do mais antigo ao mais recente;
+// os rótulos são validados em Python
+const dividers = [];
+if (arguments[3]) {
+    const contentSelector = '.message-in, .message-out, [data-id]';
+    for (const row of document.querySelectorAll('div.focusable-list-item')) {
+        if (!row.matches(contentSelector) && !row.querySelector(contentSelector)) {
+            const label = (row.textContent || '').trim();
+            if (label) { dividers.push(label); }
+        }
+    }
+}
+
+// Guarda o painel para a poda das mensagens já gravadas
+window.__waHarvestPane = pane;
+
+const before = pane.scrollTop;
+pane.scrollTop = Math.max(0, before - Math.floor(pane.clientHeight * arguments[0]));
+return {
+    records: records,
+    html: html,
+    dividers: dividers,
+    scroll_top: pane.scrollTop,
+    scroll_height: pane.scrollHeight,
+    at_top: before === 0,
+    found: true
+};
+"""
+
+# Esvazia as mensagens já gravadas que estão fora da área visível. Cada contêiner [data-id]
+# mantém a altura original, então a posição de rolagem e a ancoragem do WhatsApp não mudam;
+# o conteúdo (textos, imagens e URLs blob:) sai do DOM.
+# arguments[0]: ids das mensagens, arguments[1]: margem em px ao redor da área visível
+PRUNE_SCRIPT = """
+const ids = new Set(arguments[0]), margin = arguments[1];
+const pane = window.__waHarvestPane && window.__waHarvestPane.isConnected ? window.__waHarvestPane : null;
+const view = pane ? pane.getBoundingClientRect() : {top: 0, bottom: window.innerHeight};
+
+let pruned = 0;
+const deferred = [];
+for (const holder of document.querySelectorAll('[data-id]')) {
+    const id = holder.getAttribute('data-id');
+    if (!ids.has(id) || holder.hasAttribute('data-wa-pruned')) { continue; }
+
+    // Mensagens próximas da área visível ficam para a próxima poda
+    const rect = holder.getBoundingClientRect();
+    if (rect.bottom > view.top - margin && rect.top < view.bottom + margin) {
+        deferred.push(id);
+        continue;
+    }
+    holder.style.height = rect.height + 'px';
+    holder.style.contain = 'strict';
+    holder.replaceChildren();
+    holder.setAttribute('data-wa-pruned', '1');
+    pruned++;
+}
+return {pruned: pruned, deferred: deferred};
+"""
+
+
+class MessageHarvester:
+    """
+    Coleta o histórico de uma conversa enquanto rola o painel de mensagens.
+
+    O WhatsApp Web virtualiza a lista de mensagens, então as mensagens antigas
+    saem do DOM conforme a rolagem avança. O harvester extrai as mensagens
+    visíveis após cada passo de rolagem e as entrega imediatamente, da mais
+    recente para a mais antiga, sem duplicatas.
+    """
+    def __init__(self, driver, content_extractor, chat_interaction=None, max_seen_ids=5000, wait_engine=None,
+                 snapshot_writer=None, prune=False, prune_margin=1500):
+        """
+        Inicializa o harvester.
+
+        Args:
+            driver: Instância do WebDriver Selenium
+            content_extractor (ContentExtractor): Extrator usado para normalizar os registros
+            chat_interaction (ChatInteraction): Usado para clicar em "carregar mensagens
+                anteriores" quando a rolagem chega ao topo (opcional)
+            max_seen_ids (int): Quantidade de ids recentes mantidos para deduplicação.
+                A rolagem é monotônica, então só mensagens próximas podem se repetir.
+            wait_engine (WaitEngine): Mecanismo de espera compartilhado (opcional)
+            snapshot_writer (SnapshotWriter): Se informado, recebe o HTML bruto de cada
+                mensagem nova, para reprocessamento offline (opcional)
+            prune (bool): Se True, commit() esvazia no DOM as mensagens já gravadas, mantendo
+                a memória do navegador e o custo das consultas constantes ao longo do histórico
+            prune_margin (int): Distância em px da área visível dentro da qual nada é podado
+        """
+        self.driver = driver
+        self.content_extractor = content_extractor
+        self.chat_interaction = chat_interaction
+        self.max_seen_ids = max_seen_ids
+        self.wait_engine = wait_engine or WaitEngine(driver)
+        self.snapshot_writer = snapshot_writer
+        self.prune = prune
+        self.prune_margin = prune_margin
+        self.seen_ids = OrderedDict()
+        self.pending_prune = []
+        self.steps = 0
+        self.total_records = 0
+        self.pruned = 0
+        self.out_of_window = 0
+        self.last_epoch = None
+
+    def _mark_seen(self, key) -> bool:
+        """
+        Registra a chave de uma mensagem e informa se ela é nova.
+
+        Args:
+            key: Identificador da mensagem (data-id ou tupla de conteúdo)
+
+        Returns:
+            bool: True se a mensagem ainda não havia sido vista
+        """
+        if key in self.seen_ids:
+            self.seen_ids.move_to_end(key)
+            return False
+
+        self.seen_ids[key] = None
+
+        # Mantém a memória limitada descartando os ids mais antigos
+        if len(self.seen_ids) > self.max_seen_ids:
+            self.seen_ids.popitem(last=False)
+        return True
+
+    @staticmethod
+    def _record_key(record: Dict):
+        """Retorna a chave de deduplicação de um registro."""
+        if record.get('message_id'):
+            return record['message_id']
+        return (record.get('sender'), record.get('timestamp'), record.get('text'))
+
+    def harvest_batches(self, max_steps=None, idle_steps=3, step_timeout=1.5, scroll_fraction=0.9,
+                        since=None, until=None) -> Iterator[List[Dict]]:
+        """
+        Rola a conversa até o início, entregando as mensagens novas de cada passo.
+
+        Args:
+            max_steps (int): Número máximo de passos de rolagem (None para ilimitado)
+            idle_steps (int): Passos consecutivos no topo sem mensagens novas para encerrar
+            step_timeout (float): Espera máxima pela renderização de novas mensagens após cada rolagem
+            scroll_fraction (float): Fração da altura visível rolada em cada passo
+            since (int): Epoch do início da janela: a rolagem para assim que a página mostra
+                uma data anterior a ele, e as mensagens mais antigas são descartadas (opcional)
+            until (int): Epoch do fim da janela: as mensagens mais recentes são descartadas (opcional)
+
+        Yields:
+            list: Registros novos do passo, do mais recente para o mais antigo
+        """
+        idle = 0
+        first_step = True
+        bounded = since is not None or until is not None
+
+        while max_steps is None or self.steps < max_steps:
+            # Observa o painel antes de rolar para detectar as mensagens renderizadas pela rolagem
+            self.wait_engine.arm_mutation("rolagem")
+            step = self.driver.execute_script(
+                HARVEST_STEP_SCRIPT, scroll_fraction, first_step, self.snapshot_writer is not None, since is not None
+            )
+            first_step = False
+            self.steps += 1
+
+            if not step or not step.get('found'):
+                logger.warning("Painel de mensagens não encontrado, encerrando coleta")
+                return
+
+            # Normaliza os registros do passo em lote (timestamps completos a partir dos prefixos)
+            raw_records = step['records']
+            html = step.get('html') or []
+            positions = [index for index, raw_record in enumerate(raw_records) if raw_record]
+            records = self.content_extractor.normalize_records([raw_records[index] for index in positions])
+
+            # Percorre em ordem reversa para manter a sequência do mais recente ao mais antigo
+            new_records = []
+            for index, record in reversed(list(zip(positions, records))):
+                if self._mark_seen(self._record_key(record)):
+                    new_records.append((index, record))
+
+            batch = []
+            for index, record in new_records:
+                if bounded and not self._in_window(record, since, until):
+                    # Fora da janela: não é entregue, mas pode sair do DOM na próxima poda
+                    self.out_of_window += 1
+                    if self.prune and record.get('message_id'):
+                        self.pending_prune.append(record['message_id'])
+                    continue
+                batch.append(record)
+                if self.snapshot_writer and index < len(html):
+                    self.snapshot_writer.add(record['message_id'], html[index])
+
+            if new_records:
+                idle = 0
+                self.total_records += len(batch)
+                if batch:
+                    yield batch
+
+            # O restante do histórico (acima do painel) é anterior ao início da janela
+            if since is not None and self._reached_since(records, step.get('dividers'), since):
+                logger.debug("Início da janela de datas alcançado, encerrando a rolagem")
+                break
+
+            if not new_records and step['at_top']:
+                idle += 1
+
+                # No topo, tenta carregar o histórico que ainda está no celular
+                if self.chat_interaction and self.chat_interaction.find_message():
+                    idle = 0
+                elif idle >= idle_steps:
+                    break
+
+            # Segue para o próximo passo assim que a rolagem renderizar novas linhas
+            self.wait_engine.wait_for_mutation("rolagem", timeout=step_timeout, settle=0.05, label="rolagem renderizada")
+
+        logger.debug(f"Coleta concluída: {self.total_records} mensagens em {self.steps} passos"
+                     + (f", {self.out_of_window} fora da janela de datas" if bounded else "")
+                     + (f", {self.pruned} mensagens podadas do DOM" if self.prune else ""))
+
+    def _in_window(self, record: Dict, since: Optional[int], until: Optional[int]) -> bool:
+        """
+        Indica se um registro está dentro da janela de datas.
+
+        Registros sem data reconhecida (ex.: mídia sem prefixo) herdam a data do
+        registro mais recente que os antecede e, sem ela, são mantidos.
+        """
+        epoch = record.get('epoch')
+        if epoch is None:
+            epoch = self.last_epoch
+        else:
+            self.last_epoch = epoch
+        if epoch is None:
+            return True
+        return (since is None or epoch >= since) and (until is None or epoch <= until)
+
+    def _reached_since(self, records: List[Dict], dividers: Optional[List[str]], since: int) -> bool:
+        """
+        Indica se a página já mostra conteúdo anterior ao início da janela.
+
+        Args:
+            records (list): Registros renderizados no passo
+            dividers (list): Rótulos candidatos a divisor de data renderizados
+            since (int): Epoch do início da janela
+
+        Returns:
+            bool: True se uma mensagem ou um divisor de data é anterior a since
+        """
+        if any(record.get('epoch') is not None and record['epoch'] < since for record in records):
+            return True
+
+        # Tudo acima de um divisor é de dias anteriores ao dele; rótulos que não são dias são ignorados
+        normalizer = self.content_extractor.timestamp_normalizer
+        for label in dividers or []:
+            day_start = normalizer.day_label_epoch(label)
+            if day_start is not None and day_start <= since:
+                return True
+        return False
+    
+    def commit(self, records: List[Dict]) -> int:
+        """
+        Informa que os registros já foram gravados, liberando suas mensagens no DOM.
+        
+        Com a poda ativada, as mensagens correspondentes fora da área visível são
+        esvaziadas no navegador; as que ainda estão próximas da tela são tentadas
+        novamente no próximo commit. Sem poda, não faz nada.
+        
+        Args:
+            records (list): Registros entregues pelo harvester e já gravados
+            
+        Returns:
+            int: Quantidade de mensagens podadas nesta chamada
+        """
+        if not self.prune:
+            return 0
+        
+        ids = self.pending_prune + [record['message_id'] for record in records if record.get('message_id')]
+        if not ids:
+            return 0
+        
+        result = self.driver.execute_script(PRUNE_SCRIPT, ids, self.prune_margin) or {}
+        
+        # Mensagens que a virtualização já removeu não voltam para a fila
+        self.pending_prune = result.get('deferred') or []
+        self.pruned += result.get('pruned', 0)
+        return result.get('pruned', 0)
+
+    def harvest(self, **kwargs) -> Iterator[Dict]:
+        """
+        Versão da coleta que entrega um registro por vez.
+
+        Args:
+            **kwargs: Mesmos parâmetros de harvest_batches
+
+        Yields:
+            dict: Registro de mensagem, do mais recente para o mais antigo
+        """
+        for batch in self.harvest_batches(**kwargs):
+            yield from batch
@@ -0,0 +1,359 @@
+# modules/output_writers.py
+import json
+import os
+import re
+import shutil
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+from modules.message_archive import SegmentArchive
+from utils.timestamp_regex import get_timestamp_regex
+
+# Campos fixos de uma mensagem gravada, em todos os formatos de saída
+MESSAGE_FIELDS = ("group", "message_id", "sender", "timestamp", "text", "media")
+
+# Caracteres removidos do nome do grupo para formar o nome do seu diretório
+GROUP_DIR_INVALID_CHARS = re.compile(r'[\\/*?:"<>|]')
+
+# Colunas da tabela de mensagens do banco SQLite (e da tabela temporária de uma substituição)
+MESSAGES_TABLE_SCHEMA = """(
+    id INTEGER PRIMARY KEY,
+    group_name TEXT NOT NULL,
+    message_id TEXT,
+    sender TEXT,
+    timestamp TEXT,
+    text TEXT,
+    media TEXT,
+    UNIQUE (group_name, message_id)
+)"""
+
+
+def group_dir_name(group_name) -> str:
+    """
+    Retorna o nome do diretório de saída de um grupo.
+
+    Args:
+        group_name (str): Nome do grupo ou contato
+
+    Returns:
+        str: Nome sem os caracteres inválidos em caminhos
+    """
+    return GROUP_DIR_INVALID_CHARS.sub('', group_name)
+
+
+def build_message(group_name, record: Dict, media: Optional[List[Dict]] = None) -> Dict:
+    """
+    Converte um registro do extrator para o esquema fixo de mensagem.
+
+    Args:
+        group_name (str): Nome do grupo ou contato
+        record (dict): Registro de mensagem do extrator
+        media (list): Referências de mídia ({'kind', 'name', 'url'}) da mensagem
+
+    Returns:
+        dict: Mensagem com os campos de MESSAGE_FIELDS
+    """
+    # Registros normalizados em lote já trazem data e hora completas; os demais usam o prefixo da mensagem
+    timestamp = record.get("timestamp")
+    if "epoch" not in record and record.get("pre_plain_text"):
+        _, full_timestamp = get_timestamp_regex(record["pre_plain_text"])
+        timestamp = full_timestamp or timestamp
+
+    return {
+        "group": group_name,
+        "message_id": record.get("message_id"),
+        "sender": record.get("sender"),
+        "timestamp": timestamp,
+        "text": record.get("text") or "",
+        "media": media or [],
+    }
+
+
+class MessageWriter:
+    """
+    Base dos gravadores de mensagens.
+
+    As mensagens são acumuladas em memória e gravadas em lotes de batch_size,
+    com uma única sincronização com o disco por lote. Assim nada além do lote
+    atual se perde em uma falha e a memória não cresce com o tamanho do grupo.
+    Gravadores que substituem a saída (truncate=True) gravam em uma área de
+    preparação e só trocam a saída anterior em commit(); sem commit, ela fica intacta.
+    """
+    def __init__(self, path, batch_size=500, fsync=True):
+        """
+        Inicializa o gravador.
+
+        Args:
+            path (str): Caminho do arquivo de saída
+            batch_size (int): Quantidade de mensagens por lote gravado
+            fsync (bool): Se True, força a gravação em disco ao fim de cada lote
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.buffer: List[Dict] = []
+        self.count = 0
+
+    def write(self, message: Dict):
+        """Adiciona uma mensagem ao lote atual, gravando-o quando estiver cheio."""
+        self.buffer.append(message)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, messages: Iterable[Dict]):
+        """Adiciona várias mensagens ao lote atual."""
+        for message in messages:
+            if message:
+                self.write(message)
+
+    def flush(self):
+        """Grava o lote atual."""
+        if self.buffer:
+            self._write_batch(self.buffer)
+            self.count += len(self.buffer)
+            self.buffer = []
+
+    def _write_batch(self, messages: List[Dict]):
+        """Grava um lote de mensagens no destino (implementado pelas subclasses)."""
+        raise NotImplementedError
+
+    def commit(self):
+        """
+        Grava o lote pendente e confirma as mensagens no destino.
+
+        Com truncate=True, é aqui que a saída anterior é substituída; as gravações
+        seguintes são anexadas à nova saída.
+        """
+        self.flush()
+
+    def close(self):
+        """Grava o lote pendente e libera os recursos, descartando uma substituição não confirmada."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Um bloco interrompido por exceção mantém a saída anterior
+        if exc_type is None:
+            self.commit()
+        self.close()
+
+
+class FileMessageWriter(MessageWriter):
+    """
+    Base dos gravadores em arquivo de texto (uma mensagem por linha).
+
+    Com truncate=True, as linhas vão para um arquivo temporário ao lado do
+    destino, que o substitui atomicamente em commit().
+    """
+    def __init__(self, path, batch_size=500, fsync=True, truncate=False):
+        """
+        Inicializa o gravador em arquivo.
+
+        Args:
+            path (str): Caminho do arquivo de saída
+            batch_size (int): Quantidade de mensagens por lote gravado
+            fsync (bool): Se True, força a gravação em disco ao fim de cada lote
+            truncate (bool): Se True, substitui o conteúdo anterior do arquivo no commit
+        """
+        super().__init__(path, batch_size, fsync)
+        self.staging_path = path + ".tmp" if truncate else None
+        self.file = open(self.staging_path or path, 'w' if truncate else 'a', encoding='utf-8')
+
+    def _write_text(self, text):
+        """Acrescenta o texto de um lote ao arquivo aberto."""
+        self.file.write(text)
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def commit(self):
+        super().commit()
+        if self.staging_path:
+            self.file.close()
+            os.replace(self.staging_path, self.path)
+            self.staging_path = None
+            self.file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        super().close()
+        self.file.close()
+        if self.staging_path and os.path.exists(self.staging_path):
+            os.remove(self.staging_path)
+
+
+class JsonlMessageWriter(FileMessageWriter):
+    """
+    Grava mensagens em JSON Lines, uma mensagem por linha.
+    """
+    def _write_batch(self, messages):
+        self._write_text("".join(json.dumps(message, ensure_ascii=False) + "\n" for message in messages))
+
+
+class TextMessageWriter(FileMessageWriter):
+    """
+    Grava mensagens no formato de texto original ("[timestamp] remetente: texto").
+    """
+    def _write_batch(self, messages):
+        self._write_text("".join(
+            f"[{message['timestamp']}] {message['sender']}: {message['text']}\n"
+            for message in messages if message['sender'] and message['timestamp'] and message['text']
+        ))
+
+
+class SqliteMessageWriter(MessageWriter):
+    """
+    Grava mensagens em um banco SQLite compartilhado entre os grupos.
+
+    Cada lote é uma transação sobre um banco em modo WAL, então o disco é
+    sincronizado uma vez por lote (ou apenas nos checkpoints do WAL, com
+    fsync=False), mantendo a taxa de gravação estável em grupos grandes.
+    Mensagens repetidas (mesmo grupo e id) são ignoradas. Com truncate=True, o
+    grupo é gravado em uma tabela temporária da conexão, que substitui as
+    mensagens anteriores do grupo em uma única transação no commit.
+    """
+    def __init__(self, path, batch_size=500, fsync=True, group_name=None, truncate=False):
+        """
+        Inicializa o gravador SQLite.
+
+        Args:
+            path (str): Caminho do arquivo do banco
+            batch_size (int): Quantidade de mensagens por lote (transação)
+            fsync (bool): Se True, usa synchronous=FULL em vez de NORMAL
+            group_name (str): Grupo gravado, usado por truncate
+            truncate (bool): Se True, substitui as mensagens anteriores do grupo no commit
+        """
+        super().__init__(path, batch_size, fsync)
+        self.group_name = group_name
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS messages {MESSAGES_TABLE_SCHEMA}")
+
+        # A tabela temporária some com a conexão, então uma extração interrompida não deixa resíduos
+        self.table = "messages"
+        if truncate and group_name:
+            self.table = "temp.staged_messages"
+            self.connection.execute(f"CREATE TEMP TABLE staged_messages {MESSAGES_TABLE_SCHEMA}")
+        self.connection.commit()
+
+    def _write_batch(self, messages):
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR IGNORE INTO {self.table} (group_name, message_id, sender, timestamp, text, media) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (message['group'], message['message_id'], message['sender'], message['timestamp'],
+                     message['text'], json.dumps(message['media'], ensure_ascii=False))
+                    for message in messages
+                ]
+            )
+
+    def commit(self):
+        super().commit()
+        if self.table != "messages":
+            with self.connection:
+                self.connection.execute("DELETE FROM messages WHERE group_name = ?", (self.group_name,))
+                self.connection.execute(
+                    "INSERT INTO messages (group_name, message_id, sender, timestamp, text, media) "
+                    "SELECT group_name, message_id, sender, timestamp, text, media FROM temp.staged_messages ORDER BY id"
+                )
+                self.connection.execute("DROP TABLE temp.staged_messages")
+            self.table = "messages"
+
+    def close(self):
+        super().close()
+        self.connection.close()
+
+
+class ArchiveMessageWriter(MessageWriter):
+    """
+    Grava mensagens em segmentos comprimidos somente para anexar (ver SegmentArchive).
+
+    Cada lote vira um segmento, com a faixa de tempo e de ids registrada no
+    índice; leituras por período descomprimem apenas os segmentos do período.
+    Com truncate=True, os segmentos são gravados em um diretório de preparação
+    que substitui o arquivo anterior no commit.
+    """
+    def __init__(self, path, batch_size=500, fsync=True, truncate=False, codec=None):
+        """
+        Inicializa o gravador de segmentos.
+
+        Args:
+            path (str): Diretório do arquivo do grupo
+            batch_size (int): Quantidade de mensagens por lote (segmento)
+            fsync (bool): Se True, força a gravação em disco ao fim de cada lote
+            truncate (bool): Se True, substitui os segmentos anteriores no commit
+            codec (str): "zstd", "zlib", "none" ou None para o melhor disponível
+        """
+        super().__init__(path, batch_size, fsync)
+        self.codec = codec
+        self.staging_path = path + ".tmp" if truncate else None
+        self.archive = SegmentArchive(self.staging_path or path, codec=codec, truncate=truncate)
+
+    def _write_batch(self, messages):
+        self.archive.append(messages, fsync=self.fsync)
+
+    def commit(self):
+        super().commit()
+        if self.staging_path:
+            self.archive.close()
+            replace_directory(self.staging_path, self.path)
+            self.staging_path = None
+            self.archive = SegmentArchive(self.path, codec=self.codec)
+
+    def close(self):
+        super().close()
+        self.archive.close()
+        if self.staging_path:
+            shutil.rmtree(self.staging_path, ignore_errors=True)
+
+
+def replace_directory(source, target):
+    """
+    Substitui um diretório por outro já completo.
+
+    O diretório anterior é renomeado antes de o novo tomar seu lugar e só é
+    removido depois, então nunca há um destino parcialmente gravado.
+
+    Args:
+        source (str): Diretório novo (preparação)
+        target (str): Diretório substituído
+    """
+    previous = target + ".old"
+    if os.path.isdir(previous):
+        shutil.rmtree(previous)
+    if os.path.isdir(target):
+        os.replace(target, previous)
+    os.replace(source, target)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def create_writer(kind, group_name, group_dir, output_dir, truncate=False, **kwargs) -> MessageWriter:
+    """
+    Cria o gravador de mensagens do formato escolhido.
+
+    Args:
+        kind (str): Formato de saída ("jsonl", "sqlite", "txt" ou "archive")
+        group_name (str): Nome do grupo ou contato
+        group_dir (str): Diretório do grupo (arquivos jsonl, txt e archive/)
+        output_dir (str): Diretório de saída (banco SQLite compartilhado)
+        truncate (bool): Se True, substitui as mensagens já gravadas do grupo quando o gravador
+            é confirmado (commit ou saída sem erro do bloco with)
+        **kwargs: Parâmetros extras do gravador (batch_size, fsync)
+
+    Returns:
+        MessageWriter: Gravador pronto para uso
+    """
+    if kind == "jsonl":
+        return JsonlMessageWriter(os.path.join(group_dir, "messages.jsonl"), truncate=truncate, **kwargs)
+    if kind == "sqlite":
+        return SqliteMessageWriter(
+            os.path.join(output_dir, "messages.db"), group_name=group_name, truncate=truncate, **kwargs
+        )
+    if kind == "txt":
+        return TextMessageWriter(os.path.join(group_dir, "messages.txt"), truncate=truncate, **kwargs)
+    if kind == "archive":
+        return ArchiveMessageWriter(os.path.join(group_dir, "archive"), truncate=truncate, **kwargs)
+    raise ValueError(f"Formato de saída desconhecido: {kind}")
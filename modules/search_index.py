@@ -0,0 +1,470 @@
+# modules/search_index.py
+import argparse
+import datetime
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+from config.settings import OUTPUT_DIR
+from modules.checkpoint_store import CheckpointStore
+from modules.message_archive import ArchiveReader
+from modules.output_writers import group_dir_name
+from utils.logger import get_logger
+from utils.timestamp_normalizer import to_epoch
+
+logger = get_logger("search_index")
+
+# Formatos de timestamp gravados pelo scraper
+TIMESTAMP_FORMATS = ("%Y-%m-%d-%H:%M", "%d/%m/%Y %H:%M")
+
+# Linha do formato de texto: "[timestamp] remetente: texto"
+TEXT_LINE_REGEX = re.compile(r"^\[([^\]]+)\] ([^:]+): (.*)$")
+
+
+def parse_timestamp(value) -> Optional[int]:
+    """
+    Converte um timestamp do scraper (ou data informada na busca) em epoch.
+
+    Args:
+        value: Texto do timestamp, datetime ou número de segundos
+
+    Returns:
+        int: Epoch em segundos, ou None se o formato não for reconhecido
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime.datetime):
+        return int(value.timestamp())
+    for fmt in TIMESTAMP_FORMATS + ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return int(datetime.datetime.strptime(value, fmt).timestamp())
+        except ValueError:
+            continue
+    return None
+
+
+def parse_bound(value, end_of_day=False) -> Optional[int]:
+    """
+    Converte um limite de intervalo da busca em epoch.
+
+    Args:
+        value: Datetime, date, epoch ou texto ("AAAA-MM-DD [HH:MM]" ou um formato de TIMESTAMP_FORMATS)
+        end_of_day (bool): Para datas sem horário, usa o fim do dia (limite final inclusivo)
+
+    Returns:
+        int: Epoch em segundos, ou None se o formato não for reconhecido
+    """
+    try:
+        return to_epoch(value, end_of_day=end_of_day)
+    except (TypeError, ValueError):
+        return parse_timestamp(value)
+
+
+def _line_anchor(line: bytes) -> str:
+    """Identifica a última linha lida de um arquivo (tamanho e hash)."""
+    return f"{len(line)}:{hashlib.sha1(line).hexdigest()}"
+
+
+class SearchIndex:
+    """
+    Índice de busca textual (SQLite FTS5) sobre as mensagens extraídas.
+
+    As mensagens ficam em uma tabela comum, indexada por grupo, remetente e
+    horário, e o texto em uma tabela FTS5 de conteúdo externo. A atualização
+    é incremental: para cada arquivo de saída é guardada a posição já lida,
+    então apenas as mensagens novas são processadas. Junto da posição fica uma
+    âncora da fonte (inode e última linha, segmento ou linha do banco lidos);
+    se a fonte foi recriada ou regravada por uma extração completa, a âncora
+    não confere mais: as mensagens indexadas a partir dela são removidas e a
+    fonte é relida desde o início.
+    """
+    def __init__(self, output_dir=OUTPUT_DIR, file_name="search.db"):
+        """
+        Abre (ou cria) o índice de busca.
+
+        Args:
+            output_dir (str): Diretório de saída do scraper
+            file_name (str): Nome do arquivo do índice
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, file_name)
+        os.makedirs(output_dir, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Cria as tabelas, o índice FTS5 e os gatilhos de sincronização."""
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                group_name TEXT NOT NULL,
+                message_id TEXT,
+                sender TEXT,
+                timestamp TEXT,
+                epoch INTEGER,
+                text TEXT,
+                source TEXT,
+                UNIQUE (group_name, message_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_group_epoch ON messages (group_name, epoch);
+            CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages (sender);
+            CREATE INDEX IF NOT EXISTS idx_messages_epoch ON messages (epoch);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (
+                text, sender, group_name,
+                content='messages', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts (rowid, text, sender, group_name)
+                VALUES (new.id, new.text, new.sender, new.group_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, text, sender, group_name)
+                VALUES ('delete', old.id, old.text, old.sender, old.group_name);
+            END;
+
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                anchor TEXT
+            );
+            """
+        )
+
+        # Índices criados antes da âncora das fontes
+        columns = [row['name'] for row in self.connection.execute("PRAGMA table_info(sources)")]
+        if 'anchor' not in columns:
+            self.connection.execute("ALTER TABLE sources ADD COLUMN anchor TEXT")
+
+        # Índices criados antes da fonte de cada mensagem não sabem o que remover quando uma
+        # fonte é regravada: são reconstruídos a partir das saídas
+        columns = [row['name'] for row in self.connection.execute("PRAGMA table_info(messages)")]
+        if 'source' not in columns:
+            logger.debug("Índice de busca anterior à fonte das mensagens: reconstruindo")
+            self.connection.execute("ALTER TABLE messages ADD COLUMN source TEXT")
+            self.connection.execute("DELETE FROM messages")
+            self.connection.execute("DELETE FROM sources")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_messages_source ON messages (source)")
+        self.connection.commit()
+
+    def index_messages(self, messages: Iterable[Dict], source=None) -> int:
+        """
+        Adiciona mensagens (no esquema de output_writers) ao índice.
+
+        Args:
+            messages: Mensagens a indexar; repetidas (mesmo grupo e id) são ignoradas
+            source (str): Fonte das mensagens, usada para removê-las se a fonte for regravada
+
+        Returns:
+            int: Quantidade de mensagens novas indexadas
+        """
+        rows = [
+            (message['group'], message.get('message_id'), message.get('sender'), message.get('timestamp'),
+             parse_timestamp(message.get('timestamp')), message.get('text') or "", source)
+            for message in messages
+        ]
+        with self.connection:
+            cursor = self.connection.executemany(
+                "INSERT OR IGNORE INTO messages (group_name, message_id, sender, timestamp, epoch, text, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            return max(cursor.rowcount, 0)
+
+    def _get_source(self, path):
+        """Retorna a posição já lida de uma fonte e sua âncora."""
+        row = self.connection.execute("SELECT position, anchor FROM sources WHERE path = ?", (path,)).fetchone()
+        return (row['position'], row['anchor']) if row else (0, None)
+
+    def _set_source(self, path, position, anchor):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO sources (path, position, anchor) VALUES (?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET position = excluded.position, anchor = excluded.anchor",
+                (path, position, anchor)
+            )
+
+    def _reset_source(self, path):
+        """Remove as mensagens indexadas a partir de uma fonte regravada e volta a lê-la do início."""
+        with self.connection:
+            cursor = self.connection.execute("DELETE FROM messages WHERE source = ?", (path,))
+            self.connection.execute("UPDATE sources SET position = 0, anchor = NULL WHERE path = ?", (path,))
+        logger.debug(f"Fonte regravada, reindexando desde o início: {path} ({max(cursor.rowcount, 0)} mensagens removidas)")
+
+    @staticmethod
+    def _file_position(f, position, anchor) -> int:
+        """
+        Confere se um arquivo de texto ainda é o mesmo da última leitura.
+
+        Args:
+            f: Arquivo aberto em modo binário
+            position (int): Posição já lida
+            anchor (str): "inode:tamanho:hash" da última linha lida
+
+        Returns:
+            int: A posição, ou 0 se o arquivo foi recriado ou regravado
+        """
+        if not position:
+            return 0
+        try:
+            inode, length, digest = anchor.split(":")
+            length = int(length)
+        except (AttributeError, ValueError):
+            return 0
+        stat = os.fstat(f.fileno())
+        if str(stat.st_ino) != inode or stat.st_size < position or length > position:
+            return 0
+        f.seek(position - length)
+        return position if hashlib.sha1(f.read(length)).hexdigest() == digest else 0
+
+    def _update_from_jsonl(self, path, batch_size) -> int:
+        """Indexa as linhas novas de um arquivo messages.jsonl."""
+        position, anchor = self._get_source(path)
+
+        indexed = 0
+        with open(path, 'rb') as f:
+            # Arquivo regravado por uma extração completa: relê desde o início
+            if position and not self._file_position(f, position, anchor):
+                self._reset_source(path)
+                position = 0
+            inode = os.fstat(f.fileno()).st_ino
+            f.seek(position)
+            batch = []
+            for line in f:
+                # Linha ainda incompleta (gravação em andamento): para antes dela
+                if not line.endswith(b"\n"):
+                    break
+                position += len(line)
+                anchor = f"{inode}:{_line_anchor(line)}"
+                if line.strip():
+                    try:
+                        batch.append(json.loads(line))
+                    except ValueError:
+                        logger.warning(f"Linha inválida ignorada em {path} (posição {position - len(line)})")
+                if len(batch) >= batch_size:
+                    indexed += self.index_messages(batch, path)
+                    self._set_source(path, position, anchor)
+                    batch = []
+            indexed += self.index_messages(batch, path)
+        self._set_source(path, position, anchor)
+        return indexed
+
+    def _update_from_text(self, path, group_name) -> int:
+        """Indexa as linhas novas de um arquivo messages.txt (formato de texto original)."""
+        position, anchor = self._get_source(path)
+
+        messages = []
+        with open(path, 'rb') as f:
+            if position and not self._file_position(f, position, anchor):
+                self._reset_source(path)
+                position = 0
+            inode = os.fstat(f.fileno()).st_ino
+            f.seek(position)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                position += len(line)
+                anchor = f"{inode}:{_line_anchor(line)}"
+                match = TEXT_LINE_REGEX.match(line.decode('utf-8', errors='replace').rstrip("\n"))
+                if match:
+                    # O formato de texto não guarda o id: usa o hash da linha para evitar duplicatas
+                    messages.append({
+                        'group': group_name,
+                        'message_id': "txt-" + hashlib.sha1(line).hexdigest(),
+                        'timestamp': match.group(1),
+                        'sender': match.group(2),
+                        'text': match.group(3),
+                    })
+                elif messages:
+                    # Continuação de uma mensagem com várias linhas
+                    messages[-1]['text'] += "\n" + line.decode('utf-8', errors='replace').rstrip("\n")
+
+        indexed = self.index_messages(messages, path)
+        self._set_source(path, position, anchor)
+        return indexed
+
+    def _update_from_archive(self, archive_dir) -> int:
+        """Indexa os segmentos novos do arquivo de segmentos de um grupo."""
+        position, anchor = self._get_source(archive_dir)
+        indexed = 0
+        with ArchiveReader(archive_dir) as reader:
+            inode = os.fstat(reader.index_file.fileno()).st_ino
+
+            def segment_anchor(number):
+                entry = reader.entry(number)
+                return f"{inode}:{entry.first_seq}:{entry.offset}:{entry.length}"
+
+            # Arquivo recriado por uma extração completa: relê desde o primeiro segmento
+            if position and (len(reader) < position or segment_anchor(position - 1) != anchor):
+                self._reset_source(archive_dir)
+                position = 0
+            for number in range(position, len(reader)):
+                indexed += self.index_messages(reader.read_segment(reader.entry(number)), archive_dir)
+                self._set_source(archive_dir, number + 1, segment_anchor(number))
+        return indexed
+
+    def _update_from_sqlite(self, path, batch_size) -> int:
+        """Indexa as linhas novas do banco messages.db do gravador SQLite."""
+        last_id, anchor = self._get_source(path)
+        source = sqlite3.connect(path, timeout=30)
+        indexed = 0
+        try:
+            # Os ids são reaproveitados quando as mensagens de um grupo são substituídas:
+            # se a última linha lida mudou, relê o banco desde o início
+            if last_id:
+                row = source.execute("SELECT group_name, message_id FROM messages WHERE id = ?", (last_id,)).fetchone()
+                if row is None or f"{row[0]}\x1f{row[1]}" != anchor:
+                    self._reset_source(path)
+                    last_id = 0
+
+            while True:
+                rows = source.execute(
+                    "SELECT id, group_name, message_id, sender, timestamp, text FROM messages "
+                    "WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                indexed += self.index_messages(
+                    ({'group': row[1], 'message_id': row[2], 'sender': row[3], 'timestamp': row[4], 'text': row[5]}
+                     for row in rows),
+                    path
+                )
+                last_id = rows[-1][0]
+                self._set_source(path, last_id, f"{rows[-1][1]}\x1f{rows[-1][2]}")
+        finally:
+            source.close()
+        return indexed
+
+    def update_from_output(self, batch_size=5000) -> int:
+        """
+        Indexa as mensagens novas de todas as saídas do scraper (JSONL, texto, segmentos e SQLite).
+
+        Args:
+            batch_size (int): Quantidade de mensagens por transação
+
+        Returns:
+            int: Quantidade de mensagens novas indexadas
+        """
+        # O formato de texto não guarda o grupo: o nome vem dos checkpoints, pelo diretório do grupo
+        group_names = {group_dir_name(name): name for name in CheckpointStore(self.output_dir).checkpoints}
+
+        # (fonte, função de atualização, argumentos)
+        sources = []
+        for path in sorted(glob.glob(os.path.join(self.output_dir, "*", "messages.jsonl"))):
+            sources.append((path, self._update_from_jsonl, (path, batch_size)))
+        for path in sorted(glob.glob(os.path.join(self.output_dir, "*", "messages.txt"))):
+            dir_name = os.path.basename(os.path.dirname(path))
+            sources.append((path, self._update_from_text, (path, group_names.get(dir_name, dir_name))))
+        for path in sorted(glob.glob(os.path.join(self.output_dir, "*", "archive", "segments.idx"))):
+            sources.append((path, self._update_from_archive, (os.path.dirname(path),)))
+        sqlite_path = os.path.join(self.output_dir, "messages.db")
+        if os.path.exists(sqlite_path):
+            sources.append((sqlite_path, self._update_from_sqlite, (sqlite_path, batch_size)))
+
+        # Uma fonte com problema não impede a indexação das demais
+        indexed = 0
+        for path, update, args in sources:
+            try:
+                indexed += update(*args)
+            except Exception as e:
+                logger.warning(f"Não foi possível indexar {path}: {str(e)}")
+        return indexed
+
+    def search(self, query=None, group=None, sender=None, since=None, until=None, limit=50) -> List[Dict]:
+        """
+        Busca mensagens por texto, grupo, remetente e intervalo de tempo.
+
+        Args:
+            query (str): Consulta FTS5 sobre o texto (ex.: 'boleto OR pix', '"reunião amanhã"')
+            group (str): Nome exato do grupo
+            sender (str): Nome exato do remetente
+            since: Início do intervalo (datetime, epoch ou "AAAA-MM-DD [HH:MM]")
+            until: Fim do intervalo, inclusive (datetime, epoch ou "AAAA-MM-DD [HH:MM]");
+                uma data sem horário vale pelo dia inteiro
+            limit (int): Quantidade máxima de resultados
+
+        Returns:
+            list: Mensagens encontradas, das mais relevantes (ou mais recentes) para as demais
+        """
+        conditions, params = [], []
+        if query:
+            source = "messages_fts JOIN messages m ON m.id = messages_fts.rowid"
+            conditions.append("messages_fts MATCH ?")
+            params.append(query)
+            order = "messages_fts.rank"
+            snippet = "snippet(messages_fts, 0, '[', ']', '…', 12)"
+        else:
+            source = "messages m"
+            order = "m.epoch DESC"
+            snippet = "m.text"
+
+        if group:
+            conditions.append("m.group_name = ?")
+            params.append(group)
+        if sender:
+            conditions.append("m.sender = ?")
+            params.append(sender)
+        if since is not None:
+            conditions.append("m.epoch >= ?")
+            params.append(parse_bound(since))
+        if until is not None:
+            conditions.append("m.epoch <= ?")
+            params.append(parse_bound(until, end_of_day=True))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(
+            f"SELECT m.group_name, m.message_id, m.sender, m.timestamp, m.text, {snippet} AS snippet "
+            f"FROM {source} {where} ORDER BY {order} LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        """Fecha a conexão com o índice."""
+        self.connection.close()
+
+
+def main():
+    """Linha de comando: python -m modules.search_index {index,search} ..."""
+    parser = argparse.ArgumentParser(description="Índice de busca das mensagens extraídas do WhatsApp.")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Diretório de saída do scraper")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("index", help="Indexa as mensagens novas das saídas do scraper")
+
+    search = commands.add_parser("search", help="Busca mensagens no índice")
+    search.add_argument("query", nargs="?", help="Consulta FTS5 sobre o texto")
+    search.add_argument("--group", help="Nome exato do grupo")
+    search.add_argument("--sender", help="Nome exato do remetente")
+    search.add_argument("--since", help="Início do intervalo (AAAA-MM-DD [HH:MM])")
+    search.add_argument("--until", help="Fim do intervalo, inclusive (AAAA-MM-DD [HH:MM])")
+    search.add_argument("--limit", type=int, default=20, help="Quantidade máxima de resultados")
+
+    args = parser.parse_args()
+    index = SearchIndex(args.output_dir)
+    try:
+        if args.command == "index":
+            logger.debug(f"{index.update_from_output()} mensagens novas indexadas")
+        else:
+            index.update_from_output()
+            for result in index.search(args.query, args.group, args.sender, args.since, args.until, args.limit):
+                print(f"[{result['timestamp']}] {result['group_name']} | {result['sender']}: {result['snippet']}")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
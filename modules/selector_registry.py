@@ -0,0 +1,200 @@
+# modules/selector_registry.py
+import time
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+from core.wait_engine import WaitEngine
+from utils.logger import get_logger
+
+logger = get_logger("selector_registry")
+
+# Seletores candidatos por elemento lógico, para vários idiomas e versões do WhatsApp Web.
+# Cada candidato tem uma chave curta, usada nas estatísticas.
+SELECTORS: Dict[str, List[Tuple[str, str]]] = {
+    "carregar_anteriores": [
+        ("pt_aviso_celular", '//div[contains(text(), "Clique neste aviso para carregar mensagens mais antigas do seu celular.")]'),
+        ("pt_carregar_mais", '//div[contains(text(), "Carregar mais")]'),
+        ("pt_mensagens_anteriores", '//span[contains(text(), "mensagens anteriores")]'),
+        ("testid", '//div[contains(@data-testid, "load-earlier-messages")]'),
+        ("en_aviso_celular", '//div[contains(text(), "Click here to get older messages from your phone")]'),
+        ("en_earlier_messages", '//*[self::div or self::span][contains(text(), "earlier messages")]'),
+        ("es_aviso_celular", '//div[contains(text(), "mensajes anteriores de tu teléfono")]'),
+        ("es_mensajes_anteriores", '//*[self::div or self::span][contains(text(), "mensajes anteriores")]'),
+        ("pt_carregando", '//div[contains(text(), "Carregando")]'),
+        ("pt_carregar", '//div[contains(text(), "carregar")]'),
+    ],
+    "caixa_pesquisa": [
+        ("pt", '//div[@aria-label="Caixa de texto de pesquisa"]'),
+        ("pt_pesquisar", '//div[@contenteditable="true"][@aria-label="Pesquisar" or @title="Pesquisar"]'),
+        ("en", '//div[@contenteditable="true"][@aria-label="Search input textbox" or @aria-label="Search"]'),
+        ("es", '//div[@contenteditable="true"][@aria-label="Cuadro de texto para ingresar la búsqueda" or @aria-label="Buscar"]'),
+        ("lateral", '//div[@id="side"]//div[@contenteditable="true"][@role="textbox"]'),
+    ],
+}
+
+# Candidatos genéricos, que casam textos de vários elementos: ficam sempre por último e
+# nunca passam à frente dos específicos, mesmo depois de um acerto
+FALLBACK_SELECTORS: Dict[str, Set[str]] = {
+    "carregar_anteriores": {"pt_carregando", "pt_carregar"},
+}
+
+# Avalia todos os seletores na própria página, na ordem de prioridade, e devolve o primeiro que
+# encontrar um elemento; sem resultado, repete a cada 50 ms até o timeout.
+# arguments[0]: XPaths, arguments[1]: True para exigir elemento visível e habilitado, arguments[2]: timeout (ms)
+RACE_SELECTORS_SCRIPT = """
+const selectors = arguments[0], clickable = arguments[1], timeout = arguments[2];
+const done = arguments[arguments.length - 1];
+
+const usable = (element) => {
+    if (!clickable) { return true; }
+    if (element.disabled || !element.getClientRects().length) { return false; }
+    const style = getComputedStyle(element);
+    return style.visibility !== 'hidden' && style.pointerEvents !== 'none';
+};
+const probe = () => {
+    for (let index = 0; index < selectors.length; index++) {
+        let nodes;
+        try {
+            nodes = document.evaluate(selectors[index], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        } catch (e) {
+            continue;
+        }
+        for (let position = 0; position < nodes.snapshotLength; position++) {
+            const node = nodes.snapshotItem(position);
+            if (node.nodeType === 1 && usable(node)) { return {index: index, element: node}; }
+        }
+    }
+    return null;
+};
+
+const started = performance.now();
+const tick = () => {
+    const found = probe();
+    if (found || performance.now() - started >= timeout) {
+        done(found);
+        return;
+    }
+    setTimeout(tick, 50);
+};
+tick();
+"""
+
+
+class SelectorRegistry:
+    """
+    Localiza elementos a partir de vários seletores candidatos em uma única consulta.
+
+    Todos os candidatos de um elemento são avaliados dentro da página a cada
+    consulta, então a ausência do elemento custa uma única espera em vez de uma
+    por seletor. O seletor específico que funcionou passa a ser avaliado primeiro
+    nas próximas consultas (os genéricos ficam sempre por último), e os acertos
+    de cada candidato são contabilizados.
+    """
+    def __init__(self, driver, wait_engine=None, selectors=None, fallbacks=None):
+        """
+        Inicializa o registro.
+
+        Args:
+            driver: Instância do WebDriver Selenium
+            wait_engine (WaitEngine): Mecanismo de espera compartilhado (opcional)
+            selectors (dict): {nome: [(chave, xpath)]} (padrão: SELECTORS)
+            fallbacks (dict): {nome: {chave}} dos candidatos genéricos (padrão: FALLBACK_SELECTORS)
+        """
+        self.driver = driver
+        self.wait_engine = wait_engine or WaitEngine(driver)
+        self.selectors = {name: list(candidates) for name, candidates in (selectors or SELECTORS).items()}
+        self.fallbacks = {name: set(keys) for name, keys in (fallbacks or FALLBACK_SELECTORS).items()}
+        self.preferred: Dict[str, str] = {}
+        self.stats: Dict[str, Dict] = {}
+
+    def register(self, name, key, xpath, fallback=False):
+        """
+        Acrescenta um seletor candidato a um elemento.
+
+        Args:
+            name (str): Nome do elemento
+            key (str): Chave curta do candidato
+            xpath (str): Seletor XPath
+            fallback (bool): True para um seletor genérico, avaliado sempre depois dos específicos
+        """
+        self.selectors.setdefault(name, []).append((key, xpath))
+        if fallback:
+            self.fallbacks.setdefault(name, set()).add(key)
+
+    def candidates(self, name) -> List[Tuple[str, str]]:
+        """
+        Retorna os candidatos de um elemento na ordem de avaliação.
+
+        Args:
+            name (str): Nome do elemento
+
+        Returns:
+            list: [(chave, xpath)], com o último seletor específico que funcionou em
+                primeiro lugar e os genéricos por último
+        """
+        candidates = self.selectors[name]
+        preferred = self.preferred.get(name)
+        fallbacks = self.fallbacks.get(name, ())
+        return sorted(candidates, key=lambda candidate: (candidate[0] in fallbacks, candidate[0] != preferred))
+
+    def find(self, name, timeout=0, clickable=False):
+        """
+        Procura um elemento avaliando todos os seus seletores de uma vez.
+
+        Args:
+            name (str): Nome do elemento
+            timeout (float): Tempo máximo de espera em segundos (0 consulta uma única vez)
+            clickable (bool): True para aceitar apenas elementos visíveis e habilitados
+
+        Returns:
+            WebElement encontrado, ou None
+        """
+        candidates = self.candidates(name)
+        stats = self.stats.setdefault(name, {'lookups': 0, 'misses': 0, 'seconds': 0.0, 'hits': Counter()})
+
+        started = time.perf_counter()
+        self.wait_engine.set_script_timeout(max(30, timeout + 5))
+        result = self.driver.execute_async_script(
+            RACE_SELECTORS_SCRIPT, [xpath for _, xpath in candidates], clickable, int(timeout * 1000)
+        )
+        stats['lookups'] += 1
+        stats['seconds'] += time.perf_counter() - started
+
+        if not result:
+            stats['misses'] += 1
+            return None
+
+        key = candidates[result['index']][0]
+        stats['hits'][key] += 1
+        if self.preferred.get(name) != key and key not in self.fallbacks.get(name, ()):
+            logger.debug(f"Seletor de '{name}': {key}")
+            self.preferred[name] = key
+        return result['element']
+
+    def summary(self) -> Dict:
+        """
+        Resume as consultas de cada elemento.
+
+        Returns:
+            dict: {nome: {'lookups', 'misses', 'seconds', 'hits': {chave: acertos},
+                'hit_rates': {chave: acertos / consultas}, 'preferred'}}
+        """
+        return {
+            name: {
+                'lookups': stats['lookups'],
+                'misses': stats['misses'],
+                'seconds': round(stats['seconds'], 4),
+                'hits': dict(stats['hits']),
+                'hit_rates': {key: round(hits / stats['lookups'], 3) for key, hits in stats['hits'].items()},
+                'preferred': self.preferred.get(name),
+            }
+            for name, stats in self.stats.items()
+        }
+
+    def report(self):
+        """Registra no log as taxas de acerto de cada elemento e limpa as estatísticas."""
+        for name, entry in self.summary().items():
+            rates = ", ".join(f"{key} {rate:.0%}" for key, rate in entry['hit_rates'].items()) or "nenhum acerto"
+            logger.debug(f"Seletor '{name}': {entry['lookups']} consultas em {entry['seconds']:.2f}s, "
+                         f"{entry['misses']} sem resultado ({rates})")
+        self.stats = {}
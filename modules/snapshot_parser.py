@@ -0,0 +1,299 @@
+# modules/snapshot_parser.py
+import argparse
+import glob
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from modules.dom_snapshot import SNAPSHOT_ROW_CLASS
+from modules.output_writers import build_message, create_writer
+from utils.logger import get_logger
+from utils.timestamp_normalizer import TimestampNormalizer
+
+logger = get_logger("snapshot_parser")
+
+# Bibliotecas de parsing opcionais: selectolax (mais rápida) ou lxml
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# Os blocos são sempre UTF-8; sem isso, o lxml decodificaria como latin-1 documentos sem <meta charset>
+LXML_PARSER = lxml_html.HTMLParser(encoding='utf-8') if lxml_html is not None else None
+
+# Todos os nós relevantes de um bloco, selecionados em uma única consulta (ordem do documento).
+# Equivalem às regras de MESSAGE_RECORD_JS (content_extractor).
+SNAPSHOT_CSS = ", ".join((
+    f"div.{SNAPSHOT_ROW_CLASS}",
+    "[data-id]",
+    'span[data-testid="author"]',
+    'div[data-testid="msg-meta"]',
+    'div[data-testid="msg-container"] span[dir="ltr"]',
+    ".copyable-text[data-pre-plain-text]",
+    "img[src]",
+    "a[href]",
+))
+SNAPSHOT_XPATH = " | ".join((
+    f'//div[@class="{SNAPSHOT_ROW_CLASS}"]',
+    "//*[@data-id]",
+    '//span[@data-testid="author"]',
+    '//div[@data-testid="msg-meta"]',
+    '//div[@data-testid="msg-container"]//span[@dir="ltr"]',
+    '//*[contains(concat(" ", normalize-space(@class), " "), " copyable-text ") and @data-pre-plain-text]',
+    "//img[@src]",
+    "//a[@href]",
+))
+
+
+def available_backend(backend=None) -> str:
+    """
+    Escolhe a biblioteca de parsing.
+
+    Args:
+        backend (str): "selectolax", "lxml" ou None para a primeira disponível
+
+    Returns:
+        str: Nome da biblioteca escolhida
+    """
+    if backend in (None, "selectolax") and HTMLParser is not None:
+        return "selectolax"
+    if backend in (None, "lxml") and lxml_html is not None:
+        return "lxml"
+    raise ImportError(
+        "O parser offline de snapshots requer selectolax ou lxml (pip install selectolax)"
+        if backend is None else f"Biblioteca de parsing indisponível: {backend}"
+    )
+
+
+def _group_rows(nodes, attributes, text) -> List[Dict]:
+    """
+    Distribui os nós selecionados entre as mensagens do bloco.
+
+    Os nós chegam na ordem do documento, então cada nó pertence à última
+    linha de snapshot encontrada antes dele. Isso evita uma consulta por
+    campo de cada mensagem, que domina o tempo de parsing.
+
+    Args:
+        nodes: Nós retornados por SNAPSHOT_CSS/SNAPSHOT_XPATH
+        attributes (callable): Função que retorna os atributos de um nó
+        text (callable): Função que retorna o texto de um nó
+
+    Returns:
+        list: Campos brutos de cada mensagem
+    """
+    rows = []
+    row = None
+    for node in nodes:
+        attrs = attributes(node)
+        classes = (attrs.get('class') or "").split()
+
+        if SNAPSHOT_ROW_CLASS in classes:
+            row = {
+                'seq': int(attrs.get('data-seq') or 0),
+                'message_id': attrs.get('data-message-id') or None,
+                'pre_plain_text': None,
+                'sender': None,
+                'timestamp': None,
+                'text': None,
+                'images': [],
+                'documents': [],
+            }
+            rows.append(row)
+            continue
+        if row is None:
+            continue
+
+        tag = node.tag
+        testid = attrs.get('data-testid')
+        if tag == 'span' and testid == 'author':
+            if row['sender'] is None:
+                row['sender'] = text(node)
+        elif tag == 'div' and testid == 'msg-meta':
+            if row['timestamp'] is None:
+                row['timestamp'] = text(node)
+        elif tag == 'span' and attrs.get('dir') == 'ltr':
+            if row['text'] is None:
+                row['text'] = text(node).strip()
+        elif tag == 'img':
+            if attrs.get('tabindex') != "-1" and attrs.get('src'):
+                row['images'].append(attrs['src'])
+        elif tag == 'a':
+            href = attrs.get('href')
+            if href and ("blob:" in href or "https://" in href):
+                row['documents'].append((href, attrs.get('download') or ""))
+        elif 'copyable-text' in classes and row['pre_plain_text'] is None:
+            row['pre_plain_text'] = attrs.get('data-pre-plain-text')
+
+        if row['message_id'] is None and attrs.get('data-id'):
+            row['message_id'] = attrs['data-id']
+    return rows
+
+
+def _parse_rows_selectolax(document: str):
+    """Extrai os campos brutos de cada mensagem com selectolax."""
+    tree = HTMLParser(document)
+    header = dict(tree.body.attributes) if tree.body is not None else {}
+    rows = _group_rows(tree.css(SNAPSHOT_CSS), lambda node: node.attributes, lambda node: node.text())
+    return header, rows
+
+
+def _parse_rows_lxml(document: str):
+    """Extrai os campos brutos de cada mensagem com lxml."""
+    tree = lxml_html.document_fromstring(document.encode('utf-8'), parser=LXML_PARSER)
+    body = tree.find('body')
+    header = dict(body.attrib) if body is not None else {}
+    rows = _group_rows(tree.xpath(SNAPSHOT_XPATH), lambda node: node.attrib, lambda node: node.text_content())
+    return header, rows
+
+
+def parse_snapshot_html(document: str, backend=None) -> Dict:
+    """
+    Converte um bloco de snapshot em registros de mensagem, sem navegador.
+
+    Args:
+        document (str): HTML de um bloco gravado pelo SnapshotWriter
+        backend (str): "selectolax", "lxml" ou None para a primeira disponível
+
+    Returns:
+        dict: {'group', 'run', 'chunk', 'records'}; os registros seguem o formato
+            do ContentExtractor, com o campo extra 'seq' (ordem da coleta)
+    """
+    if available_backend(backend) == "selectolax":
+        header, rows = _parse_rows_selectolax(document)
+    else:
+        header, rows = _parse_rows_lxml(document)
+
+    records = []
+    for row in rows:
+        records.append({
+            'seq': row['seq'],
+            'message_id': row['message_id'] or None,
+            'pre_plain_text': row['pre_plain_text'],
+            'sender': row['sender'] or "Você",
+            'timestamp': row['timestamp'],
+            'text': row['text'] or "",
+            'images': row['images'],
+            'documents': row['documents'],
+        })
+    return {
+        'group': header.get('data-group'),
+        'run': header.get('data-run') or "",
+        'chunk': int(header.get('data-chunk') or 0),
+        'records': records,
+    }
+
+
+def parse_snapshot_file(path, backend=None) -> Dict:
+    """
+    Lê e converte um arquivo de snapshot (.html.gz).
+
+    Args:
+        path (str): Caminho do arquivo
+        backend (str): Biblioteca de parsing (opcional)
+
+    Returns:
+        dict: Resultado de parse_snapshot_html
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return parse_snapshot_html(f.read(), backend)
+
+
+def parse_snapshot_dir(snapshot_dir, workers=None, backend=None) -> Dict:
+    """
+    Converte todos os snapshots de um grupo, opcionalmente em vários processos.
+
+    Cada arquivo é independente, então os blocos são distribuídos entre os
+    processos e os resultados são combinados em ordem cronológica, sem
+    mensagens repetidas entre execuções de sincronização.
+
+    Args:
+        snapshot_dir (str): Diretório com os arquivos .html.gz
+        workers (int): Quantidade de processos (1 para processar no processo atual;
+            None para um por núcleo)
+        backend (str): Biblioteca de parsing (opcional)
+
+    Returns:
+        dict: {'group', 'records'} com os registros do mais antigo para o mais recente
+    """
+    paths = sorted(glob.glob(os.path.join(snapshot_dir, "*.html.gz")))
+    available_backend(backend)
+
+    if workers == 1 or len(paths) <= 1:
+        chunks = [parse_snapshot_file(path, backend) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(parse_snapshot_file, paths, [backend] * len(paths), chunksize=4))
+
+    # Execuções mais antigas primeiro; dentro de cada uma, a coleta vai do mais recente ao mais antigo
+    entries = [(chunk['run'], record) for chunk in chunks for record in chunk['records']]
+    entries.sort(key=lambda entry: (entry[0], -entry[1]['seq']))
+
+    records = []
+    seen_ids = set()
+    for _, record in entries:
+        message_id = record['message_id']
+        if message_id:
+            if message_id in seen_ids:
+                continue
+            seen_ids.add(message_id)
+        records.append(record)
+
+    # Completa os timestamps de todas as mensagens em um único lote
+    TimestampNormalizer().normalize_records(records)
+
+    group_name = next((chunk['group'] for chunk in chunks if chunk['group']), None)
+    return {'group': group_name, 'records': records}
+
+
+def reparse_group(group_dir, output_format="jsonl", output_dir=None, workers=None, backend=None) -> int:
+    """
+    Regrava a saída de mensagens de um grupo a partir dos snapshots capturados.
+
+    Args:
+        group_dir (str): Diretório do grupo (contém a pasta snapshots/)
+        output_format (str): Formato de saída ("jsonl", "sqlite", "txt" ou "archive")
+        output_dir (str): Diretório do banco SQLite compartilhado (padrão: pai de group_dir)
+        workers (int): Quantidade de processos de parsing
+        backend (str): Biblioteca de parsing (opcional)
+
+    Returns:
+        int: Quantidade de mensagens gravadas
+    """
+    group_dir = os.path.normpath(group_dir)
+    parsed = parse_snapshot_dir(os.path.join(group_dir, "snapshots"), workers, backend)
+    group_name = parsed['group'] or os.path.basename(group_dir)
+
+    # A mídia já baixada não é referenciada aqui: o manifesto do grupo continua valendo
+    writer = create_writer(output_format, group_name, group_dir, output_dir or os.path.dirname(group_dir), truncate=True)
+    with writer:
+        writer.write_many(build_message(group_name, record) for record in parsed['records'])
+    return writer.count
+
+
+def main(args: Optional[List[str]] = None):
+    """Linha de comando: python -m modules.snapshot_parser <diretório do grupo> ..."""
+    parser = argparse.ArgumentParser(description="Reprocessa os snapshots de DOM de um grupo sem navegador.")
+    parser.add_argument("group_dirs", nargs="+", help="Diretórios dos grupos (com a pasta snapshots/)")
+    parser.add_argument("--format", default="jsonl", choices=("jsonl", "sqlite", "txt", "archive"), help="Formato de saída")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de parsing (padrão: um por núcleo)")
+    parser.add_argument("--backend", choices=("selectolax", "lxml"), default=None, help="Biblioteca de parsing")
+    options = parser.parse_args(args)
+
+    for group_dir in options.group_dirs:
+        started = time.perf_counter()
+        count = reparse_group(group_dir, options.format, workers=options.workers, backend=options.backend)
+        logger.debug(f"{group_dir}: {count} mensagens reprocessadas em {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
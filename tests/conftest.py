@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# Os módulos do projeto são importados a partir da raiz do repositório (core., modules., utils.)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,26 @@
+# tests/test_chat_interaction.py
+import datetime
+
+import pytest
+
+from modules.chat_interaction import ChatInteraction
+
+
+class FakeDriver:
+    """Devolve os divisores e o prefixo mais antigos renderizados."""
+    def __init__(self, dividers, prefix=None):
+        self.oldest = {'dividers': dividers, 'prefix': prefix}
+
+    def execute_script(self, script):
+        return self.oldest
+
+
+def chat(dividers, prefix=None):
+    return ChatInteraction(FakeDriver(dividers, prefix), wait_engine=object(), use_index=False, selector_registry=object())
+
+
+@pytest.mark.parametrize("since", [datetime.date(2024, 3, 12), "2024-03-12", datetime.datetime(2024, 3, 12)])
+def test_reached_date_accepts_any_since(since):
+    assert chat(["12/03/2024"]).reached_date(since) is True
+    assert chat(["13/03/2024"]).reached_date(since) is False
+    assert chat([], "[23:59, 11/03/2024] Ana: ").reached_date(since) is True
@@ -0,0 +1,108 @@
+# tests/test_checkpoint_store.py
+from modules.checkpoint_store import CheckpointStore, GroupSync, read_lines_reversed
+from modules.file_manager import FileManager
+
+
+class ListWriter:
+    """Gravador em memória com a interface de MessageWriter usada por GroupSync."""
+    def __init__(self):
+        self.messages = []
+        self.commits = 0
+
+    def write(self, message):
+        self.messages.append(message)
+
+    def commit(self):
+        self.commits += 1
+
+    @property
+    def ids(self):
+        return [message['message_id'] for message in self.messages]
+
+
+def records(*numbers):
+    """Registros do harvester, na ordem informada (do mais recente para o mais antigo)."""
+    return [{'message_id': f"m{number}", 'timestamp': f"2024-01-01-10:{number:02d}"} for number in numbers]
+
+
+def run_batches(sync, batches, stop_after=None):
+    """Filtra e grava os lotes como extract_group_content, parando após stop_after lotes."""
+    for index, batch in enumerate(batches):
+        if stop_after is not None and index == stop_after:
+            return
+        new_records = sync.filter_batch(batch)
+        sync.commit_batch(new_records, [{'message_id': record['message_id']} for record in new_records])
+        if sync.reached:
+            return
+
+
+def new_sync(tmp_path, store):
+    return GroupSync(store, FileManager(None, str(tmp_path), None), "Grupo", str(tmp_path))
+
+
+def test_full_sync_writes_chronologically_and_sets_checkpoint(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    sync = new_sync(tmp_path, store)
+    run_batches(sync, [records(9, 8, 7, 6, 5), records(4, 3, 2, 1, 0)])
+
+    writer = ListWriter()
+    assert sync.finish(writer) == 10
+    assert writer.ids == [f"m{number}" for number in range(10)]
+    assert writer.commits == 1
+
+    checkpoint = store.get("Grupo")
+    assert checkpoint['message_id'] == "m9"
+    assert checkpoint['pending'] == []
+    assert not list(tmp_path.glob(".sync-*.tmp"))
+
+
+def test_incremental_sync_stops_at_checkpoint(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.complete("Grupo", "m9", "2024-01-01-10:09")
+
+    sync = new_sync(tmp_path, store)
+    run_batches(sync, [records(11, 10, 9, 8), records(7, 6)])
+    assert sync.reached
+
+    writer = ListWriter()
+    assert sync.finish(writer) == 2
+    assert writer.ids == ["m10", "m11"]
+    assert store.get("Grupo")['message_id'] == "m11"
+
+
+def test_resumed_sync_skips_committed_range_inside_a_batch(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+
+    # Primeira execução interrompida após gravar m9..m6
+    interrupted = new_sync(tmp_path, store)
+    run_batches(interrupted, [records(9, 8, 7, 6), records(5, 4)], stop_after=1)
+    pending = store.get("Grupo")['pending']
+    assert [(r['newest_id'], r['oldest_id']) for r in pending] == [("m9", "m6")]
+
+    # Chegaram m10 e m11; o primeiro lote começa com mensagens novas e entra na faixa já gravada
+    resumed = new_sync(tmp_path, store)
+    run_batches(resumed, [records(11, 10, 9, 8), records(7, 6, 5, 4), records(3, 2, 1, 0)])
+
+    ranges = [(r['newest_id'], r['oldest_id']) for r in store.get("Grupo")['pending']]
+    assert ranges == [("m9", "m6"), ("m11", "m10"), ("m5", "m0")]
+
+    writer = ListWriter()
+    assert resumed.finish(writer) == 12
+    assert writer.ids == [f"m{number}" for number in range(12)]
+    assert store.get("Grupo")['message_id'] == "m11"
+
+
+def test_checkpoint_store_persists_between_instances(tmp_path):
+    CheckpointStore(str(tmp_path)).save_pending("Grupo", [{'newest_id': "m3", 'oldest_id': "m1", 'file': ".sync-0000.tmp"}])
+    assert CheckpointStore(str(tmp_path)).get("Grupo")['pending'][0]['newest_id'] == "m3"
+
+
+def test_read_lines_reversed_in_small_blocks(tmp_path):
+    lines = ["primeira", "", "çãõ " * 10, "x" * 50, "última"]
+    path = tmp_path / "faixa.tmp"
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    expected = [line for line in reversed(lines) if line]
+    for block_size in (1, 3, 7, 1024):
+        assert list(read_lines_reversed(str(path), block_size)) == expected
+    path.write_text("sem quebra final", encoding='utf-8')
+    assert list(read_lines_reversed(str(path), 4)) == ["sem quebra final"]
@@ -0,0 +1,107 @@
+# tests/test_message_archive.py
+import pytest
+
+from modules import message_archive
+from modules.message_archive import (INDEX_FILE, INDEX_RECORD, SEGMENT_FILE, ArchiveReader, SegmentArchive,
+                                     available_codec, main)
+
+
+def message(number, day=1):
+    return {
+        'group': "Grupo", 'message_id': f"m{number}", 'sender': "Ana", 'timestamp': f"2024-01-{day:02d}-10:{number:02d}",
+        'text': f"mensagem {number} çã", 'media': [],
+    }
+
+
+@pytest.fixture(params=["none", "zlib", "zstd"])
+def codec(request):
+    """Codec dos segmentos; os casos zstd são pulados sem o pacote zstandard."""
+    if request.param == "zstd":
+        pytest.importorskip("zstandard")
+    return request.param
+
+
+def write_days(archive_dir, days=4, per_day=3, codec="zlib"):
+    """Um segmento por dia, com per_day mensagens cada."""
+    archive = SegmentArchive(str(archive_dir), codec=codec)
+    for day in range(1, days + 1):
+        archive.append([message((day - 1) * per_day + n, day) for n in range(per_day)], fsync=False)
+    archive.close()
+
+
+def test_round_trip(tmp_path, codec):
+    write_days(tmp_path, codec=codec)
+    with ArchiveReader(str(tmp_path)) as reader:
+        assert len(reader) == 4
+        messages = list(reader.query())
+        assert [m['message_id'] for m in messages] == [f"m{n}" for n in range(12)]
+        assert messages[0]['text'] == "mensagem 0 çã"
+        assert reader.entry(3).first_seq == 9 and reader.entry(3).last_seq == 11
+
+
+def test_reopen_appends_after_existing_segments(tmp_path):
+    write_days(tmp_path, days=2)
+    archive = SegmentArchive(str(tmp_path), codec="zlib")
+    entry = archive.append([message(50, day=5)], fsync=False)
+    archive.close()
+    assert (entry.number, entry.first_seq) == (2, 6)
+
+    # truncate=True descarta os segmentos anteriores
+    SegmentArchive(str(tmp_path), codec="zlib", truncate=True).close()
+    with ArchiveReader(str(tmp_path)) as reader:
+        assert len(reader) == 0
+
+
+def test_incomplete_write_is_discarded_on_reopen(tmp_path, codec):
+    write_days(tmp_path, days=2, codec=codec)
+    # Falha no meio de uma gravação: segmento sem registro e registro pela metade
+    with open(tmp_path / SEGMENT_FILE, 'ab') as f:
+        f.write(b"segmento incompleto")
+    with open(tmp_path / INDEX_FILE, 'ab') as f:
+        f.write(b"\0" * (INDEX_RECORD.size // 2))
+
+    archive = SegmentArchive(str(tmp_path), codec=codec)
+    archive.append([message(30, day=9)], fsync=False)
+    archive.close()
+    with ArchiveReader(str(tmp_path)) as reader:
+        assert len(reader) == 3
+        assert [m['message_id'] for m in reader.query()][-2:] == ["m5", "m30"]
+
+
+def test_query_reads_only_overlapping_segments(tmp_path, codec):
+    write_days(tmp_path, codec=codec)
+    with ArchiveReader(str(tmp_path)) as reader:
+        assert [m['message_id'] for m in reader.query("2024-01-02", "2024-01-03")] == [f"m{n}" for n in range(3, 9)]
+        assert reader.segments_read == 2
+        assert [entry.number for entry in reader.entries(since="2024-01-04")] == [3]
+
+
+def test_get_uses_id_filter(tmp_path):
+    write_days(tmp_path)
+    with ArchiveReader(str(tmp_path)) as reader:
+        assert reader.get("m4")['timestamp'] == "2024-01-02-10:04"
+        assert reader.segments_read == 1
+        assert reader.get("inexistente") is None
+        assert reader.segments_read == 1
+
+
+def test_codec_selection(monkeypatch, capsys):
+    with pytest.raises(ValueError):
+        available_codec("lz4")
+    assert available_codec("zlib") == message_archive.CODEC_ZLIB
+
+    # Sem zstandard, o padrão cai para zlib com um aviso
+    monkeypatch.setattr(message_archive, "zstandard", None)
+    assert available_codec() == message_archive.CODEC_ZLIB
+    assert "zstandard" in capsys.readouterr().out
+    with pytest.raises(ImportError):
+        available_codec("zstd")
+
+
+def test_command_line(tmp_path, capsys):
+    write_days(tmp_path / "archive")
+    main([str(tmp_path), "--since", "2024-01-04"])
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 4 and '"m9"' in lines[0]
+    # A estatística de leitura vai para o logger, depois das mensagens
+    assert lines[3] == "[DEBUG] 1 de 4 segmentos lidos"
@@ -0,0 +1,155 @@
+# tests/test_output_writers.py
+import json
+import sqlite3
+
+import pytest
+
+from modules.checkpoint_store import CheckpointStore, GroupSync
+from modules.file_manager import FileManager
+from modules.message_archive import ArchiveReader
+from modules.output_writers import MESSAGE_FIELDS, build_message, create_writer
+
+
+def message(number, group="Grupo"):
+    return {
+        'group': group, 'message_id': f"m{number}", 'sender': "Ana", 'timestamp': f"2024-01-01-10:{number:02d}",
+        'text': f"texto {number}", 'media': [],
+    }
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_build_message_uses_fixed_schema():
+    record = {'message_id': "m1", 'sender': "Ana", 'timestamp': "10:00", 'text': None, 'epoch': 1}
+    built = build_message("Grupo", record, [{'kind': 'images', 'name': "a.jpg", 'url': "http://x"}])
+    assert tuple(built) == MESSAGE_FIELDS
+    assert built['text'] == ""
+    assert built['media'][0]['name'] == "a.jpg"
+
+
+def test_jsonl_writer_batches_and_truncates(tmp_path):
+    with create_writer("jsonl", "Grupo", str(tmp_path), str(tmp_path), batch_size=2) as writer:
+        writer.write_many([message(0), message(1), None, message(2)])
+        assert writer.count == 2
+    assert writer.count == 3
+    assert [m['message_id'] for m in read_jsonl(tmp_path / "messages.jsonl")] == ["m0", "m1", "m2"]
+
+    with create_writer("jsonl", "Grupo", str(tmp_path), str(tmp_path)) as writer:
+        writer.write(message(3))
+    assert len(read_jsonl(tmp_path / "messages.jsonl")) == 4
+
+    with create_writer("jsonl", "Grupo", str(tmp_path), str(tmp_path), truncate=True) as writer:
+        writer.write(message(4))
+    assert [m['message_id'] for m in read_jsonl(tmp_path / "messages.jsonl")] == ["m4"]
+
+
+def test_text_writer_keeps_original_line_format(tmp_path):
+    media_only = dict(message(1), text="")
+    with create_writer("txt", "Grupo", str(tmp_path), str(tmp_path)) as writer:
+        writer.write_many([message(0), media_only])
+    assert (tmp_path / "messages.txt").read_text(encoding='utf-8') == "[2024-01-01-10:00] Ana: texto 0\n"
+
+
+def test_sqlite_writer_ignores_repeated_messages_and_truncates_per_group(tmp_path):
+    group_dir = tmp_path / "Grupo"
+    with create_writer("sqlite", "Grupo", str(group_dir), str(tmp_path)) as writer:
+        writer.write_many([message(0), message(1), message(1)])
+    with create_writer("sqlite", "Outro", str(group_dir), str(tmp_path)) as writer:
+        writer.write(message(0, group="Outro"))
+    with create_writer("sqlite", "Grupo", str(group_dir), str(tmp_path), truncate=True) as writer:
+        writer.write(message(2))
+
+    connection = sqlite3.connect(str(tmp_path / "messages.db"))
+    rows = connection.execute("SELECT group_name, message_id FROM messages ORDER BY id").fetchall()
+    connection.close()
+    assert rows == [("Outro", "m0"), ("Grupo", "m2")]
+
+
+def written_ids(tmp_path, kind):
+    """Ids gravados no destino de cada formato, na ordem do arquivo."""
+    if kind == "jsonl":
+        return [m['message_id'] for m in read_jsonl(tmp_path / "messages.jsonl")]
+    if kind == "txt":
+        lines = (tmp_path / "messages.txt").read_text(encoding='utf-8').splitlines()
+        return ["m" + line.rsplit(" ", 1)[1] for line in lines]
+    if kind == "archive":
+        with ArchiveReader(str(tmp_path / "archive")) as reader:
+            return [m['message_id'] for m in reader.query()]
+    connection = sqlite3.connect(str(tmp_path / "messages.db"))
+    ids = [row[0] for row in connection.execute("SELECT message_id FROM messages ORDER BY id")]
+    connection.close()
+    return ids
+
+
+@pytest.mark.parametrize("kind", ["jsonl", "txt", "sqlite", "archive"])
+def test_replacement_is_applied_only_on_commit(tmp_path, kind):
+    with create_writer(kind, "Grupo", str(tmp_path), str(tmp_path)) as writer:
+        writer.write_many([message(0), message(1)])
+
+    # Extração completa interrompida: a saída anterior continua intacta e a preparação é descartada
+    writer = create_writer(kind, "Grupo", str(tmp_path), str(tmp_path), truncate=True, batch_size=1)
+    writer.write_many([message(5), message(6)])
+    writer.close()
+    assert written_ids(tmp_path, kind) == ["m0", "m1"]
+    assert not [path for path in tmp_path.iterdir() if path.name.endswith(".tmp")]
+
+    with pytest.raises(RuntimeError):
+        with create_writer(kind, "Grupo", str(tmp_path), str(tmp_path), truncate=True) as writer:
+            writer.write(message(7))
+            raise RuntimeError("navegador fechado")
+    assert written_ids(tmp_path, kind) == ["m0", "m1"]
+
+    # Confirmada, a nova saída substitui a anterior e recebe as gravações seguintes
+    writer = create_writer(kind, "Grupo", str(tmp_path), str(tmp_path), truncate=True, batch_size=1)
+    writer.write_many([message(5), message(6)])
+    writer.commit()
+    writer.write(message(8))
+    writer.close()
+    assert written_ids(tmp_path, kind) == ["m5", "m6", "m8"]
+
+
+def test_unknown_format_raises(tmp_path):
+    with pytest.raises(ValueError):
+        create_writer("xml", "Grupo", str(tmp_path), str(tmp_path))
+
+
+@pytest.mark.parametrize("kind", ["jsonl", "sqlite"])
+def test_full_extraction_then_sync_keeps_output_chronological(tmp_path, kind):
+    store = CheckpointStore(str(tmp_path))
+    file_manager = FileManager(None, str(tmp_path), None)
+
+    def extract(batches, sync):
+        # Mesmo fluxo de extract_group_content: lotes do mais recente para o mais antigo
+        group_sync = GroupSync(store, file_manager, "Grupo", str(tmp_path), resume=sync)
+        with create_writer(kind, "Grupo", str(tmp_path), str(tmp_path), truncate=not sync) as writer:
+            for batch in batches:
+                records = group_sync.filter_batch([{'message_id': f"m{n}", 'timestamp': None} for n in batch])
+                group_sync.commit_batch(records, [message(int(r['message_id'][1:])) for r in records])
+                if group_sync.reached:
+                    break
+            return group_sync.finish(writer)
+
+    assert extract([range(9, 4, -1), range(4, -1, -1)], sync=False) == 10
+    assert extract([range(12, 7, -1)], sync=True) == 3
+
+    if kind == "jsonl":
+        written = [m['message_id'] for m in read_jsonl(tmp_path / "messages.jsonl")]
+    else:
+        connection = sqlite3.connect(str(tmp_path / "messages.db"))
+        written = [row[0] for row in connection.execute("SELECT message_id FROM messages ORDER BY id")]
+        connection.close()
+    assert written == [f"m{n}" for n in range(13)]
+
+
+def test_full_extraction_discards_pending_ranges(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    (tmp_path / ".sync-0000.tmp").write_text(json.dumps(message(7)) + "\n", encoding='utf-8')
+    store.save_pending("Grupo", [{'newest_id': "m7", 'oldest_id': "m7", 'file': ".sync-0000.tmp"}])
+
+    group_sync = GroupSync(store, FileManager(None, str(tmp_path), None), "Grupo", str(tmp_path), resume=False)
+    assert group_sync.ranges == []
+    assert store.get("Grupo")['pending'] == []
+    assert not (tmp_path / ".sync-0000.tmp").exists()
@@ -0,0 +1,126 @@
+# tests/test_search_index.py
+import datetime
+import json
+import os
+
+import pytest
+
+from modules.checkpoint_store import CheckpointStore
+from modules.output_writers import create_writer, group_dir_name
+from modules.search_index import SearchIndex
+
+
+def message(number, group="Grupo", day=1):
+    return {
+        'group': group, 'message_id': f"{group}-m{number}", 'sender': "Ana",
+        'timestamp': f"2024-01-{day:02d}-{10 + number % 12:02d}:{number % 60:02d}", 'text': f"mensagem numero{number}",
+        'media': [],
+    }
+
+
+def write(tmp_path, kind, messages, group="Grupo", truncate=False):
+    group_dir = tmp_path / group
+    group_dir.mkdir(exist_ok=True)
+    with create_writer(kind, group, str(group_dir), str(tmp_path), truncate=truncate) as writer:
+        writer.write_many(messages)
+
+
+@pytest.fixture
+def index(tmp_path):
+    search_index = SearchIndex(str(tmp_path))
+    yield search_index
+    search_index.close()
+
+
+def ids(results):
+    return sorted(result['message_id'] for result in results)
+
+
+@pytest.mark.parametrize("kind", ["jsonl", "txt", "sqlite", "archive"])
+def test_update_indexes_only_new_messages(tmp_path, index, kind):
+    write(tmp_path, kind, [message(n) for n in range(3)])
+    assert index.update_from_output() == 3
+
+    write(tmp_path, kind, [message(n) for n in range(3, 5)])
+    assert index.update_from_output() == 2
+    assert index.update_from_output() == 0
+    assert len(index.search(group="Grupo", limit=100)) == 5
+
+
+@pytest.mark.parametrize("kind", ["jsonl", "txt", "sqlite", "archive"])
+def test_rewritten_output_is_reindexed_from_the_start(tmp_path, index, kind):
+    write(tmp_path, kind, [message(n) for n in range(3)])
+    index.update_from_output()
+
+    # Extração completa: a saída é substituída por um conteúdo diferente e maior
+    rewritten = [dict(message(n), text=f"reescrita numero{n}") for n in range(10, 30)]
+    write(tmp_path, kind, rewritten, truncate=True)
+    assert index.update_from_output() == 20
+    assert len(index.search("reescrita", limit=100)) == 20
+
+
+def test_appended_jsonl_with_same_prefix_continues_after_it(tmp_path, index):
+    write(tmp_path, "jsonl", [message(n) for n in range(3)])
+    index.update_from_output()
+
+    write(tmp_path, "jsonl", [message(n) for n in range(3, 6)])
+    assert index.update_from_output() == 3
+
+
+@pytest.mark.parametrize("kind", ["jsonl", "txt", "sqlite", "archive"])
+def test_rewritten_source_replaces_its_indexed_messages(tmp_path, index, kind):
+    without_id = dict(message(9), message_id=None, text="sem id")
+    write(tmp_path, kind, [message(0), message(1), message(2), without_id])
+    index.update_from_output()
+
+    # Mensagem editada, mensagem removida e mensagem sem id relidas na extração completa
+    write(tmp_path, kind, [dict(message(0), text="editada"), message(2), without_id], truncate=True)
+    index.update_from_output()
+
+    texts = sorted(result['text'] for result in index.search(group="Grupo", limit=100))
+    assert texts == ["editada", "mensagem numero2", "sem id"]
+    assert index.search("numero1") == []
+
+
+def test_text_source_uses_group_name_from_checkpoints(tmp_path, index):
+    CheckpointStore(str(tmp_path)).complete("Grupo: A/B", "m1", None)
+    group_dir = tmp_path / group_dir_name("Grupo: A/B")
+    group_dir.mkdir()
+    with create_writer("txt", "Grupo: A/B", str(group_dir), str(tmp_path)) as writer:
+        writer.write(dict(message(1), group="Grupo: A/B"))
+    write(tmp_path, "jsonl", [dict(message(2), group="Grupo: A/B")], group=group_dir_name("Grupo: A/B"))
+
+    index.update_from_output()
+    assert {result['group_name'] for result in index.search(limit=100)} == {"Grupo: A/B"}
+
+
+def test_broken_source_does_not_stop_the_others(tmp_path, index):
+    broken_dir = tmp_path / "Quebrado"
+    broken_dir.mkdir()
+    (broken_dir / "messages.jsonl").write_text(json.dumps(message(0, "Quebrado")) + "\n{inválido\n", encoding='utf-8')
+    (tmp_path / "messages.db").write_bytes(b"isto nao e um banco sqlite" * 100)
+    write(tmp_path, "jsonl", [message(n, "Outro") for n in range(2)], group="Outro")
+
+    assert index.update_from_output() == 3
+    assert ids(index.search(group="Outro")) == ["Outro-m0", "Outro-m1"]
+
+
+def test_until_date_includes_the_whole_day(tmp_path, index):
+    write(tmp_path, "jsonl", [message(1, day=1), message(2, day=2), message(3, day=3)])
+    index.update_from_output()
+
+    assert ids(index.search(since="2024-01-02", until="2024-01-02")) == ["Grupo-m2"]
+    assert ids(index.search(until="2024-01-02")) == ["Grupo-m1", "Grupo-m2"]
+    assert ids(index.search(until=datetime.date(2024, 1, 1))) == ["Grupo-m1"]
+    assert ids(index.search(since="2024-01-03 00:00")) == ["Grupo-m3"]
+
+
+def test_fulltext_search_filters_by_group_and_sender(tmp_path, index):
+    write(tmp_path, "jsonl", [message(1), dict(message(2), sender="Bruno", text="boleto pago")])
+    write(tmp_path, "jsonl", [dict(message(1, "Outro"), text="boleto vencido")], group="Outro")
+    index.update_from_output()
+
+    assert ids(index.search("boleto")) == ["Grupo-m2", "Outro-m1"]
+    assert ids(index.search("boleto", group="Grupo")) == ["Grupo-m2"]
+    assert ids(index.search(sender="Bruno")) == ["Grupo-m2"]
+    assert os.path.exists(tmp_path / "search.db")
@@ -0,0 +1,45 @@
+# tests/test_selector_registry.py
+from modules.selector_registry import SelectorRegistry
+
+SELECTORS = {"botao": [("especifico", "//a"), ("outro", "//b"), ("generico", "//c")]}
+
+
+class FakeWaitEngine:
+    def set_script_timeout(self, seconds):
+        pass
+
+
+class FakeDriver:
+    """Devolve o candidato com a chave informada, na posição em que foi avaliado."""
+    def __init__(self):
+        self.found = None
+
+    def execute_async_script(self, script, xpaths, clickable, timeout):
+        xpath = dict(SELECTORS["botao"])[self.found]
+        return {'index': xpaths.index(xpath), 'element': self.found}
+
+
+def registry():
+    return SelectorRegistry(FakeDriver(), FakeWaitEngine(), SELECTORS, fallbacks={"botao": {"generico"}})
+
+
+def test_specific_hit_is_promoted():
+    selectors = registry()
+    selectors.driver.found = "outro"
+    assert selectors.find("botao") == "outro"
+    assert [key for key, _ in selectors.candidates("botao")] == ["outro", "especifico", "generico"]
+
+
+def test_fallback_hit_stays_last():
+    selectors = registry()
+    selectors.driver.found = "outro"
+    selectors.find("botao")
+    selectors.driver.found = "generico"
+    assert selectors.find("botao") == "generico"
+    # O acerto do genérico é contado, mas não muda a ordem nem o preferido
+    assert [key for key, _ in selectors.candidates("botao")] == ["outro", "especifico", "generico"]
+    assert selectors.summary()["botao"]['preferred'] == "outro"
+    assert selectors.summary()["botao"]['hits'] == {"outro": 1, "generico": 1}
+
+    selectors.register("botao", "novo_generico", "//d", fallback=True)
+    assert [key for key, _ in selectors.candidates("botao")][-2:] == ["generico", "novo_generico"]
@@ -0,0 +1,101 @@
+# tests/test_snapshot_parser.py
+import json
+import time
+
+import pytest
+
+from modules import snapshot_parser
+from modules.dom_snapshot import SnapshotWriter
+from modules.snapshot_parser import parse_snapshot_dir, parse_snapshot_html, reparse_group
+
+pytestmark = pytest.mark.skipif(
+    snapshot_parser.HTMLParser is None and snapshot_parser.lxml_html is None, reason="requer selectolax ou lxml"
+)
+
+BACKENDS = [
+    pytest.param("selectolax", marks=pytest.mark.skipif(snapshot_parser.HTMLParser is None, reason="selectolax indisponível")),
+    pytest.param("lxml", marks=pytest.mark.skipif(snapshot_parser.lxml_html is None, reason="lxml indisponível")),
+]
+
+
+def row_html(number, sender="Ana", text=None, image=None):
+    """HTML de uma mensagem no formato do WhatsApp Web."""
+    body = f'<span dir="ltr">{text if text is not None else f"mensagem {number}"}</span>'
+    if image:
+        body += f'<img src="{image}">'
+    return (
+        f'<div class="focusable-list-item" data-id="false_grupo_ID{number}"><div class="message-in">'
+        f'<div class="copyable-text" data-pre-plain-text="[10:{number:02d}, 12/03/2024] {sender}: ">'
+        f'<span data-testid="author">{sender}</span>'
+        f'<div data-testid="msg-container">{body}</div>'
+        f'<div data-testid="msg-meta">10:{number:02d}</div>'
+        f'</div></div></div>'
+    )
+
+
+def write_run(snapshot_dir, numbers, rows_per_chunk=500, truncate=False, commit=True):
+    """Grava uma execução como o harvester: da mensagem mais recente para a mais antiga."""
+    writer = SnapshotWriter(str(snapshot_dir), "Grupo", rows_per_chunk=rows_per_chunk, truncate=truncate)
+    for number in numbers:
+        writer.add(f"false_grupo_ID{number}", row_html(number))
+    if commit:
+        writer.commit()
+    writer.close()
+    time.sleep(0.001)  # Identificadores de execução distintos
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_snapshot_html_extracts_message_fields(backend):
+    document = (
+        '<!DOCTYPE html><html><body data-group="Grupo" data-run="20240312" data-chunk="3">'
+        '<div class="wa-snapshot-row" data-seq="7" data-message-id="false_grupo_ID1">'
+        + row_html(1, text="olá", image="blob:https://web.whatsapp.com/abc") + '</div></body></html>'
+    )
+    parsed = parse_snapshot_html(document, backend)
+
+    assert (parsed['group'], parsed['run'], parsed['chunk']) == ("Grupo", "20240312", 3)
+    record = parsed['records'][0]
+    assert record['seq'] == 7
+    assert record['message_id'] == "false_grupo_ID1"
+    assert record['sender'] == "Ana"
+    assert record['text'] == "olá"
+    assert record['pre_plain_text'] == "[10:01, 12/03/2024] Ana: "
+    assert record['images'] == ["blob:https://web.whatsapp.com/abc"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_snapshot_dir_orders_runs_chronologically_without_repeats(tmp_path, workers):
+    snapshot_dir = tmp_path / "snapshots"
+    write_run(snapshot_dir, [5, 4, 3, 2, 1], rows_per_chunk=2)
+    # Sincronização posterior: mensagens novas e a última já capturada
+    write_run(snapshot_dir, [7, 6, 5], rows_per_chunk=2)
+
+    parsed = parse_snapshot_dir(str(snapshot_dir), workers=workers)
+    assert parsed['group'] == "Grupo"
+    assert [record['message_id'] for record in parsed['records']] == [f"false_grupo_ID{n}" for n in range(1, 8)]
+    assert parsed['records'][0]['timestamp'] == "2024-03-12-10:01"
+
+
+def test_full_run_replaces_snapshots_only_when_committed(tmp_path):
+    snapshot_dir = tmp_path / "snapshots"
+    write_run(snapshot_dir, [2, 1])
+    write_run(snapshot_dir, [9, 8], truncate=True, commit=False)
+    assert [r['message_id'] for r in parse_snapshot_dir(str(snapshot_dir), workers=1)['records']] == \
+        ["false_grupo_ID1", "false_grupo_ID2"]
+    assert not (tmp_path / "snapshots.tmp").exists()
+
+    write_run(snapshot_dir, [4, 3], truncate=True)
+    assert [r['message_id'] for r in parse_snapshot_dir(str(snapshot_dir), workers=1)['records']] == \
+        ["false_grupo_ID3", "false_grupo_ID4"]
+
+
+def test_reparse_group_rewrites_output_from_snapshots(tmp_path):
+    group_dir = tmp_path / "Grupo"
+    write_run(group_dir / "snapshots", [3, 2, 1])
+    (group_dir / "messages.jsonl").write_text('{"antiga": true}\n', encoding='utf-8')
+
+    assert reparse_group(str(group_dir), "jsonl", workers=1) == 3
+    lines = (group_dir / "messages.jsonl").read_text(encoding='utf-8').splitlines()
+    messages = [json.loads(line) for line in lines]
+    assert [m['text'] for m in messages] == ["mensagem 1", "mensagem 2", "mensagem 3"]
+    assert messages[0]['timestamp'] == "2024-03-12-10:01"
@@ -0,0 +1,61 @@
+# tests/test_sync_scheduler.py
+import datetime
+
+from core.sync_scheduler import ChangeScheduler
+from modules.checkpoint_store import CheckpointStore
+
+ROW = {'title': "Grupo", 'last_time': "10:00", 'preview': "oi", 'unread': 0}
+
+
+def synced_store(tmp_path, *groups, hours_ago=None):
+    """Checkpoints de grupos já sincronizados com a linha ROW."""
+    store = CheckpointStore(str(tmp_path))
+    for group_name in groups:
+        store.complete(group_name, "m1", "2024-01-01-10:00")
+        ChangeScheduler(store).mark_synced(group_name, ROW, new_messages=0)
+        if hours_ago is not None:
+            updated = datetime.datetime.now() - datetime.timedelta(hours=hours_ago.get(group_name, 1))
+            store.checkpoints[group_name]['updated_at'] = updated.isoformat(timespec='seconds')
+    return store
+
+
+def test_change_reason():
+    synced = {'message_id': "m1", 'pending': [], 'chat_list': {'last_time': "10:00", 'preview': "oi"}}
+    assert ChangeScheduler.change_reason({}, ROW) == "nunca sincronizado"
+    assert ChangeScheduler.change_reason({**synced, 'pending': [{'file': "x"}]}, ROW) == "sincronização interrompida"
+    assert ChangeScheduler.change_reason(synced, None) == "fora da lista de conversas"
+    assert ChangeScheduler.change_reason(synced, {**ROW, 'unread': 3}) == "3 não lidas"
+    assert ChangeScheduler.change_reason({**synced, 'chat_list': None}, ROW) == "sem estado da lista de conversas"
+    assert ChangeScheduler.change_reason(synced, {**ROW, 'preview': "novo"}) == "última mensagem mudou"
+    assert ChangeScheduler.change_reason(synced, ROW) is None
+
+
+def test_plan_skips_unchanged_and_orders_by_priority(tmp_path):
+    store = synced_store(tmp_path, "Parado", "Antigo", "Recente", hours_ago={"Antigo": 48, "Recente": 1})
+    rows = {
+        "Parado": ROW,
+        "Antigo": {**ROW, 'preview': "novo"},
+        "Recente": {**ROW, 'unread': 5},
+        "Novo": ROW,
+    }
+    plan = ChangeScheduler(store).plan(["Parado", "Recente", "Antigo", "Novo", "Antigo"], rows)
+
+    assert plan['skipped'] == ["Parado"]
+    # Nunca sincronizado tem defasagem máxima; 48h x 1 supera 1h x (1 + 5 não lidas)
+    assert plan['queue'] == ["Novo", "Antigo", "Recente"]
+    assert [detail['reason'] for detail in plan['details']] == ["nunca sincronizado", "última mensagem mudou",
+                                                                 "5 não lidas"]
+    assert set(plan['rows']) == {"Parado", "Recente", "Antigo", "Novo"}
+
+
+def test_mark_synced_tracks_activity(tmp_path):
+    store = synced_store(tmp_path, "Grupo")
+    scheduler = ChangeScheduler(store)
+    scheduler.mark_synced("Grupo", {**ROW, 'preview': "novo"}, new_messages=10)
+    assert store.get("Grupo")['chat_list'] == {'last_time': "10:00", 'preview': "novo", 'activity': 3.0}
+
+    scheduler.mark_synced("Grupo", None, new_messages=0)
+    assert store.get("Grupo")['chat_list'] == {'last_time': None, 'preview': None, 'activity': 2.1}
+
+    # O estado gravado sobrevive à releitura do arquivo de checkpoints
+    assert CheckpointStore(str(tmp_path)).get("Grupo")['chat_list']['activity'] == 2.1
@@ -0,0 +1,102 @@
+# tests/test_timestamp_normalizer.py
+import datetime
+
+from utils.timestamp_normalizer import NO_TIMESTAMP, TimestampNormalizer, to_epoch
+
+UTC = datetime.timezone.utc
+
+
+def epoch(*args):
+    return int(datetime.datetime(*args, tzinfo=UTC).timestamp())
+
+
+def test_normalize_batch_detects_day_first():
+    normalizer = TimestampNormalizer(tz=UTC)
+    batch = normalizer.normalize_batch(["[22:05, 13/03/2024] Ana: ", "[08:00, 01/02/2024] Bruno: "], with_text=True)
+    assert batch.dayfirst is True
+    assert list(batch.epochs) == [epoch(2024, 3, 13, 22, 5), epoch(2024, 2, 1, 8, 0)]
+    assert batch.senders == ["Ana", "Bruno"]
+    assert batch.timestamps == ["2024-03-13-22:05", "2024-02-01-08:00"]
+
+
+def test_normalize_batch_twelve_hour_defaults_to_month_first():
+    normalizer = TimestampNormalizer(tz=UTC)
+    batch = normalizer.normalize_batch(["[10:05 PM, 3/4/24] Ana: ", "[12:30 a. m., 3/4/24] Ana: "])
+    assert batch.dayfirst is False
+    assert list(batch.epochs) == [epoch(2024, 3, 4, 22, 5), epoch(2024, 3, 4, 0, 30)]
+
+
+def test_normalize_batch_remembers_previous_order():
+    normalizer = TimestampNormalizer(tz=UTC)
+    normalizer.normalize_batch(["[10:00 AM, 3/25/2024] Ana: "])
+    # Sem evidência no lote, a ordem mês/dia do lote anterior é mantida
+    batch = normalizer.normalize_batch(["[10:00, 03/04/2024] Ana: "])
+    assert batch.dayfirst is False
+    assert batch.epochs[0] == epoch(2024, 3, 4, 10, 0)
+
+
+def test_normalize_batch_falls_back_per_date_on_mixed_order():
+    normalizer = TimestampNormalizer(tz=UTC)
+    batch = normalizer.normalize_batch(["[22:05, 13/02/2024] Ana: ", "[10:05 PM, 2/13/24] Bruno: "], with_text=True)
+    # Qualquer que seja a ordem detectada, a data impossível nela é lida na outra ordem
+    assert list(batch.epochs) == [epoch(2024, 2, 13, 22, 5)] * 2
+    assert batch.timestamps == ["2024-02-13-22:05"] * 2
+
+
+def test_split_matches_regex_path():
+    prefixes = ["[22:05, 13/03/2024] Ana Silva: ", "[08:00, 01/02/2024] Bruno, o Grande: "]
+    normalizer = TimestampNormalizer(tz=UTC)
+    fast = normalizer.normalize_batch(prefixes, with_text=True)
+    # Um prefixo inválido no lote desvia tudo para a expressão regular
+    slow = normalizer.normalize_batch(prefixes + [None], with_text=True)
+    assert list(slow.epochs[:2]) == list(fast.epochs)
+    assert slow.senders[:2] == fast.senders == ["Ana Silva", "Bruno, o Grande"]
+    assert slow.timestamps[:2] == fast.timestamps
+
+
+def test_normalize_batch_keeps_one_result_per_prefix():
+    normalizer = TimestampNormalizer(tz=UTC, dayfirst=True)
+    batch = normalizer.normalize_batch([None, "sem prefixo", "[25:00, 01/01/2024] Ana: ",
+                                        "[10:00, 01/01/2024] Ana\nBruno: ", "[10:00, 31/02/2024] Ana: "],
+                                       with_text=True)
+    assert len(batch.epochs) == 5
+    assert list(batch.epochs[:3]) == [NO_TIMESTAMP] * 3
+    assert batch.epochs[3] == epoch(2024, 1, 1, 10, 0)
+    assert batch.epochs[4] == NO_TIMESTAMP
+    assert batch.timestamps == [None, None, None, "2024-01-01-10:00", None]
+
+
+def test_normalize_records_and_single_prefix():
+    normalizer = TimestampNormalizer(tz=UTC)
+    records = [{'pre_plain_text': "[09:15, 20/05/2024] Ana: ", 'timestamp': "09:15"},
+               {'pre_plain_text': None, 'timestamp': "10:00"}]
+    normalizer.normalize_records(records)
+    assert records[0]['epoch'] == epoch(2024, 5, 20, 9, 15)
+    assert records[0]['timestamp'] == "2024-05-20-09:15"
+    assert records[1] == {'pre_plain_text': None, 'timestamp': "10:00", 'epoch': None}
+
+    assert normalizer.normalize("[09:15, 20/05/2024] Ana: ") == ("Ana", epoch(2024, 5, 20, 9, 15))
+    assert normalizer.normalize("qualquer texto") == (None, None)
+    assert normalizer.format(epoch(2024, 5, 20, 9, 15)) == "2024-05-20-09:15"
+
+
+def test_day_label_epoch_accepts_only_day_labels():
+    normalizer = TimestampNormalizer(tz=UTC)
+    today = datetime.date(2024, 3, 13)  # quarta-feira
+    assert normalizer.day_label_epoch("HOJE", today) == epoch(2024, 3, 13)
+    assert normalizer.day_label_epoch("Yesterday", today) == epoch(2024, 3, 12)
+    # Dias da semana se referem à última semana, antes de ontem
+    assert normalizer.day_label_epoch("SEGUNDA-FEIRA", today) == epoch(2024, 3, 11)
+    assert normalizer.day_label_epoch("quarta-feira", today) == epoch(2024, 3, 6)
+    assert normalizer.day_label_epoch("12/03/2024", today) == epoch(2024, 3, 12)
+    assert normalizer.day_label_epoch("2/13/2024", today) == epoch(2024, 2, 13)
+    for label in (None, "", "Mensagens não lidas", "Ana entrou usando o link de convite", "10:05"):
+        assert normalizer.day_label_epoch(label, today) is None
+
+
+def test_to_epoch_bounds():
+    assert to_epoch(None) is None
+    assert to_epoch(1700000000.5) == 1700000000
+    assert to_epoch("2024-03-12", UTC) == epoch(2024, 3, 12)
+    assert to_epoch("2024-03-12", UTC, end_of_day=True) == epoch(2024, 3, 12, 23, 59, 59)
+    assert to_epoch("2024-03-12 18:00", UTC, end_of_day=True) == epoch(2024, 3, 12, 18, 0)
@@ -0,0 +1,94 @@
+# utils/logger.py
+import logging
+import sys
+import threading
+from collections import Counter
+
+from config.settings import LOG_LEVEL, LOG_SAMPLE_EVERY
+
+# Mantém o formato das mensagens do projeto: "[DEBUG] ...", "[WARN] ...", "[ERROR] ..."
+LOG_FORMAT = "[%(levelname)s] %(message)s"
+logging.addLevelName(logging.WARNING, "WARN")
+
+ROOT_LOGGER = "whatsapp"
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Escreve sempre no sys.stdout atual (compatível com contextlib.redirect_stdout)."""
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def get_logger(name=None) -> logging.Logger:
+    """
+    Retorna o logger do scraper, configurando a saída na primeira chamada.
+
+    Args:
+        name (str): Nome do módulo (cria um logger filho, ex.: "whatsapp.content_extractor")
+
+    Returns:
+        logging.Logger: Logger configurado com o nível de LOG_LEVEL
+    """
+    root = logging.getLogger(ROOT_LOGGER)
+    if not root.handlers:
+        handler = _StdoutHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+    return root.getChild(name) if name else root
+
+
+class SampledLogger:
+    """
+    Registra por amostragem as mensagens que se repetem a cada mensagem ou arquivo.
+
+    A primeira ocorrência de cada chave é sempre registrada e, depois, uma a cada
+    "every" ocorrências, com o total acumulado. A formatação só acontece para as
+    ocorrências registradas.
+    """
+    def __init__(self, logger: logging.Logger, every=LOG_SAMPLE_EVERY):
+        """
+        Inicializa o logger amostrado.
+
+        Args:
+            logger (logging.Logger): Logger de destino
+            every (int): Intervalo de amostragem (1 registra todas as ocorrências)
+        """
+        self.logger = logger
+        self.every = max(1, every)
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def log(self, level, key, message, *args):
+        """
+        Conta uma ocorrência e a registra se ela fizer parte da amostra.
+
+        Args:
+            level (int): Nível do logging
+            key (str): Chave que agrupa as ocorrências semelhantes
+            message (str): Mensagem no formato %-style do logging
+            *args: Argumentos da mensagem
+        """
+        with self._lock:
+            self.counts[key] += 1
+            count = self.counts[key]
+        if (count == 1 or count % self.every == 0) and self.logger.isEnabledFor(level):
+            self.logger.log(level, message + " (ocorrência %d)", *args, count)
+
+    def debug(self, key, message, *args):
+        """Registra uma ocorrência de nível DEBUG por amostragem."""
+        self.log(logging.DEBUG, key, message, *args)
+
+    def warning(self, key, message, *args):
+        """Registra uma ocorrência de nível WARN por amostragem."""
+        self.log(logging.WARNING, key, message, *args)
+
+    def error(self, key, message, *args):
+        """Registra uma ocorrência de nível ERROR por amostragem."""
+        self.log(logging.ERROR, key, message, *args)
@@ -0,0 +1,398 @@
+# utils/timestamp_normalizer.py
+import datetime
+import gc
+import operator
+import re
+from array import array
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+# Epoch usado para prefixos que não puderam ser interpretados
+NO_TIMESTAMP = -(2 ** 63)
+
+# Marcador interno de hora ou data inválida
+_INVALID = -(2 ** 62)
+
+# Um prefixo por linha: "[hora, data] remetente: ". A alternativa final casa qualquer
+# outra linha, garantindo exatamente um resultado por prefixo no texto concatenado.
+PREFIX_REGEX = re.compile(r"^(?:\[([^,\]\n]+),\s*([^\]\n]+)\] ?([^\n]*): ?|[^\n]*)$", re.M)
+
+# Hora em 24h ou 12h ("22:05", "10:05 PM", "10:05 p. m.", "22.05", "22:05:31")
+TIME_REGEX = re.compile(r"^\s*(\d{1,2})[:.h](\d{2})(?:[:.]\d{2})?\s*(?:([AaPp])\.?\s?[Mm]\.?)?\s*$")
+
+# Indicador de AM/PM em uma hora de 12h
+MERIDIEM_REGEX = re.compile(r"\d\s*[AaPp]\.?\s?[Mm]")
+
+# Data com três partes numéricas ("01/02/2024", "1/2/24", "01.02.2024", "2024-02-01")
+DATE_REGEX = re.compile(r"^\s*(\d{1,4})[/.\-](\d{1,2})[/.\-](\d{1,4})\.?\s*$")
+
+# Divisores de data relativos (pt, en, es), em dias antes de hoje
+RELATIVE_DAY_LABELS = {"hoje": 0, "today": 0, "hoy": 0, "ontem": 1, "yesterday": 1, "ayer": 1}
+
+# Divisores da última semana exibidos pelo dia da semana (pt, en, es), com segunda-feira = 0
+WEEKDAY_LABELS = {
+    "segunda-feira": 0, "terça-feira": 1, "quarta-feira": 2, "quinta-feira": 3, "sexta-feira": 4,
+    "sábado": 5, "domingo": 6,
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6,
+    "lunes": 0, "martes": 1, "miércoles": 2, "jueves": 3, "viernes": 4,
+}
+
+
+def to_epoch(value, tz: Optional[datetime.tzinfo] = None, end_of_day=False) -> Optional[int]:
+    """
+    Converte um limite de data em epoch.
+
+    Args:
+        value: Epoch (int/float), datetime, date ou texto ISO ("2024-03-12" ou "2024-03-12 18:00")
+        tz (tzinfo): Fuso de datas e horários sem fuso (padrão: fuso local do sistema)
+        end_of_day (bool): Para datas sem horário, usa o fim do dia em vez do início
+
+    Returns:
+        int: Epoch em segundos, ou None se value for None
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        text = value.strip()
+        value = datetime.date.fromisoformat(text) if len(text) <= 10 else datetime.datetime.fromisoformat(text)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time.max if end_of_day else datetime.time.min)
+    if value.tzinfo is None and tz is not None:
+        value = value.replace(tzinfo=tz)
+    return int(value.timestamp())
+
+
+class TimestampBatch(NamedTuple):
+    """Resultado da normalização de um lote de prefixos."""
+    epochs: array          # array('q') com o epoch de cada prefixo (NO_TIMESTAMP se inválido)
+    senders: List[str]     # Remetente de cada prefixo ("" se inválido)
+    dayfirst: bool         # Ordem de data usada no lote (dia/mês ou mês/dia)
+    timestamps: Optional[List[Optional[str]]] = None   # "AAAA-MM-DD-HH:MM" de cada prefixo (with_text=True)
+
+
+class TimestampNormalizer:
+    """
+    Converte prefixos data-pre-plain-text do WhatsApp Web em epochs.
+
+    Os prefixos são processados em lotes: o lote é concatenado e separado com
+    operações de texto (ou, fora do formato exato, por uma única expressão
+    regular), e cada hora e cada data distintas são interpretadas uma só vez
+    (milhares de mensagens compartilham poucos dias). Aceita as variantes de
+    localidade do WhatsApp (12h/24h, dd/mm e mm/dd), detectando a ordem da data
+    pelos próprios valores do lote; datas impossíveis nessa ordem são lidas na outra.
+    """
+    def __init__(self, tz: Optional[datetime.tzinfo] = None, dayfirst: Optional[bool] = None):
+        """
+        Inicializa o normalizador.
+
+        Args:
+            tz (tzinfo): Fuso horário dos horários exibidos (padrão: fuso local do sistema)
+            dayfirst (bool): Força a ordem dia/mês (True) ou mês/dia (False). Se None,
+                a ordem é detectada em cada lote.
+        """
+        self.tz = tz
+        self.dayfirst = dayfirst
+        self.detected_dayfirst: Optional[bool] = None
+        self.time_cache = {}
+        self.date_cache = {}
+        self.day_cache = {}
+        self.resolved_cache = {}
+
+    def _parse_time(self, text) -> Optional[Tuple[int, int]]:
+        """Converte a parte de hora em (hora, minuto), com cache."""
+        if text in self.time_cache:
+            return self.time_cache[text]
+
+        parsed = None
+        match = TIME_REGEX.match(text)
+        if match:
+            hour, minute = int(match.group(1)), int(match.group(2))
+            meridiem = (match.group(3) or "").lower()
+            if meridiem:
+                hour = hour % 12 + (12 if meridiem == "p" else 0)
+            if hour < 24 and minute < 60:
+                parsed = (hour, minute)
+
+        self.time_cache[text] = parsed
+        return parsed
+
+    def _split_date(self, text) -> Optional[Tuple[int, int, int]]:
+        """Separa a parte de data em três números, com cache."""
+        if text not in self.date_cache:
+            match = DATE_REGEX.match(text)
+            self.date_cache[text] = tuple(int(part) for part in match.groups()) if match else None
+        return self.date_cache[text]
+
+    def _detect_dayfirst(self, dates: Iterable[str], twelve_hour: bool) -> bool:
+        """
+        Detecta se as datas estão em dia/mês ou mês/dia.
+
+        Um valor maior que 12 na primeira posição indica dia/mês, e na segunda,
+        mês/dia. Sem evidência, usa o lote anterior ou, na falta dele, mês/dia
+        para relógios de 12h (en-US) e dia/mês para os demais.
+        """
+        if self.dayfirst is not None:
+            return self.dayfirst
+
+        for text in dates:
+            parts = self._split_date(text)
+            if not parts or parts[0] > 31:
+                continue
+            if parts[0] > 12:
+                self.detected_dayfirst = True
+                return True
+            if parts[1] > 12:
+                self.detected_dayfirst = False
+                return False
+
+        if self.detected_dayfirst is not None:
+            return self.detected_dayfirst
+        return not twelve_hour
+
+    def _day(self, text, dayfirst) -> Optional[Tuple[int, int, int]]:
+        """Converte a parte de data em (ano, mês, dia) na ordem informada."""
+        parts = self._split_date(text)
+        if not parts:
+            return None
+        first, second, third = parts
+        if first > 31:
+            year, month, day = first, second, third
+        elif dayfirst:
+            day, month, year = first, second, third
+        else:
+            month, day, year = first, second, third
+        if year < 100:
+            year += 2000
+        return year, month, day
+
+    def _resolve_day(self, text, dayfirst) -> Tuple[Optional[Tuple[int, int, int]], Optional[Tuple[int, bool]]]:
+        """
+        Converte a parte de data em (ano, mês, dia) e no início do dia, com cache por data e ordem.
+
+        Se a ordem do lote resulta em uma data impossível (ex.: "2/13/24" em um lote
+        dia/mês), a data é interpretada na outra ordem, para que lotes com formatos
+        misturados não percam as mensagens do formato minoritário.
+        """
+        key = (text, dayfirst)
+        if key not in self.resolved_cache:
+            ymd = self._day(text, dayfirst)
+            start = self._day_start(ymd) if ymd else None
+            if ymd and start is None:
+                swapped = self._day(text, not dayfirst)
+                swapped_start = self._day_start(swapped)
+                if swapped_start:
+                    ymd, start = swapped, swapped_start
+            self.resolved_cache[key] = (ymd, start)
+        return self.resolved_cache[key]
+
+    @staticmethod
+    def _split_prefixes(prefixes: List[Optional[str]]) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Separa a hora, a data e o remetente de cada prefixo.
+
+        Quando todos os prefixos têm o formato exato "[hora, data] remetente: ", o lote
+        concatenado é separado só com operações de texto; os demais lotes são
+        percorridos pela expressão regular.
+
+        Returns:
+            tuple: (horas, datas, remetentes), com um item por prefixo ("" se inválido)
+        """
+        count = len(prefixes)
+        try:
+            joined = "\n".join(prefixes)
+        except TypeError:
+            joined = None
+
+        # Um prefixo por linha; None e quebras de linha internas só são tratados quando existem
+        if joined is None or joined.count("\n") != count - 1:
+            joined = "\n".join((prefix or "").replace("\n", " ") for prefix in prefixes)
+        elif joined.startswith("[") and joined.endswith(": ") and joined.count(": \n[") == count - 1:
+            fields = joined[1:-2].replace(": \n[", "] ").split("] ")
+            if len(fields) == 2 * count:
+                heads = ", ".join(fields[0::2]).split(", ")
+                if len(heads) == 2 * count:
+                    return heads[0::2], heads[1::2], fields[1::2]
+
+        matches = PREFIX_REGEX.findall(joined)
+        return [match[0] for match in matches], [match[1] for match in matches], [match[2] for match in matches]
+
+    def _day_start(self, ymd) -> Optional[Tuple[int, bool]]:
+        """
+        Retorna o epoch da meia-noite do dia e se o deslocamento do fuso é o mesmo o dia todo.
+
+        Dias com mudança de horário de verão são calculados hora a hora.
+        """
+        if ymd not in self.day_cache:
+            try:
+                start = datetime.datetime(*ymd, tzinfo=self.tz)
+                end = datetime.datetime(*ymd, 23, 59, tzinfo=self.tz)
+                start_epoch = int(start.timestamp())
+                self.day_cache[ymd] = (start_epoch, int(end.timestamp()) - start_epoch == 86340)
+            except (ValueError, OverflowError):
+                self.day_cache[ymd] = None
+        return self.day_cache[ymd]
+
+    def _epoch(self, ymd, hour_minute) -> int:
+        """Calcula o epoch exato de um horário em um dia com mudança de fuso."""
+        return int(datetime.datetime(*ymd, *hour_minute, tzinfo=self.tz).timestamp())
+
+    def normalize_batch(self, prefixes: Iterable[Optional[str]], with_text=False) -> TimestampBatch:
+        """
+        Normaliza um lote de prefixos "[hora, data] remetente: ".
+
+        Args:
+            prefixes: Prefixos data-pre-plain-text (None ou inválidos são aceitos)
+            with_text (bool): Se True, também monta o timestamp textual "AAAA-MM-DD-HH:MM"
+
+        Returns:
+            TimestampBatch: Epochs (array compacto), remetentes e ordem de data usada
+        """
+        # O lote cria milhões de objetos sem ciclos; com a coleta automática ativa, cada
+        # coleta percorreria de novo as listas grandes já montadas
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._normalize_batch(list(prefixes), with_text)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _normalize_batch(self, prefixes: List[Optional[str]], with_text) -> TimestampBatch:
+        """Normaliza o lote já convertido em lista (ver normalize_batch)."""
+        if not prefixes:
+            return TimestampBatch(array('q'), [], self.dayfirst if self.dayfirst is not None else True,
+                                  [] if with_text else None)
+
+        time_list, date_list, senders = self._split_prefixes(prefixes)
+
+        # Cada hora e cada data distintas são interpretadas uma única vez
+        time_texts = set(time_list)
+        date_texts = set(date_list)
+        twelve_hour = any(MERIDIEM_REGEX.search(text) for text in time_texts)
+        dayfirst = self._detect_dayfirst(date_texts, twelve_hour)
+
+        # Valores inválidos recebem um deslocamento muito negativo, para que a soma
+        # abaixo dispense testes por mensagem
+        times = {text: self._parse_time(text) for text in time_texts}
+        seconds = {text: (value[0] * 3600 + value[1] * 60 if value else _INVALID) for text, value in times.items()}
+        days = {}
+        day_labels = {}
+        irregular = {}
+        for text in date_texts:
+            ymd, start = self._resolve_day(text, dayfirst)
+            days[text] = start[0] if start else _INVALID
+            day_labels[text] = "%04d-%02d-%02d" % ymd if start else ""
+            if start and not start[1]:
+                irregular[text] = ymd
+
+        # Somas e consultas feitas por map, sem código Python por mensagem
+        values = list(map(operator.add, map(days.__getitem__, date_list), map(seconds.__getitem__, time_list)))
+
+        # Dias com mudança de horário de verão são recalculados mensagem a mensagem
+        if irregular:
+            for index, (time_text, date_text) in enumerate(zip(time_list, date_list)):
+                if date_text in irregular and times[time_text]:
+                    values[index] = self._epoch(irregular[date_text], times[time_text])
+
+        # Só há epochs inválidos se alguma hora ou data distinta for inválida
+        invalid = _INVALID in seconds.values() or _INVALID in days.values()
+        if invalid:
+            values = [value if value > _INVALID // 2 else NO_TIMESTAMP for value in values]
+        epochs = array('q', values)
+
+        # O texto é montado a partir das partes já interpretadas, sem formatar data por mensagem
+        timestamps = None
+        if with_text:
+            time_labels = {text: ("-%02d:%02d" % value if value else "") for text, value in times.items()}
+            timestamps = list(map(operator.add, map(day_labels.__getitem__, date_list),
+                                  map(time_labels.__getitem__, time_list)))
+            if invalid:
+                timestamps = [text if epoch != NO_TIMESTAMP else None for text, epoch in zip(timestamps, epochs)]
+
+        return TimestampBatch(epochs, senders, dayfirst, timestamps)
+
+    def normalize_records(self, records: List[dict]) -> List[dict]:
+        """
+        Preenche 'epoch' e o timestamp completo dos registros a partir de 'pre_plain_text'.
+
+        Registros sem prefixo reconhecido mantêm o timestamp original e recebem epoch None.
+
+        Args:
+            records (list): Registros de mensagem do extrator (alterados no próprio objeto)
+
+        Returns:
+            list: Os mesmos registros
+        """
+        batch = self.normalize_batch([record.get('pre_plain_text') for record in records], with_text=True)
+        for record, epoch, timestamp in zip(records, batch.epochs, batch.timestamps):
+            if epoch == NO_TIMESTAMP:
+                record['epoch'] = None
+            else:
+                record['epoch'] = epoch
+                record['timestamp'] = timestamp
+        return records
+
+    def normalize(self, prefix: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Normaliza um único prefixo.
+
+        Args:
+            prefix (str): Prefixo data-pre-plain-text
+
+        Returns:
+            tuple: (remetente, epoch), ou (None, None) se o prefixo não for reconhecido
+        """
+        batch = self.normalize_batch([prefix])
+        if batch.epochs[0] == NO_TIMESTAMP:
+            return None, None
+        return batch.senders[0], batch.epochs[0]
+
+    def day_label_epoch(self, label: Optional[str], today: Optional[datetime.date] = None) -> Optional[int]:
+        """
+        Converte o rótulo de um divisor de data no epoch da meia-noite do dia.
+
+        Aceita datas ("12/03/2024"), rótulos relativos ("HOJE", "ONTEM") e dias da
+        semana ("SEGUNDA-FEIRA"), usados pelo WhatsApp para a última semana.
+
+        Args:
+            label (str): Texto do divisor
+            today (date): Data de referência dos rótulos relativos (padrão: hoje no fuso do normalizador)
+
+        Returns:
+            int: Epoch da meia-noite do dia, ou None se o rótulo não for reconhecido
+        """
+        text = (label or "").strip().lower()
+        if not text:
+            return None
+        today = today or datetime.datetime.now(self.tz).date()
+
+        if text in RELATIVE_DAY_LABELS:
+            day = today - datetime.timedelta(days=RELATIVE_DAY_LABELS[text])
+            ymd = (day.year, day.month, day.day)
+        elif text in WEEKDAY_LABELS:
+            # Dias da semana se referem à última semana, antes de ontem
+            days_ago = (today.weekday() - WEEKDAY_LABELS[text]) % 7
+            day = today - datetime.timedelta(days=days_ago if days_ago >= 2 else days_ago + 7)
+            ymd = (day.year, day.month, day.day)
+        else:
+            _, start = self._resolve_day(text, self._detect_dayfirst([text], False))
+            return start[0] if start else None
+
+        start = self._day_start(ymd)
+        return start[0] if start else None
+
+    def format(self, epoch: Optional[int], fmt="%Y-%m-%d-%H:%M") -> Optional[str]:
+        """
+        Formata um epoch no fuso do normalizador.
+
+        Args:
+            epoch (int): Epoch em segundos
+            fmt (str): Formato de saída (padrão do scraper: "AAAA-MM-DD-HH:MM")
+
+        Returns:
+            str: Data formatada, ou None para epochs inválidos
+        """
+        if epoch is None or epoch == NO_TIMESTAMP:
+            return None
+        return datetime.datetime.fromtimestamp(epoch, self.tz).strftime(fmt)
@@ -1,29 +1,25 @@
-import re
-import datetime
+from utils.timestamp_normalizer import TimestampNormalizer
 
-def get_timestamp_regex(message) -> str:
+# Normalizador compartilhado: mantém em cache as horas e datas já interpretadas
+_normalizer = TimestampNormalizer()
+
+def get_timestamp_regex(message):
     """
     Obtém o timestamp e o usuário remetente da mensagem no WhatsApp Web.
 
-    Args:
-        message (WebElement): O elemento da mensagem no WhatsApp Web.
+    Para muitas mensagens, prefira TimestampNormalizer.normalize_batch,
+    que processa os prefixos em lote.
 
+    Args:
+        message (str): Prefixo data-pre-plain-text da mensagem ("[hora, data] remetente: ").
 
+    Returns:
+        tuple: (remetente, "AAAA-MM-DD-HH:MM"), ou (None, None) se o prefixo não for reconhecido
     """
-    # Obtém o usuário remetente da mensagem 
-    match = re.search(r'\[(\d{2}:\d{2}), (\d{2}/\d{2}/\d{4})\] (.*?):', message)
-    
-    # Obtém a hora da mensagem
-    time_part = match.group(1)
-
-    # Obtém a data da mensagem
-    date_part = match.group(2)
-
-    # Obtém o usuário remetente da mensagem
-    user = match.group(3)
+    batch = _normalizer.normalize_batch([message], with_text=True)
 
-    # Formata a data e hora para o padrão desejado
-    timestamp = datetime.datetime.strptime(f"{date_part} {time_part}", "%d/%m/%Y %H:%M").strftime("%Y-%m-%d-%H:%M")
-    print(f"[DEBUG] Timestamp: {timestamp}, Usuário: {user}")
+    # Prefixos fora do padrão não interrompem a extração
+    if batch.timestamps[0] is None:
+        return None, None
 
-    return user, timestamp
\ No newline at end of file
+    return batch.senders[0], batch.timestamps[0]